@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_init, post_save, post_delete
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'accounts'
\ No newline at end of file
+    name = 'accounts'
+
+    def ready(self):
+        from . import stats
+
+        # Keep the dashboard counters in step with every tracked model
+        for label in stats.TRACKED_MODELS:
+            post_init.connect(stats.snapshot, sender=label, dispatch_uid=f'stats_snapshot_{label}')
+            post_save.connect(stats.on_save, sender=label, dispatch_uid=f'stats_save_{label}')
+            post_delete.connect(stats.on_delete, sender=label, dispatch_uid=f'stats_delete_{label}')
@@ -0,0 +1,159 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from jobs.models import Job, Application
+from .models import User
+
+# Full exports of the admin lists, streamed row by row. Rows are read with
+# values_list() over an iterator, joined in the same query, so memory stays
+# flat however many rows match: no model instances, no result cache.
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+CHUNK_SIZE = 2000
+
+
+def filter_users(params):
+    users = User.objects.order_by('-date_joined')
+    if params.get('role'):
+        users = users.filter(role=params['role'])
+    search_query = params.get('search')
+    if search_query:
+        users = users.filter(
+            username__icontains=search_query
+        ) | users.filter(
+            email__icontains=search_query
+        ) | users.filter(
+            first_name__icontains=search_query
+        ) | users.filter(
+            last_name__icontains=search_query
+        )
+    return users
+
+
+def filter_jobs(params):
+    jobs = Job.objects.select_related('employer').order_by('-created_at')
+    if params.get('status'):
+        jobs = jobs.filter(status=params['status'])
+    search_query = params.get('search')
+    if search_query:
+        jobs = jobs.filter(
+            title__icontains=search_query
+        ) | jobs.filter(
+            employer__company_name__icontains=search_query
+        ) | jobs.filter(
+            location__icontains=search_query
+        )
+    return jobs
+
+
+def filter_applications(params):
+    applications = Application.objects.select_related(
+        'job', 'job__employer', 'applicant', 'applicant__user'
+    ).order_by('-applied_date')
+    if params.get('status'):
+        applications = applications.filter(status=params['status'])
+    search_query = params.get('search')
+    if search_query:
+        applications = applications.filter(
+            applicant__full_name__icontains=search_query
+        ) | applications.filter(
+            job__title__icontains=search_query
+        ) | applications.filter(
+            job__employer__company_name__icontains=search_query
+        )
+    return applications
+
+
+# dataset: (filter function, ((column, lookup), ...))
+DATASETS = {
+    'users': (filter_users, (
+        ('id', 'id'), ('username', 'username'), ('email', 'email'),
+        ('first_name', 'first_name'), ('last_name', 'last_name'), ('role', 'role'), ('phone', 'phone'),
+        ('is_active', 'is_active'), ('is_staff', 'is_staff'),
+        ('date_joined', 'date_joined'), ('last_login', 'last_login'),
+    )),
+    'jobs': (filter_jobs, (
+        ('id', 'id'), ('title', 'title'), ('company', 'employer__company_name'),
+        ('category', 'category'), ('location', 'location'), ('job_type', 'job_type'),
+        ('salary_min', 'salary_min'), ('salary_max', 'salary_max'),
+        ('status', 'status'), ('is_active', 'is_active'), ('applications', 'applications_count'),
+        ('application_deadline', 'application_deadline'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    )),
+    'applications': (filter_applications, (
+        ('id', 'id'), ('job_id', 'job_id'), ('job_title', 'job__title'),
+        ('company', 'job__employer__company_name'),
+        ('applicant_id', 'applicant_id'), ('applicant_name', 'applicant__full_name'),
+        ('applicant_email', 'applicant__user__email'),
+        ('status', 'status'), ('applied_date', 'applied_date'), ('updated_at', 'updated_at'),
+    )),
+}
+
+
+def export_rows(dataset, params):
+    """(column names, iterator of value tuples) for the filtered ``dataset``"""
+    filter_queryset, columns = DATASETS[dataset]
+    # values_list() joins what it needs and drops select_related()
+    rows = filter_queryset(params).values_list(*(lookup for _, lookup in columns))
+    return [name for name, _ in columns], rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object csv.writer writes to; each write returns the line"""
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    value = str(value)
+    # Spreadsheets run cells starting with these as formulas
+    if value[:1] in ('=', '+', '-', '@', '\t', '\r') and not _is_number(value):
+        return "'" + value
+    return value
+
+
+def _is_number(value):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def jsonl_lines(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
+
+
+def export_lines(dataset, params, export_format):
+    columns, rows = export_rows(dataset, params)
+    return (csv_lines if export_format == 'csv' else jsonl_lines)(columns, rows)
+
+
+def streaming_export(dataset, params, export_format):
+    response = StreamingHttpResponse(
+        export_lines(dataset, params, export_format), content_type=FORMATS[export_format],
+    )
+    filename = f'jobsly-{dataset}-{timezone.localdate():%Y%m%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Ask proxies not to buffer the whole export before passing it on
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,5 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from django.core.files.uploadedfile import UploadedFile
+from jobsly import thumbnails
 from .models import User, ApplicantProfile, EmployerProfile
 
 class UserRegistrationForm(UserCreationForm):
@@ -39,6 +41,18 @@ class EmployerProfileForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'rows': 4}),
         }
 
+    def clean_logo(self):
+        logo = self.cleaned_data.get('logo')
+        if isinstance(logo, UploadedFile):
+            # Refuse what the thumbnail workers would refuse to decode
+            try:
+                thumbnails.open_bounded(logo)
+            except thumbnails.ThumbnailError as e:
+                raise forms.ValidationError(str(e))
+            finally:
+                logo.seek(0)
+        return logo
+
 class AdminUserForm(forms.ModelForm):
     """Form for admin to edit users"""
     class Meta:
@@ -52,4 +66,20 @@ class AdminUserForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         # Make certain fields read-only for non-superusers if needed
         if not self.instance.is_superuser:
-            self.fields['is_staff'].help_text = "Grant admin access to this user"
\ No newline at end of file
+            self.fields['is_staff'].help_text = "Grant admin access to this user"
+
+class BulkJobModerationForm(forms.Form):
+    STATUS_CHOICES = (
+        ('approved', 'Approve'),
+        ('rejected', 'Reject'),
+    )
+
+    status = forms.ChoiceField(choices=STATUS_CHOICES)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        ids = [int(value) for value in self.data.getlist('jobs') if value.isdigit()]
+        if not ids:
+            raise forms.ValidationError("Select at least one job.")
+        cleaned_data['jobs'] = ids
+        return cleaned_data
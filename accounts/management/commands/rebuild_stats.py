@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from accounts import stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the admin dashboard counters from the users, jobs and applications tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        values = stats.rebuild_counters(using=options['database'])
+        for name in sorted(values):
+            self.stdout.write(f'{name}: {values[name]}')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(values)} counters.'))
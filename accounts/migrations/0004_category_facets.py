@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:13
+
+from django.db import migrations, models
+
+
+def drop_job_counters(apps, schema_editor):
+    # The jobs counters now include per-category facets. Dropping them makes
+    # the next stats.get_counters() rebuild the lot
+    StatCounter = apps.get_model('accounts', 'StatCounter')
+    StatCounter.objects.using(schema_editor.connection.alias).filter(name__startswith='jobs.').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='statcounter',
+            name='name',
+            field=models.CharField(max_length=150, unique=True),
+        ),
+        migrations.RunPython(drop_job_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:22
+
+from django.db import migrations, models
+import jobsly.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_category_facets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='cv',
+            field=models.FileField(blank=True, db_index=True, null=True, storage=jobsly.storage.ContentAddressedStorage(), upload_to='cvs/'),
+        ),
+    ]
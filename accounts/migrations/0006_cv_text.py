@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_deduplicated_cv_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicantprofile',
+            name='cv_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='applicantprofile',
+            name='cv_text_source',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from jobsly.storage import cv_storage
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -11,6 +12,15 @@ class User(AbstractUser):
     phone = models.CharField(max_length=15, blank=True)
     email = models.EmailField(unique=True)
 
+    class Meta(AbstractUser.Meta):
+        swappable = 'AUTH_USER_MODEL'
+        indexes = [
+            models.Index(fields=['role', 'is_active'], name='user_role_active_idx'),
+            models.Index(fields=['-date_joined'], name='user_joined_idx'),
+            models.Index(fields=['last_login'], name='user_last_login_idx'),
+            models.Index(fields=['is_staff'], name='user_staff_idx', condition=models.Q(is_staff=True)),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -20,7 +30,11 @@ class ApplicantProfile(models.Model):
     phone = models.CharField(max_length=15)
     skills = models.TextField(help_text="List your skills separated by commas")
     education = models.TextField()
-    cv = models.FileField(upload_to='cvs/', null=True, blank=True)
+    # Deduplicated; indexed for the storage's reference checks
+    cv = models.FileField(upload_to='cvs/', storage=cv_storage, db_index=True, null=True, blank=True)
+    # Extracted text and the cv name it came from, as on Application
+    cv_text = models.TextField(blank=True, editable=False)
+    cv_text_source = models.CharField(max_length=100, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -39,4 +53,13 @@ class EmployerProfile(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return self.company_name
\ No newline at end of file
+        return self.company_name
+
+class StatCounter(models.Model):
+    """Incrementally maintained row counts for the admin dashboards (see accounts/stats.py)"""
+    # Room for grouped names like 'jobs.category:<100 character category>'
+    name = models.CharField(max_length=150, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
@@ -0,0 +1,204 @@
+from collections import Counter
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Q
+
+from jobsly.routers import replica_alias
+
+from .models import StatCounter
+
+
+def _user_buckets(user):
+    buckets = {'total', f'role:{user.role}'}
+    if user.is_staff:
+        buckets.add('staff')
+    return buckets
+
+
+def _job_buckets(job):
+    buckets = {'total', f'status:{job.status}'}
+    if job.is_active:
+        buckets.add('active')
+        if job.status == 'approved':
+            # Category facet: live jobs only
+            buckets.add(f'category:{job.category}')
+    return buckets
+
+
+def _application_buckets(application):
+    return {'total', f'status:{application.status}'}
+
+
+# model label -> (counter prefix, fields the buckets depend on, bucket function)
+TRACKED_MODELS = {
+    'accounts.User': ('users', ('role', 'is_staff'), _user_buckets),
+    'jobs.Job': ('jobs', ('status', 'is_active', 'category'), _job_buckets),
+    'jobs.Application': ('applications', ('status',), _application_buckets),
+}
+
+# Counters with one row per distinct value, e.g. 'jobs.category:Design'.
+# model label -> [(field, condition)]. Rows are created on first use.
+GROUPED_COUNTERS = {
+    'jobs.Job': [('category', Q(status='approved', is_active=True))],
+}
+
+
+def _aggregate(model_label):
+    """Conditional aggregation: every counter for one table in a single query"""
+    model = apps.get_model(model_label)
+    prefix = TRACKED_MODELS[model_label][0]
+    aggregates = {'total': Count('id')}
+    if model_label == 'accounts.User':
+        for role, _ in model.ROLE_CHOICES:
+            aggregates[f'role:{role}'] = Count('id', filter=Q(role=role))
+        aggregates['staff'] = Count('id', filter=Q(is_staff=True))
+    else:
+        for status, _ in model.STATUS_CHOICES:
+            aggregates[f'status:{status}'] = Count('id', filter=Q(status=status))
+        if model_label == 'jobs.Job':
+            aggregates['active'] = Count('id', filter=Q(is_active=True))
+    return model, prefix, aggregates
+
+
+def expected_counter_names():
+    names = set()
+    for label in TRACKED_MODELS:
+        _, prefix, aggregates = _aggregate(label)
+        names.update(f'{prefix}.{name}' for name in aggregates)
+    return names
+
+
+def _grouped_counts(using=DEFAULT_DB_ALIAS):
+    """GROUP BY query per grouped counter"""
+    values = {}
+    for label, groups in GROUPED_COUNTERS.items():
+        model = apps.get_model(label)
+        prefix = TRACKED_MODELS[label][0]
+        for field, condition in groups:
+            rows = (
+                model._default_manager.using(using).filter(condition)
+                .values_list(field).annotate(count=Count('id')).order_by()
+            )
+            values.update((f'{prefix}.{field}:{value}', count) for value, count in rows)
+    return values
+
+
+def is_grouped(name):
+    for label, groups in GROUPED_COUNTERS.items():
+        prefix = TRACKED_MODELS[label][0]
+        if any(name.startswith(f'{prefix}.{field}:') for field, _ in groups):
+            return True
+    return False
+
+
+def rebuild_counters(using=DEFAULT_DB_ALIAS):
+    """Recompute every counter from scratch, one aggregate query per table"""
+    values = {}
+    for label in TRACKED_MODELS:
+        model, prefix, aggregates = _aggregate(label)
+        result = model._default_manager.using(using).aggregate(**aggregates)
+        values.update((f'{prefix}.{name}', value) for name, value in result.items())
+    values.update(_grouped_counts(using))
+
+    with transaction.atomic(using=using):
+        StatCounter.objects.using(using).all().delete()
+        StatCounter.objects.using(using).bulk_create([
+            StatCounter(name=name, value=value) for name, value in values.items()
+        ])
+    return values
+
+
+def get_counters(using=DEFAULT_DB_ALIAS):
+    """
+    All counters as a dict, e.g. ``counters['jobs.status:pending']``.
+
+    A single primary-key-sized read. If any counter is missing (fresh
+    database, or invalidated by ``invalidate``) they are rebuilt first, on
+    the primary when ``using`` is the read-only replica.
+    """
+    counters = dict(StatCounter.objects.using(using).values_list('name', 'value'))
+    if not expected_counter_names() <= counters.keys():
+        counters = rebuild_counters(using=DEFAULT_DB_ALIAS if using == replica_alias() else using)
+    return counters
+
+
+def apply_deltas(deltas, using=DEFAULT_DB_ALIAS):
+    """Add ``deltas`` ({counter name: change}) to the stored counters"""
+    counters = StatCounter.objects.using(using)
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        updated = counters.filter(name=name).update(value=F('value') + delta)
+        if not is_grouped(name):
+            # Missing rows are left alone; get_counters() rebuilds them
+            continue
+        if not updated and delta > 0:
+            # First row with this value (ignore_conflicts: someone else may
+            # have just created it), then count as usual
+            counters.bulk_create([StatCounter(name=name, value=0)], ignore_conflicts=True)
+            counters.filter(name=name).update(value=F('value') + delta)
+        elif delta < 0:
+            # Rebuilds only produce non-zero groups, so don't keep empty ones
+            counters.filter(name=name, value__lte=0).delete()
+
+
+def invalidate(model_label, using=DEFAULT_DB_ALIAS):
+    """Drop one table's counters so the next read rebuilds them"""
+    prefix = TRACKED_MODELS[model_label][0]
+    StatCounter.objects.using(using).filter(name__startswith=f'{prefix}.').delete()
+
+
+def bucket_deltas(model_label, before=None, after=None):
+    """Counter deltas for one row moving from state ``before`` to ``after``"""
+    prefix = TRACKED_MODELS[model_label][0]
+    deltas = Counter()
+    for bucket in before or ():
+        deltas[f'{prefix}.{bucket}'] -= 1
+    for bucket in after or ():
+        deltas[f'{prefix}.{bucket}'] += 1
+    return deltas
+
+
+def bulk_bucket_deltas(model_label, changes):
+    """bucket_deltas() summed over many rows; ``changes`` yields (before, after, row count)"""
+    deltas = Counter()
+    for before, after, count in changes:
+        for name, delta in bucket_deltas(model_label, before, after).items():
+            deltas[name] += delta * count
+    return deltas
+
+
+def buckets(instance):
+    return TRACKED_MODELS[instance._meta.label][2](instance)
+
+
+# ---- model signal handlers, connected in AccountsConfig.ready() ----
+
+def snapshot(sender, instance, **kwargs):
+    label = sender._meta.label
+    fields = TRACKED_MODELS[label][1]
+    if instance.pk is None or not (set(fields) & instance.get_deferred_fields()):
+        instance._stat_buckets = TRACKED_MODELS[label][2](instance) if instance.pk else None
+
+
+def on_save(sender, instance, created, using=DEFAULT_DB_ALIAS, **kwargs):
+    label = sender._meta.label
+    after = TRACKED_MODELS[label][2](instance)
+    if created:
+        apply_deltas(bucket_deltas(label, after=after), using=using)
+    elif hasattr(instance, '_stat_buckets'):
+        apply_deltas(bucket_deltas(label, before=instance._stat_buckets, after=after), using=using)
+    else:
+        # Loaded with the tracked fields deferred, so the old state is unknown
+        invalidate(label, using=using)
+    instance._stat_buckets = after
+
+
+def on_delete(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    label = sender._meta.label
+    before = getattr(instance, '_stat_buckets', None)
+    if before is None:
+        invalidate(label, using=using)
+    else:
+        apply_deltas(bucket_deltas(label, before=before), using=using)
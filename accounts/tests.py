@@ -1,3 +1,261 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs import caching, facets
+from jobs.models import Application, Job, JobAlertOutbox
+from jobs.tests import QueryBudgetMixin, QueryPlanMixin, make_applicant, make_employer, make_job
+from django.utils import timezone
+
+from .models import StatCounter, User
+from . import stats
+
+
+class StatCounterTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.applicant = make_applicant('seeker')
+
+    def assertCountersMatchTables(self):
+        counters = stats.get_counters()
+        self.assertEqual(counters, stats.rebuild_counters())
+        return counters
+
+    def test_counters_follow_saves_and_deletes(self):
+        stats.rebuild_counters()
+        job = make_job(self.employer, status='pending')
+        other = make_job(self.employer, status='approved')
+        Application.objects.create(job=other, applicant=self.applicant, cv='cv.pdf')
+
+        job = Job.objects.get(pk=job.pk)
+        job.status = 'approved'
+        job.is_active = False
+        job.save()
+        other.delete()
+
+        counters = self.assertCountersMatchTables()
+        self.assertEqual(counters['jobs.status:approved'], 1)
+        self.assertEqual(counters['jobs.active'], 0)
+        self.assertEqual(counters['applications.total'], 0)
+
+    def test_deferred_save_invalidates(self):
+        stats.rebuild_counters()
+        job = make_job(self.employer, status='pending')
+        job = Job.objects.only('id').get(pk=job.pk)
+        job.status = 'rejected'
+        job.save()
+        self.assertFalse(StatCounter.objects.filter(name__startswith='jobs.').exists())
+        self.assertEqual(self.assertCountersMatchTables()['jobs.status:rejected'], 1)
+
+    def test_rebuild_command_repairs_drift(self):
+        stats.rebuild_counters()
+        User.objects.filter(pk=self.applicant.user.pk).update(role='employer')
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertEqual(stats.get_counters()['users.role:employer'], 2)
+
+    def test_system_stats_query_count(self):
+        admin = User.objects.create_user('root', 'root@example.com', 'pass', is_staff=True, role='admin')
+        self.client.force_login(admin)
+        stats.rebuild_counters()
+        # session + user, counters, one aggregate each for users and jobs
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('admin_system_stats'))
+        self.assertEqual(response.context['user_stats']['admins'], 1)
+
+        for name in ('admin_dashboard', 'admin_job_management'):
+            self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+
+
+class ModerationQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.pending = [
+            make_job(self.employer, title=f'Job {i}', category=f'Category {i % 3}', status='pending')
+            for i in range(12)
+        ]
+        self.live = make_job(self.employer, title='Live', category='Category 0')
+        self.admin = User.objects.create_user('root', 'root@example.com', 'pass', is_staff=True, role='admin')
+        self.client.force_login(self.admin)
+        stats.rebuild_counters()
+
+    def moderate(self, jobs, status):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('admin_bulk_moderate_jobs'), {
+                'status': status, 'jobs': [job.id for job in jobs],
+            })
+
+    def test_approval_batch_side_effects(self):
+        facets.category_facets()
+        listings_version = caching.versions(caching.LISTINGS)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.moderate(self.pending[:10], 'approved')
+        self.assertRedirects(response, reverse('admin_job_management') + '?status=pending',
+                             fetch_redirect_response=False)
+        self.assertEqual(Job.objects.filter(status='approved').count(), 11)
+
+        # Statement count doesn't grow with the batch
+        self.assertLessEqual(len(queries), 20, '\n'.join(q['sql'] for q in queries.captured_queries))
+        self.assertEqual(
+            len([q for q in queries.captured_queries if q['sql'].startswith('UPDATE "jobs_job"')]), 1)
+
+        self.assertEqual(JobAlertOutbox.objects.exclude(job=self.live).count(), 10)
+        self.assertEqual(stats.get_counters(), stats.rebuild_counters())
+        self.assertEqual(dict(facets.category_facets()), {'Category 0': 5, 'Category 1': 3, 'Category 2': 3})
+        self.assertNotEqual(caching.versions(caching.LISTINGS), listings_version)
+
+    def test_reapproval_does_not_alert_twice(self):
+        self.moderate(self.pending[:2], 'approved')
+        self.moderate(self.pending[:2], 'rejected')
+        self.moderate(self.pending[:3], 'approved')
+        self.assertEqual(JobAlertOutbox.objects.exclude(job=self.live).count(), 3)
+        self.assertEqual(stats.get_counters()['jobs.status:approved'], 4)
+
+    def test_single_approval_queues_alert(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('admin_update_job_status', args=[self.pending[0].id, 'approved']))
+        self.assertEqual(
+            list(JobAlertOutbox.objects.exclude(job=self.live).values_list('job_id', flat=True)),
+            [self.pending[0].id],
+        )
+
+    def test_toggle_active_updates_without_saving(self):
+        facets.category_facets()
+        listings_version = caching.versions(caching.LISTINGS)
+        url = reverse('admin_toggle_job_active', args=[self.live.id])
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.client.get(url)
+        self.assertFalse(Job.objects.get(pk=self.live.pk).is_active)
+        # One UPDATE of the flag, not a save() of every column
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "jobs_job"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"title"', updates[0])
+        self.assertEqual(stats.get_counters(), stats.rebuild_counters())
+        self.assertEqual(facets.category_facets(), [])
+        self.assertNotEqual(caching.versions(caching.LISTINGS), listings_version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(url)
+        self.assertTrue(Job.objects.get(pk=self.live.pk).is_active)
+        self.assertEqual(stats.get_counters(), stats.rebuild_counters())
+
+    def test_invalid_requests_change_nothing(self):
+        self.moderate(self.pending[:2], 'deleted')
+        self.moderate([], 'approved')
+        self.assertFalse(Job.objects.filter(status='approved').exclude(pk=self.live.pk).exists())
+        self.client.force_login(self.employer.user)
+        self.moderate(self.pending[:2], 'approved')
+        self.assertFalse(Job.objects.filter(status='approved').exclude(pk=self.live.pk).exists())
+
+
+class AdminExportTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer(company_name='=HYPERLINK("http://evil")')
+        self.jobs = [make_job(self.employer, title=f'Job {i}') for i in range(3)]
+        for i in range(6):
+            applicant = make_applicant(f'seeker{i}')
+            application = Application.objects.create(job=self.jobs[i % 3], applicant=applicant, cv='cv.pdf')
+            if i % 2:
+                Application.objects.filter(pk=application.pk).update(status='shortlisted')
+        self.admin = User.objects.create_user('root', 'root@example.com', 'pass', role='admin', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def export(self, dataset, **params):
+        response = self.client.get(reverse('admin_export', args=[dataset]), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_follows_the_page_filters(self):
+        with CaptureQueriesContext(connection) as queries:
+            response, body = self.export('applications', status='shortlisted', search='Job 1')
+        # Session, user, and the export itself
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="jobsly-applications-', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual([row['applicant_name'] for row in rows], ['Seeker1'])
+        self.assertEqual(rows[0]['job_title'], 'Job 1')
+        self.assertEqual(rows[0]['applicant_email'], 'seeker1@example.com')
+        # Spreadsheet formulas are neutralised
+        self.assertEqual(rows[0]['company'], "'=HYPERLINK(\"http://evil\")")
+
+        _, body = self.export('users', role='applicant')
+        self.assertEqual(len(body.splitlines()), 7)
+
+    def test_jsonl(self):
+        response, body = self.export('jobs', format='jsonl', search='Job 2')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([(row['title'], row['applications'], row['salary_min']) for row in rows],
+                         [('Job 2', 2, '50000.00')])
+
+    def test_staff_only_and_known_exports(self):
+        self.assertEqual(self.client.get(reverse('admin_export', args=['passwords'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('admin_export', args=['jobs']), {'format': 'xml'}).status_code, 404)
+        self.client.force_login(self.employer.user)
+        self.assertFalse(self.client.get(reverse('admin_export', args=['users'])).streaming)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export_data', 'applications', '--status', 'applied', '--format', 'jsonl', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'jobs.csv')
+            err = StringIO()
+            call_command('export_data', 'jobs', '--output', path, stderr=err)
+            self.assertIn('Wrote 3 row(s)', err.getvalue())
+            with open(path, newline='') as file:
+                self.assertEqual(len(list(csv.DictReader(file))), 3)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class UserQueryPlanTests(QueryPlanMixin, TestCase):
+    def test_role_and_activity_lookups(self):
+        self.assertIndexed(User.objects.filter(role='applicant', is_active=True), 'user_role_active_idx')
+        self.assertIndexed(User.objects.filter(is_staff=True), 'user_staff_idx')
+        self.assertIndexed(User.objects.order_by('-date_joined')[:5], 'user_joined_idx')
+
+    def test_system_stats_windows(self):
+        week_ago = timezone.now() - timezone.timedelta(days=7)
+        recent = User.objects.filter(Q(last_login__gte=week_ago) | Q(date_joined__gte=week_ago))
+        self.assertIndexed(recent, 'user_last_login_idx', sorted_by_index=False)
+        self.assertIndexed(recent, 'user_joined_idx', sorted_by_index=False)
+
 
-# Create your tests here.
+class AccountsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    urlconf = 'accounts.urls'
+    budgets = [
+        ('register', [], 'anonymous', 'get', 0),
+        ('login', [], 'anonymous', 'get', 0),
+        ('logout', [], 'applicant_user', 'post', 4),
+        ('profile', [], 'applicant_user', 'get', 3),
+        ('complete_applicant_profile', [], 'applicant_user', 'get', 3),
+        ('complete_employer_profile', [], 'employer_user', 'get', 3),
+        ('admin_dashboard', [], 'admin', 'get', 5),
+        ('admin_user_management', [], 'admin', 'get', 5),
+        ('admin_user_detail', [lambda t: t.applicant_user.id], 'admin', 'get', 5),
+        ('admin_toggle_user_active', [lambda t: t.applicants[5].user.id], 'admin', 'get', 4),
+        ('admin_job_management', [], 'admin', 'get', 5),
+        # Approving into a category nobody else uses creates its facet row,
+        # and the job's alerts are queued
+        ('admin_update_job_status', [lambda t: t.pending_job.id, 'approved'], 'admin', 'get', 13),
+        # Empty selection: redirected back with an error
+        ('admin_bulk_moderate_jobs', [], 'admin', 'post', 3),
+        # Deactivating a live job also records when it left the listing
+        ('admin_toggle_job_active', [lambda t: t.jobs[14].id], 'admin', 'get', 10),
+        ('admin_application_management', [], 'admin', 'get', 5),
+        # One query for the whole export, however many rows
+        ('admin_export', ['applications'], 'admin', 'get', 3),
+        ('admin_system_stats', [], 'admin', 'get', 5),
+    ]
@@ -17,8 +17,10 @@ urlpatterns = [
     path('admin/users/<int:user_id>/', views.admin_user_detail, name='admin_user_detail'),
     path('admin/users/<int:user_id>/toggle/', views.admin_toggle_user_active, name='admin_toggle_user_active'),
     path('admin/jobs/', views.admin_job_management, name='admin_job_management'),
+    path('admin/jobs/moderate/', views.admin_bulk_moderate_jobs, name='admin_bulk_moderate_jobs'),
+    path('admin/jobs/<int:job_id>/toggle/', views.admin_toggle_job_active, name='admin_toggle_job_active'),  # before <str:status>, which would match 'toggle'
     path('admin/jobs/<int:job_id>/<str:status>/', views.admin_update_job_status, name='admin_update_job_status'),
-    path('admin/jobs/<int:job_id>/toggle/', views.admin_toggle_job_active, name='admin_toggle_job_active'),
     path('admin/applications/', views.admin_application_management, name='admin_application_management'),
+    path('admin/export/<str:dataset>/', views.admin_export, name='admin_export'),
     path('admin/stats/', views.admin_system_stats, name='admin_system_stats'),
 ]
\ No newline at end of file
@@ -4,10 +4,18 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.http import Http404
+from django.db import router
+from django.db.models import Count, Q
 from django.utils import timezone
-from .forms import UserRegistrationForm, ApplicantProfileForm, EmployerProfileForm, AdminUserForm
-from .models import User, ApplicantProfile, EmployerProfile
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from .forms import UserRegistrationForm, ApplicantProfileForm, EmployerProfileForm, AdminUserForm, BulkJobModerationForm
+from .models import User, ApplicantProfile, EmployerProfile, StatCounter
 from jobs.models import Job, Application
+from jobs import bulk
+from jobsly.routers import read_from_replica
+from . import exports, stats
 
 def register(request):
     if request.method == 'POST':
@@ -84,6 +92,7 @@ def profile(request):
 
 # ==================== SUPERUSER/ADMIN VIEWS ====================
 
+@read_from_replica
 @login_required
 @staff_member_required
 def admin_dashboard(request):
@@ -92,25 +101,21 @@ def admin_dashboard(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    # Statistics
-    total_users = User.objects.count()
-    total_applicants = User.objects.filter(role='applicant').count()
-    total_employers = User.objects.filter(role='employer').count()
-    total_jobs = Job.objects.count()
-    pending_jobs = Job.objects.filter(status='pending').count()
-    total_applications = Application.objects.count()
+    # Statistics - maintained counters, one small read (from the replica
+    # when the router sends this view's reads there)
+    counters = stats.get_counters(using=router.db_for_read(StatCounter))
     
     # Recent activities
-    recent_jobs = Job.objects.order_by('-created_at')[:5]
+    recent_jobs = Job.objects.select_related('employer').order_by('-created_at')[:5]
     recent_users = User.objects.order_by('-date_joined')[:5]
     
     context = {
-        'total_users': total_users,
-        'total_applicants': total_applicants,
-        'total_employers': total_employers,
-        'total_jobs': total_jobs,
-        'pending_jobs': pending_jobs,
-        'total_applications': total_applications,
+        'total_users': counters['users.total'],
+        'total_applicants': counters['users.role:applicant'],
+        'total_employers': counters['users.role:employer'],
+        'total_jobs': counters['jobs.total'],
+        'pending_jobs': counters['jobs.status:pending'],
+        'total_applications': counters['applications.total'],
         'recent_jobs': recent_jobs,
         'recent_users': recent_users,
     }
@@ -124,25 +129,8 @@ def admin_user_management(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    users = User.objects.all().order_by('-date_joined')
-    
-    # Filter by role
-    role_filter = request.GET.get('role')
-    if role_filter:
-        users = users.filter(role=role_filter)
-    
-    # Search functionality - FIXED SYNTAX
-    search_query = request.GET.get('search')
-    if search_query:
-        users = users.filter(
-            username__icontains=search_query
-        ) | users.filter(
-            email__icontains=search_query
-        ) | users.filter(
-            first_name__icontains=search_query
-        ) | users.filter(
-            last_name__icontains=search_query
-        )
+    # Role and search filters, shared with the export
+    users = exports.filter_users(request.GET)
     
     paginator = Paginator(users, 20)
     page_number = request.GET.get('page')
@@ -151,6 +139,7 @@ def admin_user_management(request):
     context = {
         'page_obj': page_obj,
         'total_users': users.count(),
+        'export_query': _export_query(request),
     }
     return render(request, 'accounts/admin_user_management.html', context)
 
@@ -162,33 +151,21 @@ def admin_job_management(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    jobs = Job.objects.all().order_by('-created_at')
-    
-    # Filter by status
-    status_filter = request.GET.get('status')
-    if status_filter:
-        jobs = jobs.filter(status=status_filter)
-    
-    # Search functionality - FIXED SYNTAX
-    search_query = request.GET.get('search')
-    if search_query:
-        jobs = jobs.filter(
-            title__icontains=search_query
-        ) | jobs.filter(
-            employer__company_name__icontains=search_query
-        ) | jobs.filter(
-            location__icontains=search_query
-        )
+    # Status and search filters, shared with the export
+    jobs = exports.filter_jobs(request.GET)
     
     paginator = Paginator(jobs, 20)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    counters = stats.get_counters()
+    
     context = {
         'page_obj': page_obj,
-        'pending_count': Job.objects.filter(status='pending').count(),
-        'approved_count': Job.objects.filter(status='approved').count(),
-        'rejected_count': Job.objects.filter(status='rejected').count(),
+        'pending_count': counters['jobs.status:pending'],
+        'approved_count': counters['jobs.status:approved'],
+        'rejected_count': counters['jobs.status:rejected'],
+        'export_query': _export_query(request),
     }
     return render(request, 'accounts/admin_job_management.html', context)
 
@@ -201,11 +178,10 @@ def admin_update_job_status(request, job_id, status):
         return redirect('home')
     
     try:
-        job = Job.objects.get(id=job_id)
-        
         if status in ['approved', 'rejected']:
-            job.status = status
-            job.save()
+            # Same path as the moderation queue, which also queues the alerts
+            changed = bulk.moderate_jobs(Job.objects.filter(id=job_id), status)
+            job = changed[0] if changed else Job.objects.only('id', 'title').get(id=job_id)
             
             if status == 'approved':
                 messages.success(request, f'Job "{job.title}" has been approved and is now live.')
@@ -219,6 +195,26 @@ def admin_update_job_status(request, job_id, status):
     
     return redirect('admin_job_management')
 
+@login_required
+@staff_member_required
+@require_POST
+def admin_bulk_moderate_jobs(request):
+    """Approve or reject the selected jobs in one go"""
+    if not request.user.is_staff:
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    
+    form = BulkJobModerationForm(request.POST)
+    if form.is_valid():
+        status = form.cleaned_data['status']
+        changed = bulk.moderate_jobs(Job.objects.filter(id__in=form.cleaned_data['jobs']), status)
+        messages.success(request, f'{len(changed)} job(s) {status}.')
+    else:
+        for errors in form.errors.values():
+            messages.error(request, errors[0])
+    
+    return redirect(reverse('admin_job_management') + '?status=pending')
+
 @login_required
 @staff_member_required
 def admin_toggle_job_active(request, job_id):
@@ -227,15 +223,13 @@ def admin_toggle_job_active(request, job_id):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    try:
-        job = Job.objects.get(id=job_id)
-        job.is_active = not job.is_active
-        job.save()
-        
+    # One UPDATE rather than a full save(), as the moderation queue does
+    changed = bulk.toggle_jobs_active(Job.objects.filter(id=job_id))
+    if changed:
+        job = changed[0]
         status = "activated" if job.is_active else "deactivated"
         messages.success(request, f'Job "{job.title}" has been {status}.')
-        
-    except Job.DoesNotExist:
+    else:
         messages.error(request, 'Job not found.')
     
     return redirect('admin_job_management')
@@ -265,7 +259,7 @@ def admin_user_detail(request, user_id):
         if user.role == 'applicant':
             try:
                 user_data['profile'] = user.applicantprofile
-                user_data['applications'] = Application.objects.filter(applicant=user.applicantprofile)
+                user_data['applications'] = Application.objects.filter(applicant=user.applicantprofile).select_related('job', 'job__employer')
             except ApplicantProfile.DoesNotExist:
                 user_data['profile'] = None
                 user_data['applications'] = []
@@ -317,23 +311,8 @@ def admin_application_management(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    applications = Application.objects.all().select_related('job', 'applicant').order_by('-applied_date')
-    
-    # Filter by status
-    status_filter = request.GET.get('status')
-    if status_filter:
-        applications = applications.filter(status=status_filter)
-    
-    # Search functionality - FIXED SYNTAX
-    search_query = request.GET.get('search')
-    if search_query:
-        applications = applications.filter(
-            applicant__full_name__icontains=search_query
-        ) | applications.filter(
-            job__title__icontains=search_query
-        ) | applications.filter(
-            job__employer__company_name__icontains=search_query
-        )
+    # Status and search filters, shared with the export
+    applications = exports.filter_applications(request.GET)
     
     paginator = Paginator(applications, 20)
     page_number = request.GET.get('page')
@@ -342,9 +321,30 @@ def admin_application_management(request):
     context = {
         'page_obj': page_obj,
         'total_applications': applications.count(),
+        'export_query': _export_query(request),
     }
     return render(request, 'accounts/admin_application_management.html', context)
 
+def _export_query(request):
+    """The page's filters, for its export links"""
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('format', None)
+    return params.urlencode()
+
+@login_required
+@staff_member_required
+def admin_export(request, dataset):
+    """Stream every user, job or application matching the list page's filters, as CSV or JSON Lines"""
+    if not request.user.is_staff:
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    
+    export_format = request.GET.get('format', 'csv')
+    if dataset not in exports.DATASETS or export_format not in exports.FORMATS:
+        raise Http404('Unknown export')
+    return exports.streaming_export(dataset, request.GET, export_format)
+
 @login_required
 @staff_member_required
 def admin_system_stats(request):
@@ -353,34 +353,45 @@ def admin_system_stats(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
+    counters = stats.get_counters()
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    week_ago = timezone.now() - timezone.timedelta(days=7)
+    
+    # Time-windowed figures can't be kept as counters; one indexed range query per table
+    user_windows = User.objects.filter(Q(last_login__gte=today) | Q(date_joined__gte=week_ago)).aggregate(
+        active_today=Count('id', filter=Q(last_login__gte=today)),
+        new_this_week=Count('id', filter=Q(date_joined__gte=week_ago)),
+    )
+    job_windows = {'new_today': Job.objects.filter(created_at__gte=today).count()}
+    
     # User statistics
     user_stats = {
-        'total': User.objects.count(),
-        'applicants': User.objects.filter(role='applicant').count(),
-        'employers': User.objects.filter(role='employer').count(),
-        'admins': User.objects.filter(is_staff=True).count(),
-        'active_today': User.objects.filter(last_login__date=timezone.now().date()).count(),
-        'new_this_week': User.objects.filter(date_joined__gte=timezone.now() - timezone.timedelta(days=7)).count(),
+        'total': counters['users.total'],
+        'applicants': counters['users.role:applicant'],
+        'employers': counters['users.role:employer'],
+        'admins': counters['users.staff'],
+        'active_today': user_windows['active_today'],
+        'new_this_week': user_windows['new_this_week'],
     }
     
     # Job statistics
     job_stats = {
-        'total': Job.objects.count(),
-        'pending': Job.objects.filter(status='pending').count(),
-        'approved': Job.objects.filter(status='approved').count(),
-        'rejected': Job.objects.filter(status='rejected').count(),
-        'active': Job.objects.filter(is_active=True).count(),
-        'new_today': Job.objects.filter(created_at__date=timezone.now().date()).count(),
+        'total': counters['jobs.total'],
+        'pending': counters['jobs.status:pending'],
+        'approved': counters['jobs.status:approved'],
+        'rejected': counters['jobs.status:rejected'],
+        'active': counters['jobs.active'],
+        'new_today': job_windows['new_today'],
     }
     
     # Application statistics
     application_stats = {
-        'total': Application.objects.count(),
-        'applied': Application.objects.filter(status='applied').count(),
-        'under_review': Application.objects.filter(status='under_review').count(),
-        'shortlisted': Application.objects.filter(status='shortlisted').count(),
-        'rejected': Application.objects.filter(status='rejected').count(),
-        'hired': Application.objects.filter(status='hired').count(),
+        'total': counters['applications.total'],
+        'applied': counters['applications.status:applied'],
+        'under_review': counters['applications.status:under_review'],
+        'shortlisted': counters['applications.status:shortlisted'],
+        'rejected': counters['applications.status:rejected'],
+        'hired': counters['applications.status:hired'],
     }
     
     context = {
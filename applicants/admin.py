@@ -1,2 +1,9 @@
 from django.contrib import admin
-# Register your models here if you add any in the future
\ No newline at end of file
+from .models import SavedSearch
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ['applicant', 'name', 'title', 'location', 'category', 'job_type', 'is_active', 'created_at']
+    list_filter = ['is_active', 'job_type']
+    search_fields = ['applicant__full_name', 'title', 'location', 'category']
+    readonly_fields = ['term_count', 'created_at', 'updated_at']
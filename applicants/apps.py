@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ApplicantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'applicants'
\ No newline at end of file
+    name = 'applicants'
+
+    def ready(self):
+        import applicants.signals
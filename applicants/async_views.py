@@ -0,0 +1,52 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import redirect
+
+from accounts.models import ApplicantProfile
+from jobs.async_views import alist, arender, auser
+from jobs.models import Application
+from jobs.recommendations import recommend_jobs
+from jobsly.routers import read_from_replica
+from .views import RECOMMENDED_JOBS
+
+# Async version of the applicant dashboard for jobsly/asgi.py; see
+# jobs/async_views.py
+
+
+@read_from_replica
+async def applicant_dashboard(request):
+    # login_required only wraps async views from Django 5.0
+    user = await auser(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    if user.role != 'applicant':
+        return redirect('home')
+
+    try:
+        applicant_profile = await ApplicantProfile.objects.aget(user=user)
+    except ApplicantProfile.DoesNotExist:
+        return redirect('complete_applicant_profile')
+
+    applications = Application.objects.filter(applicant=applicant_profile).select_related('job', 'job__employer')
+    applications, recommended_jobs = await asyncio.gather(
+        alist(applications),
+        sync_to_async(recommend_jobs)(
+            applicant_profile.skills, k=RECOMMENDED_JOBS,
+            exclude=applications.values_list('job_id', flat=True),
+            cv_text=applicant_profile.cv_text,
+        ),
+    )
+
+    context = {
+        'applicant_profile': applicant_profile,
+        'applications': applications,
+        # Counted from the rows already loaded rather than in two more queries
+        'total_applications': len(applications),
+        'active_applications': sum(
+            application.status not in ('rejected', 'hired') for application in applications
+        ),
+        'recommended_jobs': recommended_jobs,
+    }
+    return await arender(request, 'applicants/dashboard.html', context)
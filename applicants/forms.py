@@ -0,0 +1,28 @@
+from django import forms
+from .models import SavedSearch
+
+class SavedSearchForm(forms.ModelForm):
+    class Meta:
+        model = SavedSearch
+        fields = ['name', 'title', 'location', 'category', 'job_type', 'salary_min', 'salary_max']
+        widgets = {
+            'name': forms.TextInput(attrs={'placeholder': 'e.g., Remote Python jobs'}),
+            'title': forms.TextInput(attrs={'placeholder': 'Words in the job title...'}),
+            'location': forms.TextInput(attrs={'placeholder': 'City or region...'}),
+            'category': forms.TextInput(attrs={'placeholder': 'e.g., Software Development'}),
+        }
+        labels = {
+            'title': 'Job Title',
+            'salary_min': 'Min Salary',
+            'salary_max': 'Max Salary',
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        salary_min = cleaned_data.get('salary_min')
+        salary_max = cleaned_data.get('salary_max')
+
+        if salary_min and salary_max and salary_min > salary_max:
+            raise forms.ValidationError("Minimum salary cannot be greater than maximum salary.")
+
+        return cleaned_data
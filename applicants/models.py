@@ -1,5 +1,51 @@
 # This app uses models from accounts and jobs
 # Additional applicant-specific models can be added here if needed
 from django.db import models
+from accounts.models import ApplicantProfile
+from jobs.models import Job
 
-# You can add additional applicant-related models here in the future
\ No newline at end of file
+class SavedSearch(models.Model):
+    """A job alert subscription, using the same fields as JobFilter"""
+    applicant = models.ForeignKey(ApplicantProfile, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100, blank=True)
+    title = models.CharField(max_length=200, blank=True)
+    location = models.CharField(max_length=100, blank=True)
+    category = models.CharField(max_length=100, blank=True)
+    job_type = models.CharField(max_length=20, choices=Job.JOB_TYPE_CHOICES, blank=True)
+    salary_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    salary_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    # Number of distinct SavedSearchTerm rows; a job matches when it hits all of them
+    term_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['term_count', 'is_active']),
+        ]
+
+    def __str__(self):
+        return self.name or f"{self.applicant.full_name} - saved search"
+
+class SavedSearchTerm(models.Model):
+    """Inverted index entry: one token of one field of a saved search"""
+    FIELD_CHOICES = (
+        ('title', 'Title'),
+        ('location', 'Location'),
+        ('category', 'Category'),
+    )
+
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='terms')
+    field = models.CharField(max_length=10, choices=FIELD_CHOICES)
+    token = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ['saved_search', 'field', 'token']
+        indexes = [
+            models.Index(fields=['field', 'token']),
+        ]
+
+    def __str__(self):
+        return f"{self.field}:{self.token}"
@@ -0,0 +1,91 @@
+from django.db.models import Count, F, Q
+
+from accounts.models import User
+from jobs.search import tokenize
+from .models import SavedSearch, SavedSearchTerm
+
+# Text fields of a saved search that go through the inverted index
+INDEXED_FIELDS = ('title', 'location', 'category')
+MAX_TOKEN_LENGTH = 100
+
+
+def search_terms(saved_search):
+    """The distinct (field, token) pairs a job has to contain to match"""
+    terms = set()
+    for field in INDEXED_FIELDS:
+        for token in tokenize(getattr(saved_search, field)):
+            terms.add((field, token[:MAX_TOKEN_LENGTH]))
+    return terms
+
+
+def index_saved_search(saved_search):
+    """(Re)build the inverted index rows for one saved search"""
+    terms = search_terms(saved_search)
+    SavedSearchTerm.objects.filter(saved_search=saved_search).delete()
+    SavedSearchTerm.objects.bulk_create([
+        SavedSearchTerm(saved_search=saved_search, field=field, token=token)
+        for field, token in terms
+    ])
+    SavedSearch.objects.filter(pk=saved_search.pk).update(term_count=len(terms))
+    saved_search.term_count = len(terms)
+
+
+def token_prefixes(text):
+    """
+    Every prefix of every token in ``text``. A saved-search token matches a
+    job when it is a prefix of one of the job's tokens ("dev" matches
+    "Developer"), so looking these up is an exact index probe.
+    """
+    prefixes = set()
+    for token in tokenize(text):
+        token = token[:MAX_TOKEN_LENGTH]
+        prefixes.update(token[:i] for i in range(1, len(token) + 1))
+    return prefixes
+
+
+def _job_conditions(job, prefix=''):
+    """The non-text JobFilter fields: job type and salary range"""
+    return (
+        Q(**{prefix + 'is_active': True}) &
+        (Q(**{prefix + 'job_type': ''}) | Q(**{prefix + 'job_type': job.job_type})) &
+        (Q(**{prefix + 'salary_min__isnull': True}) | Q(**{prefix + 'salary_min__lte': job.salary_min})) &
+        (Q(**{prefix + 'salary_max__isnull': True}) | Q(**{prefix + 'salary_max__gte': job.salary_max}))
+    )
+
+
+def matching_saved_searches(job):
+    """
+    Saved searches that ``job`` satisfies.
+
+    Only the posting lists for the job's own tokens are read: a search matches
+    when the number of its terms hit equals its ``term_count``. Searches with
+    no text terms are matched on job type and salary alone.
+    """
+    term_q = Q()
+    for field in INDEXED_FIELDS:
+        prefixes = token_prefixes(getattr(job, field))
+        if prefixes:
+            term_q |= Q(field=field, token__in=prefixes)
+
+    match = Q(term_count=0)
+    if term_q:
+        fully_matched = (
+            SavedSearchTerm.objects
+            .filter(term_q)
+            .filter(_job_conditions(job, prefix='saved_search__'))
+            .values('saved_search_id', 'saved_search__term_count')
+            .annotate(hits=Count('id'))
+            .filter(hits=F('saved_search__term_count'))
+            .values('saved_search_id')
+        )
+        match |= Q(id__in=fully_matched)
+    return SavedSearch.objects.filter(match).filter(_job_conditions(job))
+
+
+def matching_users(job):
+    """Active applicants with at least one saved search matching ``job``"""
+    return User.objects.filter(
+        role='applicant',
+        is_active=True,
+        applicantprofile__id__in=matching_saved_searches(job).values('applicant_id'),
+    ).exclude(email='')
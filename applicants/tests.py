@@ -1,3 +1,127 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from jobs import recommendations
+from jobs.models import Application
+from jobs.tests import QueryBudgetMixin, make_applicant, make_employer, make_job
+from .models import SavedSearch
+from .subscriptions import matching_saved_searches, matching_users
+
+
+class SavedSearchMatchingTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.applicant = make_applicant('seeker')
+
+    def subscribe(self, **fields):
+        return SavedSearch.objects.create(applicant=self.applicant, **fields)
+
+    def test_matches_same_fields_as_job_filter(self):
+        job = make_job(self.employer, title='Senior Python Developer', location='Berlin, Germany',
+                       category='Software Development', job_type='remote',
+                       salary_min=60000, salary_max=80000)
+        matching = [
+            self.subscribe(title='python'),
+            self.subscribe(title='dev python', location='berlin'),
+            self.subscribe(category='software'),
+            self.subscribe(job_type='remote', salary_min=50000),
+            self.subscribe(salary_max=90000),
+            self.subscribe(),
+        ]
+        self.subscribe(title='java')
+        self.subscribe(title='python', location='paris')
+        self.subscribe(title='python', job_type='contract')
+        self.subscribe(salary_min=70000)
+        self.subscribe(salary_max=75000)
+        self.subscribe(title='python', is_active=False)
+
+        self.assertCountEqual(matching_saved_searches(job), matching)
+
+    def test_reindexed_on_edit(self):
+        saved_search = self.subscribe(title='java')
+        job = make_job(self.employer, title='Python Developer')
+        self.assertFalse(matching_saved_searches(job).exists())
+
+        saved_search.title = 'python'
+        saved_search.save()
+        self.assertEqual(list(matching_saved_searches(job)), [saved_search])
+
+    def test_matching_users_are_distinct(self):
+        self.subscribe(title='python')
+        self.subscribe(location='berlin')
+        job = make_job(self.employer, title='Python Developer', location='Berlin')
+        self.assertEqual(list(matching_users(job)), [self.applicant.user])
+
+
+class SavedSearchViewTests(TestCase):
+    def test_create_and_delete(self):
+        applicant = make_applicant('seeker')
+        self.client.force_login(applicant.user)
+
+        response = self.client.get(reverse('saved_searches'), {'title': 'python', 'q': 'ignored'})
+        self.assertEqual(response.context['form'].initial['title'], 'python')
+
+        self.client.post(reverse('saved_searches'), {'title': 'python', 'location': 'Berlin'})
+        saved_search = SavedSearch.objects.get(applicant=applicant)
+        self.assertEqual(saved_search.term_count, 2)
+
+        self.client.post(reverse('delete_saved_search', args=[saved_search.id]))
+        self.assertFalse(SavedSearch.objects.exists())
+
+
+@override_settings(ROOT_URLCONF='jobsly.asgi_urls', RECOMMENDATIONS_BUILD_IN_BACKGROUND=False)
+class AsyncDashboardTests(TestCase):
+    def setUp(self):
+        employer = make_employer()
+        self.applicant = make_applicant('seeker')
+        for i, status in enumerate(['applied', 'shortlisted', 'rejected', 'hired', 'applied', 'under_review', 'applied']):
+            job = make_job(employer, title=f'Developer {i}')
+            Application.objects.create(job=job, applicant=self.applicant, cv='cv.pdf', status=status)
+        self.open_job = make_job(employer, title='Django Developer', requirements='Python, Django')
+        recommendations.reset()
+
+    async def test_matches_the_sync_dashboard(self):
+        await sync_to_async(self.async_client.force_login)(self.applicant.user)
+        response = await self.async_client.get(reverse('applicant_dashboard'))
+        self.assertEqual(response.context['total_applications'], 7)
+        self.assertEqual(response.context['active_applications'], 5)
+        self.assertContains(response, 'View All Applications')
+        self.assertEqual(response.context['recommended_jobs'], [self.open_job])
+
+        def sync_get():
+            with override_settings(ROOT_URLCONF='jobsly.urls'):
+                self.client.force_login(self.applicant.user)
+                return self.client.get(reverse('applicant_dashboard'))
+        sync_response = await sync_to_async(sync_get)()
+        for key in ('total_applications', 'active_applications', 'recommended_jobs'):
+            self.assertEqual(response.context[key], sync_response.context[key])
+
+    async def test_access(self):
+        response = await self.async_client.get(reverse('applicant_dashboard'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('applicant_dashboard')}",
+                             fetch_redirect_response=False)
+
+        employer = await sync_to_async(make_employer)('globex', 'Globex')
+        await sync_to_async(self.async_client.force_login)(employer.user)
+        self.assertRedirects(await self.async_client.get(reverse('applicant_dashboard')), reverse('home'),
+                             fetch_redirect_response=False)
+
+
+@override_settings(PROTECTED_MEDIA_SERVER='x-accel-redirect', RECOMMENDATIONS_BUILD_IN_BACKGROUND=False)
+class ApplicantsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    urlconf = 'applicants.urls'
+    budgets = [
+        # Two of them for recommendations (jobs applied to, recommended jobs)
+        ('applicant_dashboard', [], 'applicant_user', 'get', 8),
+        ('application_history', [], 'applicant_user', 'get', 4),
+        ('saved_searches', [], 'applicant_user', 'get', 4),
+        ('delete_saved_search', [lambda t: t.saved_search.id], 'applicant_user', 'post', 5),
+        ('applicant_cv', [lambda t: t.applicant.id], 'employer_user', 'get', 4),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        # Steady state: the in-memory index is built once per process
+        recommendations.reset()
+        recommendations.build_index()
@@ -4,4 +4,7 @@ from . import views
 urlpatterns = [
     path('dashboard/', views.applicant_dashboard, name='applicant_dashboard'),
     path('applications/', views.application_history, name='application_history'),
+    path('alerts/', views.saved_searches, name='saved_searches'),
+    path('alerts/<int:search_id>/delete/', views.delete_saved_search, name='delete_saved_search'),
+    path('<int:profile_id>/cv/', views.applicant_cv, name='applicant_cv'),
 ]
\ No newline at end of file
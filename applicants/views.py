@@ -1,7 +1,21 @@
-from django.shortcuts import render, redirect
+import os
+
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import Http404
+from django.views.decorators.http import require_POST
+from accounts.models import ApplicantProfile
 from jobs.models import Application
+from jobs.recommendations import recommend_jobs
+from jobsly.sendfile import serve_file
+from jobsly.routers import read_from_replica
+from .forms import SavedSearchForm
+from .models import SavedSearch
+
+RECOMMENDED_JOBS = 5
 
+@read_from_replica
 @login_required
 def applicant_dashboard(request):
     if request.user.role != 'applicant':
@@ -9,18 +23,25 @@ def applicant_dashboard(request):
     
     try:
         applicant_profile = request.user.applicantprofile
-        applications = Application.objects.filter(applicant=applicant_profile).select_related('job', 'job__employer')
-        
-        context = {
-            'applicant_profile': applicant_profile,
-            'applications': applications,
-            'total_applications': applications.count(),
-            'active_applications': applications.exclude(status__in=['rejected', 'hired']).count(),
-        }
-        return render(request, 'applicants/dashboard.html', context)
-    
-    except Exception as e:
+    except ApplicantProfile.DoesNotExist:
         return redirect('complete_applicant_profile')
+    
+    applications = Application.objects.filter(applicant=applicant_profile).select_related('job', 'job__employer')
+    
+    recommended_jobs = recommend_jobs(
+        applicant_profile.skills, k=RECOMMENDED_JOBS,
+        exclude=applications.values_list('job_id', flat=True),
+        cv_text=applicant_profile.cv_text,
+    )
+    
+    context = {
+        'applicant_profile': applicant_profile,
+        'applications': applications,
+        'total_applications': applications.count(),
+        'active_applications': applications.exclude(status__in=['rejected', 'hired']).count(),
+        'recommended_jobs': recommended_jobs,
+    }
+    return render(request, 'applicants/dashboard.html', context)
 
 @login_required
 def application_history(request):
@@ -33,4 +54,52 @@ def application_history(request):
     context = {
         'applications': applications
     }
-    return render(request, 'applicants/applications.html', context)
\ No newline at end of file
+    return render(request, 'applicants/applications.html', context)
+
+@login_required
+def saved_searches(request):
+    if request.user.role != 'applicant':
+        return redirect('home')
+    
+    applicant_profile = get_object_or_404(ApplicantProfile, user=request.user)
+    
+    if request.method == 'POST':
+        form = SavedSearchForm(request.POST)
+        if form.is_valid():
+            saved_search = form.save(commit=False)
+            saved_search.applicant = applicant_profile
+            saved_search.save()
+            messages.success(request, 'Job alert saved. We will email you when a matching job is posted.')
+            return redirect('saved_searches')
+    else:
+        # Pre-fill from the job list filters ("Save as job alert")
+        form = SavedSearchForm(initial=request.GET.dict())
+    
+    context = {
+        'form': form,
+        'saved_searches': SavedSearch.objects.filter(applicant=applicant_profile),
+    }
+    return render(request, 'applicants/saved_searches.html', context)
+
+@login_required
+@require_POST
+def delete_saved_search(request, search_id):
+    saved_search = get_object_or_404(SavedSearch, id=search_id, applicant__user=request.user)
+    saved_search.delete()
+    messages.success(request, 'Job alert deleted.')
+    return redirect('saved_searches')
+
+@login_required
+def applicant_cv(request, profile_id):
+    profile = get_object_or_404(ApplicantProfile, id=profile_id)
+    # The applicant, staff, or an employer the applicant has applied to
+    if not (request.user.is_staff
+            or profile.user_id == request.user.id
+            or Application.objects.filter(applicant=profile, job__employer__user=request.user).exists()):
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    if not profile.cv:
+        raise Http404('No CV uploaded')
+    
+    extension = os.path.splitext(profile.cv.name)[1]
+    return serve_file(request, profile.cv, f'{profile.full_name} CV{extension}')
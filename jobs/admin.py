@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Job, Application
+from .models import Job, Application, JobAlertOutbox
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
@@ -15,4 +15,10 @@ class ApplicationAdmin(admin.ModelAdmin):
     list_filter = ['status', 'applied_date']
     search_fields = ['applicant__full_name', 'job__title', 'job__category']
     list_editable = ['status']
-    readonly_fields = ['applied_date', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['applied_date', 'updated_at']
+
+@admin.register(JobAlertOutbox)
+class JobAlertOutboxAdmin(admin.ModelAdmin):
+    list_display = ['job', 'status', 'sent_count', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,158 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from applicants.subscriptions import matching_users
+from .models import JobAlertOutbox
+
+# Recipients per SMTP connection / progress checkpoint
+BATCH_SIZE = getattr(settings, 'JOB_ALERT_BATCH_SIZE', 500)
+MAX_ATTEMPTS = getattr(settings, 'JOB_ALERT_MAX_ATTEMPTS', 5)
+RETRY_BASE_SECONDS = getattr(settings, 'JOB_ALERT_RETRY_BASE_SECONDS', 60)
+RETRY_MAX_SECONDS = 60 * 60
+# A 'sending' entry whose worker died is picked up again after this long
+LOCK_TIMEOUT = timedelta(minutes=15)
+
+
+def job_alert_message(job):
+    subject = f"New Job Alert: {job.title}"
+    message = f"""
+        Hello!
+
+        A new job matching one of your saved searches has been posted:
+
+        🎯 Position: {job.title}
+        🏢 Company: {job.employer.company_name}
+        📍 Location: {job.location}
+        💼 Type: {job.get_job_type_display()}
+        💰 Salary: ${job.salary_min} - ${job.salary_max}
+
+        View job details and apply here:
+        http://localhost:8000/jobs/{job.id}/
+
+        Don't miss this opportunity!
+
+        Best regards,
+        Jobsly Team
+        """
+    return subject, message
+
+
+def queue_job_alert(job):
+    """Record that alerts for ``job`` need sending. Cheap enough for a request"""
+    return JobAlertOutbox.objects.create(job=job)
+
+
+def queue_job_alerts(jobs):
+    """
+    Queue alerts for many newly approved jobs in one INSERT. Jobs with an
+    entry already (approved before, then rejected and approved again) are
+    skipped so nobody hears about the same posting twice.
+    """
+    job_ids = {job.pk for job in jobs}
+    queued = set(JobAlertOutbox.objects.filter(job_id__in=job_ids).values_list('job_id', flat=True).order_by())
+    return JobAlertOutbox.objects.bulk_create([JobAlertOutbox(job_id=pk) for pk in sorted(job_ids - queued)])
+
+
+def alert_recipients(job):
+    """Applicants whose saved searches match ``job``"""
+    return matching_users(job)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def _due(now):
+    """Entries waiting to be sent, or held by a worker that has gone quiet"""
+    return (
+        Q(status='pending', next_attempt_at__lte=now) |
+        Q(status='sending', locked_at__lt=now - LOCK_TIMEOUT)
+    )
+
+
+def claim_due_entries(limit):
+    """Lock up to ``limit`` due outbox entries for this worker"""
+    now = timezone.now()
+    due = JobAlertOutbox.objects.filter(_due(now)).values_list('id', flat=True)[:limit]
+
+    claimed = []
+    for entry_id in due:
+        # Conditional update, still due, so two workers never claim the same
+        # entry and one finished in between (sent or failed) stays finished
+        if JobAlertOutbox.objects.filter(_due(now), id=entry_id).update(status='sending', locked_at=now):
+            claimed.append(entry_id)
+    return JobAlertOutbox.objects.filter(id__in=claimed).select_related('job', 'job__employer')
+
+
+def deliver(entry, batch_size=BATCH_SIZE):
+    """
+    Send ``entry``'s alert to every recipient after ``last_recipient_id``.
+
+    Recipients are streamed in id order and sent ``batch_size`` at a time over
+    one connection per batch. Progress is saved after each batch, so a retry
+    resumes where the failure happened instead of re-mailing everyone.
+    """
+    subject, body = job_alert_message(entry.job)
+    from_email = settings.DEFAULT_FROM_EMAIL
+    recipients = (
+        alert_recipients(entry.job)
+        .filter(id__gt=entry.last_recipient_id)
+        .order_by('id')
+        .values_list('id', 'email')
+        .iterator(chunk_size=batch_size)
+    )
+
+    while True:
+        batch = list(islice(recipients, batch_size))
+        if not batch:
+            break
+        messages = [EmailMessage(subject, body, from_email, [email]) for _, email in batch]
+        connection = get_connection()
+        connection.open()
+        try:
+            connection.send_messages(messages)
+        finally:
+            connection.close()
+        JobAlertOutbox.objects.filter(id=entry.id).update(
+            last_recipient_id=batch[-1][0],
+            sent_count=F('sent_count') + len(batch),
+            locked_at=timezone.now(),
+        )
+        entry.last_recipient_id = batch[-1][0]
+
+    JobAlertOutbox.objects.filter(id=entry.id).update(
+        status='sent', locked_at=None, last_error='',
+    )
+
+
+def record_failure(entry, error):
+    attempts = entry.attempts + 1
+    if attempts >= MAX_ATTEMPTS:
+        status, next_attempt_at = 'failed', entry.next_attempt_at
+    else:
+        status, next_attempt_at = 'pending', timezone.now() + retry_delay(attempts)
+    JobAlertOutbox.objects.filter(id=entry.id).update(
+        status=status,
+        attempts=attempts,
+        next_attempt_at=next_attempt_at,
+        locked_at=None,
+        last_error=str(error)[:2000],
+    )
+
+
+def drain_outbox(limit=10, batch_size=BATCH_SIZE):
+    """Process up to ``limit`` due entries. Returns (delivered, failed) counts"""
+    delivered = failed = 0
+    for entry in claim_due_entries(limit):
+        try:
+            deliver(entry, batch_size=batch_size)
+            delivered += 1
+        except Exception as e:
+            record_failure(entry, e)
+            failed += 1
+    return delivered, failed
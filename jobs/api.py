@@ -0,0 +1,72 @@
+from django.http import JsonResponse
+
+# Read-only JSON API over the public listing (jobs/views.py api_job_list and
+# api_job_detail), for aggregators and the mobile client. Rows go straight
+# from values() to JSON: only the requested columns are selected and no Job
+# instances are built. Filters, paging and the ETag/page caching are the
+# HTML views' own.
+
+# API field: lookup
+FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'company': 'employer__company_name',
+    'company_id': 'employer_id',
+    'category': 'category',
+    'location': 'location',
+    'job_type': 'job_type',
+    'salary_min': 'salary_min',
+    'salary_max': 'salary_max',
+    'description': 'description',
+    'requirements': 'requirements',
+    'responsibilities': 'responsibilities',
+    'application_deadline': 'application_deadline',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+# Listings leave out the long text fields unless asked for
+LIST_FIELDS = (
+    'id', 'title', 'company', 'category', 'location', 'job_type',
+    'salary_min', 'salary_max', 'application_deadline', 'created_at',
+)
+DETAIL_FIELDS = tuple(FIELDS)
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidParameter(ValueError):
+    pass
+
+
+def parse_fields(value, default):
+    """API field names from a ``fields=a,b,c`` parameter"""
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown:
+        raise InvalidParameter(f'fields: Unknown field(s): {", ".join(unknown)}.')
+    return list(dict.fromkeys(names)) or list(default)
+
+
+def parse_page_size(value):
+    if not value:
+        return PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise InvalidParameter('page_size: Enter a whole number.')
+    if not 1 <= size <= MAX_PAGE_SIZE:
+        raise InvalidParameter(f'page_size: Must be between 1 and {MAX_PAGE_SIZE}.')
+    return size
+
+
+def values(queryset, names, *extra):
+    """values() for the ``names`` API fields plus ``extra`` lookups the caller needs"""
+    return queryset.values(*dict.fromkeys([FIELDS[name] for name in names] + list(extra)))
+
+
+def serialize(row, names):
+    return {name: row[FIELDS[name]] for name in names}
+
+
+def error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
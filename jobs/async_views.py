@@ -0,0 +1,131 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.shortcuts import render
+
+from .models import Job, Application
+from .pagination import CursorPaginator, aapproximate_count
+from .views import JOBS_PER_PAGE, filter_jobs, job_detail_validators, job_list_validators, lazy_listing_page
+from . import caching, facets
+from .caching import cache_public_page, conditional_public_page
+from jobsly.routers import read_from_replica
+
+# Async versions of the public read views, served by jobsly/asgi.py (see
+# jobsly/asgi_urls.py); WSGI keeps the sync ones in jobs/views.py. They take
+# the same parameters, render the same templates and share the page cache.
+#
+# Independent queries are gathered. Django 4.2's async ORM still runs each
+# query on the request's one sync thread, so this overlaps the cache and
+# rendering work around them; the waiting itself no longer holds a worker
+# thread. Templates are rendered off the event loop, with every queryset
+# already evaluated.
+
+arender = sync_to_async(render)
+
+
+async def alist(queryset):
+    return [row async for row in queryset]
+
+
+async def auser(request):
+    """request.user, loaded off the event loop (request.auser() is Django 5.0)"""
+    def load():
+        # Evaluates the lazy user (session and user queries)
+        request.user.is_authenticated
+        return request.user
+    return await sync_to_async(load)()
+
+
+@read_from_replica
+@cache_public_page(caching.LISTINGS)
+async def home(request):
+    latest_jobs, categories, (cache_version,) = await asyncio.gather(
+        alist(Job.objects.filter(status='approved', is_active=True).select_related('employer').order_by('-created_at')[:8]),
+        sync_to_async(facets.category_facets)(),
+        sync_to_async(caching.versions)(caching.LISTINGS),
+    )
+
+    context = {
+        'latest_jobs': latest_jobs,
+        # Most popular categories, from the maintained facet counts
+        'categories': categories[:8],
+        'cache_version': cache_version,
+    }
+    return await arender(request, 'jobs/home.html', context)
+
+
+@read_from_replica
+@conditional_public_page(job_list_validators, caching.LISTINGS)
+@cache_public_page(caching.LISTINGS)
+async def job_list(request):
+    # The search index check may query once per process
+    query, job_filter = await sync_to_async(filter_jobs)(request)
+    filtered_jobs = job_filter.qs.select_related('employer')
+
+    categories, (cache_version,) = await asyncio.gather(
+        sync_to_async(facets.category_facets)(),
+        sync_to_async(caching.versions)(caching.LISTINGS),
+    )
+    results_key = make_template_fragment_key('job_list_results', [cache_version, request.get_full_path()])
+    if await cache.ahas_key(results_key):
+        # The template won't need the page; should the fragment expire
+        # meanwhile, it is queried while rendering
+        page = lazy_listing_page(request, query, filtered_jobs)
+    elif query:
+        paginator = Paginator(filtered_jobs, JOBS_PER_PAGE)
+        # Paginator counts synchronously to pick the page
+        page_obj = await sync_to_async(paginator.get_page)(request.GET.get('page'))
+        page_obj.object_list = await alist(page_obj.object_list)
+        page = {'page_obj': page_obj, 'total_jobs': paginator.count, 'total_exact': True}
+    else:
+        page_obj, (total_jobs, total_exact) = await asyncio.gather(
+            CursorPaginator(filtered_jobs, JOBS_PER_PAGE).aget_page(request.GET.get('cursor')),
+            aapproximate_count(filtered_jobs),
+        )
+        page = {'page_obj': page_obj, 'total_jobs': total_jobs, 'total_exact': total_exact}
+
+    # Query string without paging parameters, for the pagination links
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+
+    context = {
+        **page,
+        'filter': job_filter,
+        'cursor_paging': not query,
+        'pagination_query': params.urlencode(),
+        'categories': categories,
+        'cache_version': cache_version,
+    }
+    return await arender(request, 'jobs/job_list.html', context)
+
+
+@read_from_replica
+@conditional_public_page(job_detail_validators, 'job:{job_id}')
+@cache_public_page('job:{job_id}')
+async def job_detail(request, job_id):
+    async def has_applied():
+        user = await auser(request)
+        if not user.is_authenticated or user.role != 'applicant':
+            return False
+        return await Application.objects.filter(job_id=job_id, applicant__user=user).aexists()
+
+    try:
+        job, applied, (cache_version,) = await asyncio.gather(
+            Job.objects.select_related('employer').aget(id=job_id, status='approved', is_active=True),
+            has_applied(),
+            sync_to_async(caching.versions)(caching.job_version_name(job_id)),
+        )
+    except Job.DoesNotExist:
+        raise Http404('No Job matches the given query.')
+
+    context = {
+        'job': job,
+        'has_applied': applied,
+        'cache_version': cache_version,
+    }
+    return await arender(request, 'jobs/job_detail.html', context)
@@ -0,0 +1,208 @@
+import asyncio
+import io
+import math
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.urls import reverse
+
+from accounts.models import User
+from .models import Job, Application
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, elapsed, queries=None):
+    """Latency/throughput summary for one scenario. Latencies in seconds"""
+    ms = sorted(latency * 1000 for latency in latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'mean_ms': round(statistics.fmean(ms), 3) if ms else None,
+        'p50_ms': round(percentile(ms, 50), 3) if ms else None,
+        'p95_ms': round(percentile(ms, 95), 3) if ms else None,
+        'p99_ms': round(percentile(ms, 99), 3) if ms else None,
+        'max_ms': round(ms[-1], 3) if ms else None,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+    }
+    if queries:
+        summary['queries_mean'] = round(statistics.fmean(queries), 2)
+    return summary
+
+
+def session_cookie(user):
+    """Log ``user`` in without a password, returning a session key to send as a cookie"""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+def default_scenarios():
+    """
+    (name, url, user) for the main read paths, picked from whatever data is in
+    the database (see "manage.py seed_scale"). Scenarios whose data is missing
+    are skipped.
+    """
+    scenarios = [
+        ('home', reverse('home'), None),
+        ('job_list', reverse('job_list'), None),
+        ('job_list_search', reverse('job_list') + '?q=developer', None),
+        ('job_list_filtered', reverse('job_list') + '?location=london&category=software&job_type=full_time', None),
+    ]
+
+    job = Job.objects.filter(status='approved', is_active=True).order_by('-applications_count').first()
+    applicant = User.objects.filter(role='applicant', is_active=True, applicantprofile__isnull=False).first()
+    staff = User.objects.filter(is_staff=True, is_active=True).first()
+
+    if job:
+        scenarios.append(('job_detail', reverse('job_detail', args=[job.id]), None))
+        scenarios.append(('manage_jobs', reverse('manage_jobs'), job.employer.user))
+        scenarios.append(('view_applicants', reverse('view_applicants', args=[job.id]), job.employer.user))
+        if applicant:
+            # Somewhere the applicant hasn't applied yet, so the form renders
+            open_job = Job.objects.filter(status='approved', is_active=True).exclude(
+                id__in=Application.objects.filter(applicant__user=applicant).values('job_id')
+            ).first()
+            if open_job:
+                scenarios.append(('apply_job', reverse('apply_job', args=[open_job.id]), applicant))
+    if applicant:
+        scenarios.append(('applicant_dashboard', reverse('applicant_dashboard'), applicant))
+    if staff:
+        for name in ('admin_dashboard', 'admin_user_management', 'admin_job_management',
+                     'admin_application_management', 'admin_system_stats'):
+            scenarios.append((name, reverse(name), staff))
+    return scenarios
+
+
+# ---- in-process drivers for the WSGI and ASGI applications ----
+#
+# Requests go through the real handlers (jobsly/wsgi.py, jobsly/asgi.py) with
+# all middleware, but no server or sockets, so the two interfaces can be
+# compared under the same concurrency on one machine.
+
+def wsgi_get(application, path, cookie=None):
+    """GET ``path`` from a WSGI application. Returns the status code"""
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost', 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    status = []
+    body = application(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+    try:
+        for _ in body:
+            pass
+    finally:
+        # Fires request_finished, which closes the thread's connections as a server would
+        body.close()
+    return status[0]
+
+
+async def asgi_get(application, path, cookie=None):
+    """GET ``path`` from an ASGI application. Returns the status code"""
+    path, _, query = path.partition('?')
+    headers = [(b'host', b'localhost')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': headers, 'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+    requested = False
+    status = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client stays connected until the response is sent
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def run_wsgi(application, path, cookie, requests, warmup, concurrency, threads=None):
+    """
+    Drive ``application`` with ``concurrency`` requests in flight, served by
+    ``threads`` threads (default: one per request in flight) like a threaded
+    WSGI server. Latency includes time queued for a free thread.
+    """
+    def serve():
+        return wsgi_get(application, path, cookie) >= 400
+
+    with ThreadPoolExecutor(max_workers=threads or concurrency) as server, \
+            ThreadPoolExecutor(max_workers=concurrency) as clients:
+        def fetch(_):
+            start = time.perf_counter()
+            failed = server.submit(serve).result()
+            return time.perf_counter() - start, failed
+
+        list(clients.map(fetch, range(warmup)))
+        started = time.perf_counter()
+        results = list(clients.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - started
+    return summarize([r[0] for r in results], sum(r[1] for r in results), elapsed)
+
+
+def run_asgi(application, path, cookie, requests, warmup, concurrency, threads=None):
+    """
+    Drive ``application`` with ``concurrency`` requests in flight on one
+    event loop. ``threads`` is ignored: Django gives each request its own
+    thread for sync code.
+    """
+    async def fetch():
+        start = time.perf_counter()
+        failed = await asgi_get(application, path, cookie) >= 400
+        return time.perf_counter() - start, failed
+
+    async def drive(count):
+        remaining = count
+        results = []
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                results.append(await fetch())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results
+
+    async def main():
+        await drive(warmup)
+        started = time.perf_counter()
+        results = await drive(requests)
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(main())
+    return summarize([r[0] for r in results], sum(r[1] for r in results), elapsed)
+
+
+INTERFACES = {'wsgi': run_wsgi, 'asgi': run_asgi}
@@ -0,0 +1,118 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts import stats
+from .models import Application, Job
+from . import alerts, caching, counters, facets
+
+# Multi-row changes done as set-based UPDATEs. QuerySet.update() skips
+# save() and its signals, so whatever those signals maintain (jobs/signals.py,
+# accounts/stats.py) is brought up to date here, once per batch.
+
+# Rows per UPDATE, as jobs/imports.py writes in batches of 500
+CHUNK_SIZE = 500
+
+
+def update_application_statuses(job, applications, status):
+    """
+    Move every application in ``applications`` that belongs to ``job`` to
+    ``status``. Returns the number that changed.
+    """
+    with transaction.atomic():
+        # Lock the rows first: the counters move by exactly what is updated,
+        # even with single-application updates running at the same time
+        locked = list(
+            applications.filter(job=job).exclude(status=status)
+            .select_for_update().values_list('id', 'status')
+        )
+        if not locked:
+            return 0
+        now = timezone.now()
+        for start in range(0, len(locked), CHUNK_SIZE):
+            # In chunks: one id__in over a large selection would pass the
+            # database's limit on query parameters
+            Application.objects.filter(id__in=[pk for pk, _ in locked[start:start + CHUNK_SIZE]]).update(
+                status=status, updated_at=now,
+            )
+
+        moved = Counter(old_status for _, old_status in locked)
+        counters.applications_moved(job.pk, moved, status)
+        after = stats.buckets(Application(status=status))
+        stats.apply_deltas(stats.bulk_bucket_deltas('jobs.Application', [
+            (stats.buckets(Application(status=old_status)), after, count)
+            for old_status, count in moved.items()
+        ]))
+    return len(locked)
+
+
+def moderate_jobs(jobs, status):
+    """
+    Approve or reject every job in the ``jobs`` queryset with one bulk_update.
+    Returns the jobs whose status changed.
+
+    The side effects Job.save() would have had run once for the batch:
+    counters, category facets, page cache versions, the listing's delisting
+    time, and alerts for newly approved jobs. The search index needs
+    nothing; status is not part of the indexed document.
+    """
+    with transaction.atomic():
+        changed = list(
+            jobs.exclude(status=status).select_for_update()
+            .only('id', 'title', 'status', 'is_active', 'category', 'updated_at')
+        )
+        if not changed:
+            return []
+        before = {job.pk: stats.buckets(job) for job in changed}
+        delisted = any(job.status == 'approved' and job.is_active for job in changed)
+        now = timezone.now()
+        for job in changed:
+            job.status = status
+            job.updated_at = now
+        Job.objects.bulk_update(changed, ['status', 'updated_at'], batch_size=500)
+
+        stats.apply_deltas(stats.bulk_bucket_deltas('jobs.Job', [
+            (before[job.pk], stats.buckets(job), 1) for job in changed
+        ]))
+        facets.invalidate()
+        caching.bump(caching.LISTINGS, *(caching.job_version_name(job.pk) for job in changed))
+        if delisted:
+            caching.record_delisting()
+        if status == 'approved':
+            alerts.queue_job_alerts(changed)
+    return changed
+
+
+def toggle_jobs_active(jobs):
+    """
+    Activate the inactive and deactivate the active jobs in the ``jobs``
+    queryset, one UPDATE per direction. Returns the jobs that changed.
+
+    As in moderate_jobs(), the side effects Job.save() would have had run
+    once: counters, category facets, page cache versions and the listing's
+    delisting time. The search index needs nothing; is_active is not part
+    of the indexed document.
+    """
+    with transaction.atomic():
+        changed = list(jobs.select_for_update().only('id', 'title', 'status', 'is_active', 'category'))
+        if not changed:
+            return []
+        before = {job.pk: stats.buckets(job) for job in changed}
+        delisted = any(job.status == 'approved' and job.is_active for job in changed)
+        now = timezone.now()
+        for is_active in (True, False):
+            ids = [job.pk for job in changed if job.is_active != is_active]
+            for start in range(0, len(ids), CHUNK_SIZE):
+                Job.objects.filter(id__in=ids[start:start + CHUNK_SIZE]).update(is_active=is_active, updated_at=now)
+        for job in changed:
+            job.is_active = not job.is_active
+
+        stats.apply_deltas(stats.bulk_bucket_deltas('jobs.Job', [
+            (before[job.pk], stats.buckets(job), 1) for job in changed
+        ]))
+        facets.invalidate()
+        caching.bump(caching.LISTINGS, *(caching.job_version_name(job.pk) for job in changed))
+        if delisted:
+            caching.record_delisting()
+    return changed
@@ -0,0 +1,225 @@
+import datetime
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Greatest
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from jobsly import routers
+from .models import ListingChange
+
+# Versioned caching for the public job pages.
+#
+# Every cached page or fragment key includes the current version of the data
+# it shows: "jobs" for anything listing jobs, "job:<id>" for one posting.
+# Saving or deleting a Job or EmployerProfile bumps the matching versions
+# (jobs/signals.py), so stale entries are never read again and simply expire;
+# nothing is flushed.
+
+# Seconds. The {% cache %} fragments in templates/jobs use the same value
+TIMEOUT = 300
+LISTINGS = 'jobs'
+
+
+def job_version_name(job_id):
+    return f'job:{job_id}'
+
+
+def _version_key(name):
+    return f'version:{name}'
+
+
+def versions(*names):
+    """Current version of each of ``names``, in order"""
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # Start from the clock rather than 1, so a version evicted from the
+        # cache can't come back at a value old entries were stored under
+        initial = time.time_ns()
+        for key in missing:
+            cache.add(key, initial, None)
+        found.update(cache.get_many(missing))
+    if routers.reading_from_replica():
+        # What's built from the replica may be behind the primary: keep it
+        # apart, so a client reading its own writes from the primary is
+        # never served it (jobsly/routers.py)
+        return tuple(f'{found[key]}r' for key in keys)
+    return tuple(found[key] for key in keys)
+
+
+def record_delisting():
+    """
+    Note that a job just left the listing, for the listing's Last-Modified.
+    Kept in the database, so every process reports the same date.
+    """
+    # HTTP dates are whole seconds: round up, and always move forward, so
+    # a delisting within the same second as the last change still moves it
+    second = datetime.timedelta(seconds=1)
+    delisted_at = timezone.now().replace(microsecond=0) + second
+    changes = ListingChange.objects.filter(pk=1)
+    if not changes.update(delisted_at=Greatest(Value(delisted_at), F('delisted_at') + second)):
+        ListingChange.objects.get_or_create(pk=1, defaults={'delisted_at': delisted_at})
+
+
+def last_delisting():
+    """When a job last left the listing, as a subquery"""
+    return Subquery(ListingChange.objects.filter(pk=1).values('delisted_at'))
+
+
+def bump(*names):
+    """Invalidate everything cached under ``names`` once the transaction commits"""
+    def incr():
+        for name in names:
+            try:
+                cache.incr(_version_key(name))
+            except ValueError:
+                # Never read, so nothing is cached under it
+                pass
+    transaction.on_commit(incr)
+
+
+def make_key(prefix, names, *parts):
+    """Cache key for ``parts`` at the current version of ``names``"""
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return '%s:%s:%s' % (prefix, '.'.join(map(str, versions(*names))), digest)
+
+
+def is_cacheable_request(request):
+    # Only cookieless visitors: no session (so certainly anonymous, and no
+    # session lookup needed to find out) and no pending flash messages
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def cache_public_page(*names):
+    """
+    Cache a view's whole response for anonymous visitors.
+
+    The key is the full URL plus the current version of each of ``names``,
+    which may use the view's keyword arguments, e.g. ``'job:{job_id}'``.
+    Signed-in users always get a fresh render; their pages carry per-user
+    parts (navbar, apply buttons) and use fragment caching instead.
+    Works on async views too, sharing entries with the sync view of the
+    same name.
+    """
+    def decorator(view):
+        def cached_response(request, kwargs):
+            """(cache key, cached response or None)"""
+            key = make_key(
+                f'page:{view.__name__}',
+                [name.format(**kwargs) for name in names],
+                request.get_full_path(),
+            )
+            cached = cache.get(key)
+            if cached is None:
+                return key, None
+            content, content_type = cached
+            return key, HttpResponse(content, content_type=content_type)
+
+        def store(key, response):
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, (response.content, response['Content-Type']), TIMEOUT)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not is_cacheable_request(request):
+                    return await view(request, *args, **kwargs)
+                # Cache calls may block on a network backend: keep them off the event loop
+                key, response = await sync_to_async(cached_response)(request, kwargs)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(store)(key, response)
+                patch_vary_headers(response, ['Cookie'])
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            key, response = cached_response(request, kwargs)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                store(key, response)
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_public_page(validators, *names):
+    """
+    Answer conditional GETs from anonymous visitors with 304 Not Modified.
+
+    ``validators(request, *args, **kwargs)`` returns ``(etag, last_modified)``,
+    or None to skip (e.g. a missing object the view will 404 on). The result
+    is cached at the current version of ``names`` (as in cache_public_page),
+    so a client polling an unchanged page costs no queries at all. Signed-in
+    users' pages have per-user parts and are never answered with a 304.
+    Works on async views too.
+    """
+    def request_validators(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            result = None
+            if is_cacheable_request(request):
+                key = make_key(
+                    'validators',
+                    [name.format(**kwargs) for name in names],
+                    request.get_full_path(),
+                )
+                result = cache.get(key)
+                if result is None:
+                    result = validators(request, *args, **kwargs)
+                    if result is not None:
+                        cache.set(key, result, TIMEOUT)
+            request._page_validators = result or (None, None)
+        return request._page_validators
+
+    sync_decorator = condition(
+        etag_func=lambda request, *args, **kwargs: request_validators(request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: request_validators(request, *args, **kwargs)[1],
+    )
+
+    def decorator(view):
+        if not iscoroutinefunction(view):
+            return sync_decorator(view)
+
+        # condition() only wraps sync views before Django 5.0; this is the
+        # same logic with the validator queries run off the event loop
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            etag, last_modified = await sync_to_async(request_validators)(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            if last_modified:
+                if not timezone.is_aware(last_modified):
+                    last_modified = timezone.make_aware(last_modified, datetime.timezone.utc)
+                last_modified = int(last_modified.timestamp())
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            return response
+        return async_wrapper
+    return decorator
@@ -0,0 +1,65 @@
+from collections import Counter
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Job, Application
+
+# Application status -> Job counter field
+STATUS_FIELDS = {status: f'{status}_count' for status, _ in Application.STATUS_CHOICES}
+
+
+def application_added(job_id, status):
+    Job.objects.filter(pk=job_id).update(
+        applications_count=F('applications_count') + 1,
+        **{STATUS_FIELDS[status]: F(STATUS_FIELDS[status]) + 1},
+    )
+
+
+def application_removed(job_id, status):
+    Job.objects.filter(pk=job_id).update(
+        applications_count=F('applications_count') - 1,
+        **{STATUS_FIELDS[status]: F(STATUS_FIELDS[status]) - 1},
+    )
+
+
+def application_status_changed(job_id, old_status, new_status, count=1):
+    """Move ``count`` applications of one job from ``old_status`` to ``new_status``"""
+    if old_status == new_status or not count:
+        return
+    Job.objects.filter(pk=job_id).update(**{
+        STATUS_FIELDS[old_status]: F(STATUS_FIELDS[old_status]) - count,
+        STATUS_FIELDS[new_status]: F(STATUS_FIELDS[new_status]) + count,
+    })
+
+
+def applications_moved(job_id, moved, new_status):
+    """
+    Bulk version of application_status_changed: ``moved`` is {old status:
+    count} for applications of one job that all became ``new_status``
+    """
+    changes = Counter()
+    for old_status, count in moved.items():
+        if old_status != new_status:
+            changes[STATUS_FIELDS[old_status]] -= count
+            changes[STATUS_FIELDS[new_status]] += count
+    changes = {field: F(field) + change for field, change in changes.items() if change}
+    if changes:
+        Job.objects.filter(pk=job_id).update(**changes)
+
+
+def _count_subquery(**filters):
+    applications = (
+        Application.objects.filter(job=OuterRef('pk'), **filters)
+        .order_by().values('job').annotate(count=Count('id')).values('count')
+    )
+    return Coalesce(Subquery(applications), 0)
+
+
+def recount(jobs=None):
+    """Recompute the counters from the applications table in one UPDATE. Returns jobs updated"""
+    jobs = Job.objects.all() if jobs is None else jobs
+    values = {'applications_count': _count_subquery()}
+    for status, field in STATUS_FIELDS.items():
+        values[field] = _count_subquery(status=status)
+    return jobs.update(**values)
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models import F
+
+from accounts.models import ApplicantProfile
+from .models import Application
+from . import search
+
+# Extracted CV text, stored on every Application and ApplicantProfile row
+# holding the CV. CV files are content-addressed (jobsly/storage.py), so a
+# CV shared by many rows is extracted once and its text copied by name.
+# Extraction itself is in jobsly/textextract.py.
+
+MODELS = (Application, ApplicantProfile)
+
+
+def store(name, text, error=None):
+    """Save the text extracted from the stored CV ``name``. Failures store no text"""
+    with transaction.atomic():
+        for model in MODELS:
+            updates = {'cv_text': text or '', 'cv_text_source': name}
+            if model is Application:
+                # The CV is part of what ranking compares (jobs/ranking.py)
+                updates['match_score'] = None
+            model.objects.filter(cv=name).update(**updates)
+        search.index_cv(name)
+
+
+def copy_known_text(name):
+    """Fill in ``name`` from a row it was already extracted for. Returns False if there is none"""
+    for model in MODELS:
+        text = model.objects.filter(cv=name, cv_text_source=name).values_list('cv_text', flat=True).first()
+        if text is not None:
+            store(name, text)
+            return True
+    return False
+
+
+def pending_names():
+    """Sorted names of stored CVs some row has no text for yet"""
+    names = set()
+    for model in MODELS:
+        names.update(
+            model.objects.exclude(cv='').exclude(cv__isnull=True).exclude(cv_text_source=F('cv'))
+            .values_list('cv', flat=True).distinct().order_by()
+        )
+    return sorted(names)
+
+
+def forget(failed_only=False):
+    """Mark CVs as not extracted (with ``failed_only``, those without text), for the next backfill"""
+    for model in MODELS:
+        rows = model.objects.exclude(cv_text_source='')
+        if failed_only:
+            rows = rows.filter(cv_text='')
+        rows.update(cv_text_source='')
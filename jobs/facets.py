@@ -0,0 +1,36 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from accounts import stats
+
+CACHE_KEY = 'jobs:category_facets'
+# Deleted on every job change; the timeout only bounds staleness in other
+# processes when the cache backend is per-process (the default LocMemCache)
+CACHE_TIMEOUT = 60
+COUNTER_PREFIX = 'jobs.category:'
+
+
+def category_facets():
+    """
+    (category, live job count) pairs for approved, active jobs, biggest first.
+
+    Served from the cache, falling back to the incrementally maintained
+    counters in accounts/stats.py, so the Job table is never read.
+    """
+    facets = cache.get(CACHE_KEY)
+    if facets is None:
+        facets = sorted(
+            (
+                (name[len(COUNTER_PREFIX):], value)
+                for name, value in stats.get_counters().items()
+                if name.startswith(COUNTER_PREFIX) and value > 0
+            ),
+            key=lambda facet: (-facet[1], facet[0].lower()),
+        )
+        cache.set(CACHE_KEY, facets, CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate():
+    # After commit, so a concurrent request can't cache the old counts again
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
@@ -62,4 +62,62 @@ class ApplicationForm(forms.ModelForm):
                 raise ValidationError("CV file size must be under 5MB.")
             if not cv.name.lower().endswith(('.pdf', '.doc', '.docx')):
                 raise ValidationError("Only PDF, DOC, and DOCX files are allowed.")
-        return cv
\ No newline at end of file
+        return cv
+
+class BulkApplicationStatusForm(forms.Form):
+    SCOPE_CHOICES = (
+        ('selected', 'Selected applicants'),
+        ('matching', 'All applicants matching the current filter'),
+    )
+
+    status = forms.ChoiceField(choices=Application.STATUS_CHOICES)
+    scope = forms.ChoiceField(choices=SCOPE_CHOICES, initial='selected', widget=forms.RadioSelect)
+    # The status filter view_applicants was showing, for scope='matching'
+    filter_status = forms.ChoiceField(
+        choices=(('', 'All'),) + Application.STATUS_CHOICES, required=False, widget=forms.HiddenInput,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Checkbox values; anything not an id of this job's applications is
+        # simply not matched by the update
+        ids = [value for value in self.data.getlist('applications') if value.isdigit()]
+        if cleaned_data.get('scope') == 'selected' and not ids:
+            raise ValidationError("Select at least one applicant.")
+        cleaned_data['applications'] = [int(value) for value in ids]
+        return cleaned_data
+
+class JobImportForm(JobForm):
+    """
+    JobForm's rules applied to feed rows one after another (jobs/imports.py).
+
+    One form is reused for every row: building a form per row costs more
+    than validating it. Each row still gets a fresh Job for the model-level
+    validation in _post_clean, so no value carries over from the last one.
+    """
+    def __init__(self):
+        super().__init__(data={})
+
+    def validate(self, row):
+        self.data = row
+        self.instance = Job()
+        self._errors = None
+        return self.is_valid()
+
+class JobImportUploadForm(forms.Form):
+    FORMAT_CHOICES = (
+        ('', 'From the file extension'),
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+        ('xml', 'XML'),
+    )
+    MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+    feed = forms.FileField(help_text="CSV, JSON Lines or XML; one job per row, each with an external_ref")
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+
+    def clean_feed(self):
+        feed = self.cleaned_data['feed']
+        if feed.size > self.MAX_UPLOAD_BYTES:
+            raise ValidationError("Feeds must be under 50MB; use \"manage.py import_jobs\" for larger ones.")
+        return feed
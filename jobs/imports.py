@@ -0,0 +1,222 @@
+import csv
+import io
+import json
+import os
+from dataclasses import dataclass, field
+from xml.etree import ElementTree
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts import stats
+from .forms import JobImportForm
+from .models import Application, Job
+from . import caching, facets, search
+
+# Bulk job import from employer feeds (CSV, JSON Lines or XML, one job per
+# row), upserted on (employer, external_ref). Rows are parsed as a stream and
+# written in chunks with bulk_create()/bulk_update(), so whatever Job.save()'s
+# signals would have done is done here once per chunk, as in jobs/bulk.py.
+#
+# New jobs wait for moderation like posted ones. An existing job whose
+# moderated text changes goes back to pending; a new deadline or salary
+# alone leaves it live.
+
+FORMATS = ('csv', 'jsonl', 'xml')
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl', '.xml': 'xml'}
+FIELDS = JobImportForm._meta.fields
+MODERATED_FIELDS = ('title', 'category', 'description', 'requirements', 'responsibilities')
+# Fields jobs/ranking.py scores applicants against
+RANKED_FIELDS = ('requirements', 'responsibilities')
+REF_MAX_LENGTH = Job._meta.get_field('external_ref').max_length
+CHUNK_SIZE = 1000
+# Errors kept for the report; the counts cover all of them
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    # (row number, external_ref, message)
+    errors: list = field(default_factory=list)
+    # None keeps every error
+    max_errors: int = MAX_REPORTED_ERRORS
+
+    @property
+    def rows(self):
+        return self.created + self.updated + self.unchanged + self.failed
+
+    def error(self, row_number, ref, message):
+        self.failed += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append((row_number, ref, message))
+
+
+def guess_format(filename):
+    return EXTENSIONS.get(os.path.splitext(filename or '')[1].lower())
+
+
+# ---- parsers: (row number, dict or None, parse error or None) ----
+
+def _text_stream(file):
+    if isinstance(file, io.TextIOBase):
+        return file
+    return io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+
+def parse_csv(file):
+    reader = csv.DictReader(_text_stream(file))
+    try:
+        for row in reader:
+            # Row 1 is the header
+            yield reader.line_num, row, None
+    except (csv.Error, UnicodeDecodeError) as e:
+        yield reader.line_num, None, f'Unreadable CSV: {e}'
+
+
+def parse_jsonl(file):
+    number = 0
+    try:
+        for number, line in enumerate(_text_stream(file), 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, None, f'Invalid JSON: {e}'
+                continue
+            if isinstance(row, dict):
+                yield number, row, None
+            else:
+                yield number, None, 'Each line must be a JSON object.'
+    except UnicodeDecodeError as e:
+        yield number + 1, None, f'Not UTF-8: {e}'
+
+
+def parse_xml(file):
+    """<jobs><job><title>...</title>...</job>...</jobs>; attributes count as fields too"""
+    number = 0
+    depth = 0
+    try:
+        for event, element in ElementTree.iterparse(file, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                number += 1
+                row = dict(element.attrib)
+                row.update((child.tag, (child.text or '').strip()) for child in element)
+                yield number, row, None
+                # Keep memory flat on big feeds
+                element.clear()
+    except ElementTree.ParseError as e:
+        yield number + 1, None, f'Invalid XML: {e}'
+
+
+PARSERS = {'csv': parse_csv, 'jsonl': parse_jsonl, 'xml': parse_xml}
+
+
+# ---- import ----
+
+def _errors_text(form):
+    return '; '.join(
+        ('' if name == '__all__' else f'{name}: ') + ' '.join(messages)
+        for name, messages in form.errors.items()
+    )
+
+
+def import_jobs(employer, file, feed_format, max_errors=MAX_REPORTED_ERRORS):
+    """Import the jobs in ``file`` for ``employer``. Returns an ImportReport"""
+    report = ImportReport(max_errors=max_errors)
+    form = JobImportForm()
+    seen = set()
+    chunk = []
+    for number, row, parse_error in PARSERS[feed_format](file):
+        if parse_error:
+            report.error(number, '', parse_error)
+            continue
+        row = {str(key).strip(): value for key, value in row.items() if key is not None}
+        ref = str(row.get('external_ref') or '').strip()
+        if not ref:
+            report.error(number, '', 'external_ref: This field is required.')
+            continue
+        if len(ref) > REF_MAX_LENGTH:
+            report.error(number, ref[:REF_MAX_LENGTH], f'external_ref: At most {REF_MAX_LENGTH} characters.')
+            continue
+        if ref in seen:
+            report.error(number, ref, 'external_ref: Appears earlier in this feed.')
+            continue
+        seen.add(ref)
+        if not form.validate(row):
+            report.error(number, ref, _errors_text(form))
+            continue
+        chunk.append((ref, {name: form.cleaned_data[name] for name in FIELDS}))
+        if len(chunk) == CHUNK_SIZE:
+            _save_chunk(employer, chunk, report)
+            chunk = []
+    if chunk:
+        _save_chunk(employer, chunk, report)
+    if report.created or report.updated:
+        facets.invalidate()
+    return report
+
+
+def _save_chunk(employer, chunk, report):
+    with transaction.atomic():
+        existing = {
+            job.external_ref: job
+            for job in Job.objects.filter(employer=employer, external_ref__in=[ref for ref, _ in chunk])
+            .only('id', 'external_ref', 'status', 'is_active', *FIELDS)
+        }
+        now = timezone.now()
+        created, changed, rescore = [], [], []
+        deltas = []
+        delisted = False
+        for ref, values in chunk:
+            job = existing.get(ref)
+            if job is None:
+                job = Job(employer=employer, external_ref=ref, **values)
+                created.append(job)
+                deltas.append((None, stats.buckets(job), 1))
+                continue
+            differing = [name for name in FIELDS if getattr(job, name) != values[name]]
+            if not differing:
+                report.unchanged += 1
+                continue
+            before = stats.buckets(job)
+            for name in differing:
+                setattr(job, name, values[name])
+            if any(name in MODERATED_FIELDS for name in differing):
+                delisted = delisted or (job.status == 'approved' and job.is_active)
+                job.status = 'pending'
+            if any(name in RANKED_FIELDS for name in differing):
+                rescore.append(job.pk)
+            job.updated_at = now
+            changed.append(job)
+            deltas.append((before, stats.buckets(job), 1))
+
+        Job.objects.bulk_create(created, batch_size=500)
+        if created and created[0].pk is None:
+            # No INSERT ... RETURNING on this database
+            ids = dict(Job.objects.filter(employer=employer, external_ref__in=[job.external_ref for job in created])
+                       .values_list('external_ref', 'id'))
+            for job in created:
+                job.pk = ids[job.external_ref]
+        Job.objects.bulk_update(changed, [*FIELDS, 'status', 'updated_at'], batch_size=500)
+        if rescore:
+            Application.objects.filter(job_id__in=rescore).update(match_score=None)
+
+        stats.apply_deltas(stats.bulk_bucket_deltas('jobs.Job', deltas))
+        job_ids = [job.pk for job in created + changed]
+        search.index_jobs(job_ids)
+        if changed:
+            # New jobs are pending, so not on any cached page yet
+            caching.bump(caching.LISTINGS, *(caching.job_version_name(job.pk) for job in changed))
+        if delisted:
+            caching.record_delisting()
+    report.created += len(created)
+    report.updated += len(changed)
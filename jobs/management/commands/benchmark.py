@@ -0,0 +1,133 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.utils import timezone
+
+from jobs.benchmark import INTERFACES, default_scenarios, session_cookie, summarize
+
+
+class Command(BaseCommand):
+    help = 'Drive the main views and report p50/p95/p99 latency and throughput as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per scenario')
+        parser.add_argument('--url', help='Benchmark a running server at this base URL '
+                                          'instead of calling views in-process')
+        parser.add_argument('--interface', action='append', choices=sorted(INTERFACES),
+                            help='Drive the WSGI or ASGI application in-process instead of the test '
+                                 'client; give both to compare them')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Parallel requests (only with --url or --interface)')
+        parser.add_argument('--threads', type=int,
+                            help='WSGI server threads with --interface (default: --concurrency)')
+        parser.add_argument('--scenario', action='append',
+                            help='Only run these scenarios (repeatable)')
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        scenarios = default_scenarios()
+        if options['scenario']:
+            scenarios = [s for s in scenarios if s[0] in options['scenario']]
+
+        if options['url']:
+            mode = 'http'
+        elif options['interface']:
+            mode = 'interface'
+        else:
+            mode = 'client'
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'mode': mode,
+            'requests_per_scenario': options['requests'],
+            'concurrency': options['concurrency'] if mode != 'client' else 1,
+        }
+        if mode == 'interface':
+            report['interfaces'] = self.run_interfaces(scenarios, options)
+        else:
+            report['scenarios'] = {}
+            for name, path, user in scenarios:
+                if mode == 'http':
+                    result = self.run_http(options['url'].rstrip('/') + path, user, options)
+                else:
+                    result = self.run_client(path, user, options)
+                report['scenarios'][name] = result
+                self.log(name, result)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def log(self, name, result):
+        self.stderr.write(f"{name}: p50 {result['p50_ms']}ms p95 {result['p95_ms']}ms "
+                          f"p99 {result['p99_ms']}ms {result['throughput_rps']} req/s")
+
+    def run_interfaces(self, scenarios, options):
+        """{interface: {scenario: summary}} for each --interface, run back to back"""
+        # Imported here: each module sets up its handler when loaded
+        from jobsly.asgi import application as asgi_application
+        from jobsly.wsgi import application as wsgi_application
+        applications = {'wsgi': wsgi_application, 'asgi': asgi_application}
+
+        interfaces = list(dict.fromkeys(options['interface']))
+        results = {interface: {} for interface in interfaces}
+        for name, path, user in scenarios:
+            cookie = f'{settings.SESSION_COOKIE_NAME}={session_cookie(user)}' if user else None
+            for interface in interfaces:
+                result = INTERFACES[interface](
+                    applications[interface], path, cookie,
+                    options['requests'], options['warmup'], max(options['concurrency'], 1),
+                    threads=options['threads'],
+                )
+                results[interface][name] = result
+                self.log(f'{name} ({interface})', result)
+        return results
+
+    def run_client(self, path, user, options):
+        client = Client(HTTP_HOST='localhost')
+        if user:
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_cookie(user)
+        for _ in range(options['warmup']):
+            client.get(path)
+
+        latencies, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            response = client.get(path)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+            metrics = getattr(response.wsgi_request, 'metrics', None)
+            if metrics:
+                queries.append(metrics['queries'])
+        return summarize(latencies, errors, time.perf_counter() - started, queries)
+
+    def run_http(self, url, user, options):
+        headers = {}
+        if user:
+            headers['Cookie'] = f'{settings.SESSION_COOKIE_NAME}={session_cookie(user)}'
+
+        def fetch(_):
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+                    response.read()
+                    failed = response.status >= 400
+            except (urllib.error.URLError, OSError):
+                failed = True
+            return time.perf_counter() - start, failed
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(fetch, range(options['warmup'])))
+            started = time.perf_counter()
+            results = list(pool.map(fetch, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+        return summarize([r[0] for r in results], sum(r[1] for r in results), elapsed)
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobsly.storage import BLOB_PREFIX, DELETE_GRACE_SECONDS, referencing_fields
+
+
+class Command(BaseCommand):
+    help = ('Move CV files uploaded before deduplication into the content-addressed '
+            'blob store, then remove blobs nothing refers to')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would change without touching files or rows')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        fields = referencing_fields()
+        if not fields:
+            self.stdout.write('No fields use the deduplicating storage.')
+            return
+        storage = fields[0][1].storage
+
+        renamed = self.store_blobs(storage, fields)
+        if not self.dry_run:
+            self.repoint_rows(fields, renamed)
+            for old_name in renamed:
+                # Skips the grace period: these were never blobs
+                if not storage.is_referenced(old_name):
+                    FileSystemStorage.delete(storage, old_name)
+        self.collect_garbage(storage, fields)
+
+    def legacy_names(self, fields):
+        """Distinct non-blob file names still stored in rows"""
+        names = set()
+        for model, field in fields:
+            names.update(
+                model._default_manager
+                .exclude(**{f'{field.name}__startswith': f'{BLOB_PREFIX}/'})
+                .exclude(**{field.name: ''})
+                .exclude(**{f'{field.name}__isnull': True})
+                .values_list(field.name, flat=True).distinct().order_by()
+            )
+        return sorted(names)
+
+    def store_blobs(self, storage, fields):
+        """Copy every legacy file into the blob store. Returns {old name: blob name}"""
+        renamed = {}
+        missing = 0
+        legacy_bytes = 0
+        blob_sizes = {}
+        for name in self.legacy_names(fields):
+            if not storage.exists(name):
+                missing += 1
+                continue
+            size = storage.size(name)
+            legacy_bytes += size
+            with storage.open(name) as content:
+                if self.dry_run:
+                    digest = hashlib.sha256()
+                    for chunk in content.chunks():
+                        digest.update(chunk)
+                    blob = storage.blob_name(digest.hexdigest(), os.path.splitext(name)[1].lower())
+                else:
+                    blob = storage.save(name, content)
+            renamed[name] = blob
+            blob_sizes[blob] = size
+
+        verb = 'Would store' if self.dry_run else 'Stored'
+        self.stdout.write(
+            f'{verb} {len(renamed)} file(s) as {len(blob_sizes)} blob(s), '
+            f'saving {legacy_bytes - sum(blob_sizes.values())} bytes. {missing} file(s) missing.'
+        )
+        return renamed
+
+    def repoint_rows(self, fields, renamed):
+        with transaction.atomic():
+            for model, field in fields:
+                # Bulk UPDATEs bypass django_cleanup, which would delete the
+                # old files before the new names are committed
+                for old_name, blob in renamed.items():
+                    model._default_manager.filter(**{field.name: old_name}).update(**{field.name: blob})
+
+    def collect_garbage(self, storage, fields):
+        """Delete blobs (and abandoned partial uploads) that no row refers to"""
+        root = storage.path(BLOB_PREFIX)
+        if not os.path.isdir(root):
+            return
+        referenced = set()
+        for model, field in fields:
+            referenced.update(
+                model._default_manager.filter(**{f'{field.name}__startswith': f'{BLOB_PREFIX}/'})
+                .values_list(field.name, flat=True).distinct().order_by()
+            )
+
+        cutoff = time.time() - DELETE_GRACE_SECONDS
+        removed = 0
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                if name in referenced or os.path.getmtime(path) > cutoff:
+                    continue
+                if not self.dry_run:
+                    os.remove(path)
+                removed += 1
+
+        verb = 'Would remove' if self.dry_run else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} unreferenced blob(s).'))
@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from jobs import cvtext
+from jobsly import textextract
+from jobsly.storage import cv_storage
+
+
+class Command(BaseCommand):
+    help = 'Extract searchable text from every CV that has none yet. Safe to interrupt and rerun'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (default: one per CPU)')
+        parser.add_argument('--force', action='store_true',
+                            help='Extract every CV again; rerun without it to resume an interrupted run')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Extract again the CVs that gave no text last time')
+        parser.add_argument('--timeout', type=int, default=textextract.MAX_SECONDS,
+                            help='Seconds allowed per file')
+
+    def handle(self, *args, **options):
+        if options['force']:
+            cvtext.forget(failed_only=False)
+        elif options['retry_failed']:
+            cvtext.forget(failed_only=True)
+        # Each file's text is saved as soon as it is extracted, so after an
+        # interruption this list is just what is left
+        names = cvtext.pending_names()
+        self.stdout.write(f'{len(names)} CV file(s) to extract.')
+
+        extracted = failed = 0
+        results = textextract.extract_many(
+            cv_storage, names, workers=max(options['workers'], 1), seconds=options['timeout'],
+        )
+        for done, (name, text, error) in enumerate(results, 1):
+            # Failures are stored too (without text), or every run would retry them
+            cvtext.store(name, text)
+            if error is None:
+                extracted += 1
+            else:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+            if options['verbosity'] > 1 or done % 500 == 0:
+                self.stdout.write(f'{done}/{len(names)}')
+
+        self.stdout.write(self.style.SUCCESS(f'Extracted {extracted} CV file(s). {failed} failed.'))
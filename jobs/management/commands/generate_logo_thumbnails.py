@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import EmployerProfile
+from jobs.signals import bump_employer_pages
+from jobsly import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Generate missing WebP/JPEG thumbnails for company logos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate variants that already exist')
+        parser.add_argument('--workers', type=int, default=2,
+                            help='Images decoded in parallel (Pillow releases the GIL while decoding)')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        profiles = list(
+            EmployerProfile.objects.exclude(logo='').exclude(logo__isnull=True)
+            .values_list('id', 'logo').order_by('id')
+        )
+        storage = EmployerProfile._meta.get_field('logo').storage
+
+        def generate(profile):
+            employer_id, name = profile
+            try:
+                return employer_id, name, thumbnails.generate_variants(storage, name, force=force), None
+            except (thumbnails.ThumbnailError, FileNotFoundError) as e:
+                return employer_id, name, 0, e
+
+        generated = failed = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            for employer_id, name, written, error in executor.map(generate, profiles):
+                if error is not None:
+                    failed += 1
+                    self.stderr.write(f'{name} (employer {employer_id}): {error}')
+                elif written:
+                    generated += 1
+                    bump_employer_pages(employer_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated thumbnails for {generated} of {len(profiles)} logo(s). {failed} failed.'
+        ))
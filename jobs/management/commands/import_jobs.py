@@ -0,0 +1,47 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import EmployerProfile
+from jobs import imports
+
+
+class Command(BaseCommand):
+    help = 'Import (upsert on external_ref) the jobs in a CSV, JSON Lines or XML feed for one employer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('feed', help='Feed file')
+        parser.add_argument('--employer', required=True, help='Username of the employer account')
+        parser.add_argument('--format', choices=imports.FORMATS,
+                            help='Feed format (default: from the file extension)')
+        parser.add_argument('--report', help='Write every rejected row to this CSV file')
+
+    def handle(self, *args, **options):
+        try:
+            employer = EmployerProfile.objects.get(user__username=options['employer'])
+        except EmployerProfile.DoesNotExist:
+            raise CommandError(f'No employer profile for user "{options["employer"]}".')
+        feed_format = options['format'] or imports.guess_format(options['feed'])
+        if not feed_format:
+            raise CommandError('Pass --format; it cannot be told from the file name.')
+
+        with open(options['feed'], 'rb') as feed:
+            # A report file gets every rejected row
+            report = imports.import_jobs(
+                employer, feed, feed_format,
+                max_errors=None if options['report'] else imports.MAX_REPORTED_ERRORS,
+            )
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8', newline='') as output:
+                writer = csv.writer(output)
+                writer.writerow(['row', 'external_ref', 'problem'])
+                writer.writerows(report.errors)
+        else:
+            for row, ref, message in report.errors:
+                self.stderr.write(f'Row {row} ({ref or "no external_ref"}): {message}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{report.rows} row(s): {report.created} created, {report.updated} updated, '
+            f'{report.unchanged} unchanged, {report.failed} rejected.'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from jobs import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text job search index from the jobs table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if not search.rebuild_index(using=options['database']):
+            raise CommandError('No search index on this database. Run "manage.py migrate" first.')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
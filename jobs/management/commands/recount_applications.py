@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from jobs import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute every job's denormalised application counters"
+
+    def handle(self, *args, **options):
+        updated = counters.recount()
+        self.stdout.write(self.style.SUCCESS(f'Recounted applications for {updated} job(s).'))
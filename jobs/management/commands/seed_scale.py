@@ -0,0 +1,251 @@
+import random
+import time
+from array import array
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts import stats
+from accounts.models import User, ApplicantProfile, EmployerProfile
+from jobs import counters, search
+from jobs.models import Job, Application
+
+# (value, relative weight) - a few big categories and cities, a long tail
+CATEGORIES = [
+    ('Software Development', 30), ('Sales', 14), ('Marketing', 12), ('Customer Support', 10),
+    ('Design', 8), ('Finance', 7), ('Data Science', 6), ('Healthcare', 6), ('Education', 5),
+    ('Operations', 5), ('Human Resources', 4), ('Legal', 2), ('Logistics', 3), ('Hospitality', 3),
+]
+LOCATIONS = [
+    ('London', 20), ('New York', 18), ('Berlin', 12), ('Remote', 15), ('San Francisco', 10),
+    ('Toronto', 7), ('Dhaka', 6), ('Sydney', 5), ('Paris', 5), ('Amsterdam', 4), ('Singapore', 4),
+    ('Austin', 3), ('Dublin', 3), ('Lisbon', 2), ('Nairobi', 2),
+]
+JOB_TYPES = [('full_time', 60), ('part_time', 12), ('contract', 12), ('internship', 6), ('remote', 10)]
+JOB_STATUSES = [('approved', 85), ('pending', 10), ('rejected', 5)]
+APPLICATION_STATUSES = [('applied', 55), ('under_review', 20), ('shortlisted', 10), ('rejected', 13), ('hired', 2)]
+SENIORITY = ['Junior', 'Mid-level', 'Senior', 'Lead', 'Principal', 'Associate', '']
+ROLES = [
+    'Python Developer', 'Frontend Engineer', 'Backend Engineer', 'Data Analyst', 'Account Executive',
+    'Product Designer', 'Marketing Manager', 'Support Specialist', 'Accountant', 'Nurse',
+    'Teacher', 'Operations Manager', 'Recruiter', 'DevOps Engineer', 'Data Scientist',
+]
+INDUSTRIES = ['Technology', 'Retail', 'Finance', 'Healthcare', 'Education', 'Manufacturing', 'Media']
+SKILLS = [
+    'Python', 'Django', 'JavaScript', 'React', 'SQL', 'Excel', 'Communication', 'Leadership',
+    'Sales', 'SEO', 'Figma', 'Accounting', 'Docker', 'AWS', 'Customer Service', 'Teaching',
+]
+WORDS = (
+    'team build growing product customers platform deliver quality ownership collaborate '
+    'impact remote flexible benefits learning data analysis design systems scale clients '
+    'support projects process improve fast paced culture mentor tools reporting strategy'
+).split()
+
+
+def weighted(rng, choices, k):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=k)
+
+
+def chunks(total, size):
+    start = 0
+    while start < total:
+        yield start, min(size, total - start)
+        start += size
+
+
+def insert(model, objects):
+    """
+    INSERT ``objects`` exactly as built, in one executemany(). bulk_create()
+    would write now() to the auto_now_add dates, and backdating them in a
+    second pass costs as much as the insert. Ids are allocated here, after
+    the table's current maximum.
+    """
+    first_id = (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    for obj_id, obj in enumerate(objects, first_id):
+        obj.id = obj_id
+    fields = model._meta.concrete_fields
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields]
+            for obj in objects
+        ])
+    return objects
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset of employers, applicants, jobs and applications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employers', type=int, default=100)
+        parser.add_argument('--applicants', type=int, default=1000)
+        parser.add_argument('--jobs', type=int, default=5000)
+        parser.add_argument('--applications', type=int, default=20000)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=180,
+                            help='Spread created dates over this many past days')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.days = options['days']
+        # Usernames/emails are unique, so every run gets its own prefix
+        self.run = f'seed{int(time.time())}'
+        self.password = make_password('password')
+        self.now = timezone.now()
+
+        started = time.monotonic()
+        employer_ids = self.seed_profiles('employer', options['employers'])
+        applicant_ids = self.seed_profiles('applicant', options['applicants'])
+        job_ids = self.seed_jobs(employer_ids, options['jobs'])
+        self.seed_applications(job_ids, applicant_ids, options['applications'])
+
+        self.stdout.write('Rebuilding derived data...')
+        search.rebuild_index()
+        counters.recount()
+        stats.rebuild_counters()
+        # Refresh planner statistics for the new table sizes
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.monotonic() - started:.1f}s'))
+
+    def random_past(self):
+        return self.now - timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def seed_profiles(self, role, total):
+        profile_ids = array('q')
+        for start, size in chunks(total, self.chunk_size):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=f'{self.run}_{role}_{start + i}',
+                        email=f'{self.run}_{role}_{start + i}@example.com',
+                        password=self.password,
+                        role=role,
+                        date_joined=self.random_past(),
+                    )
+                    for i in range(size)
+                ])
+                if role == 'employer':
+                    profiles = EmployerProfile.objects.bulk_create([
+                        EmployerProfile(
+                            user_id=user.id,
+                            company_name=f'{self.rng.choice(WORDS).title()} {self.rng.choice(WORDS).title()} {self.rng.choice(["Ltd", "Inc", "Group", "Labs"])}',
+                            industry=self.rng.choice(INDUSTRIES),
+                            address=f'{self.rng.randrange(1, 999)} {self.rng.choice(WORDS).title()} Street',
+                            description=' '.join(self.rng.choices(WORDS, k=30)),
+                        )
+                        for user in users
+                    ])
+                else:
+                    profiles = ApplicantProfile.objects.bulk_create([
+                        ApplicantProfile(
+                            user_id=user.id,
+                            full_name=f'Seeker {start + i}',
+                            phone='555-0100',
+                            skills=', '.join(self.rng.sample(SKILLS, self.rng.randint(2, 6))),
+                            education=self.rng.choice(['BSc', 'BA', 'MSc', 'Diploma', 'PhD']),
+                        )
+                        for i, user in enumerate(users)
+                    ])
+            profile_ids.extend(profile.id for profile in profiles)
+            self.stdout.write(f'{role}s: {start + size}/{total}')
+        return profile_ids
+
+    def seed_jobs(self, employer_ids, total):
+        # A few employers post most of the jobs
+        employer_weights = list(accumulate(1 / (rank + 1) for rank in range(len(employer_ids))))
+        job_ids = array('q')
+        for start, size in chunks(total, self.chunk_size):
+            employers = self.rng.choices(employer_ids, cum_weights=employer_weights, k=size)
+            categories = weighted(self.rng, CATEGORIES, size)
+            locations = weighted(self.rng, LOCATIONS, size)
+            job_types = weighted(self.rng, JOB_TYPES, size)
+            statuses = weighted(self.rng, JOB_STATUSES, size)
+            jobs = []
+            for i in range(size):
+                salary_min = round(self.rng.lognormvariate(10.8, 0.4), -3)
+                created = self.random_past()
+                jobs.append(Job(
+                    employer_id=employers[i],
+                    title=f'{self.rng.choice(SENIORITY)} {self.rng.choice(ROLES)}'.strip(),
+                    category=categories[i],
+                    location=locations[i],
+                    job_type=job_types[i],
+                    salary_min=Decimal(salary_min),
+                    salary_max=Decimal(salary_min * self.rng.uniform(1.1, 1.6)).quantize(Decimal('1')),
+                    description=' '.join(self.rng.choices(WORDS, k=self.rng.randint(40, 200))),
+                    requirements=', '.join(self.rng.sample(SKILLS, 4)),
+                    responsibilities=' '.join(self.rng.choices(WORDS, k=40)),
+                    application_deadline=(created + timedelta(days=self.rng.randint(14, 90))).date(),
+                    is_active=self.rng.random() < 0.95,
+                    status=statuses[i],
+                    created_at=created,
+                    updated_at=created,
+                ))
+            with transaction.atomic():
+                insert(Job, jobs)
+            job_ids.extend(job.id for job in jobs)
+            self.stdout.write(f'jobs: {start + size}/{total}')
+        return job_ids
+
+    def seed_applications(self, job_ids, applicant_ids, total):
+        if not (job_ids and applicant_ids):
+            return
+        # Heavy-tailed popularity: a handful of postings attract most applicants
+        job_weights = list(accumulate(self.rng.paretovariate(1.2) for _ in job_ids))
+        mean = total / len(applicant_ids)
+        applications, done = [], 0
+        for applicant_id in applicant_ids:
+            left = total - done - len(applications)
+            if left <= 0:
+                break
+            # Some applicants apply far more than others. Each one's jobs are
+            # distinct, so (job, applicant) pairs are unique without tracking them
+            count = min(round(self.rng.expovariate(1 / mean)), len(job_ids), left)
+            jobs = self.sample_jobs(job_ids, job_weights, count)
+            statuses = weighted(self.rng, APPLICATION_STATUSES, count)
+            for job_id, status in zip(jobs, statuses):
+                applied = self.random_past()
+                applications.append(Application(
+                    job_id=job_id,
+                    applicant_id=applicant_id,
+                    cv=f'application_cvs/{self.run}_{done + len(applications)}.pdf',
+                    status=status,
+                    applied_date=applied,
+                    updated_at=applied,
+                ))
+            if len(applications) >= self.chunk_size:
+                done = self.insert_applications(applications, done, total)
+                applications = []
+        if applications:
+            self.insert_applications(applications, done, total)
+
+    def sample_jobs(self, job_ids, job_weights, count):
+        """``count`` distinct jobs, popular ones more likely"""
+        picked = {}
+        while len(picked) < count:
+            picked.update(dict.fromkeys(
+                self.rng.choices(job_ids, cum_weights=job_weights, k=count - len(picked))
+            ))
+        return list(picked)
+
+    def insert_applications(self, applications, done, total):
+        with transaction.atomic():
+            insert(Application, applications)
+        done += len(applications)
+        self.stdout.write(f'applications: {done}/{total}')
+        return done
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import alerts
+
+
+class Command(BaseCommand):
+    help = 'Drain the job alert outbox, sending new-job emails in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the due entries once and exit instead of polling')
+        parser.add_argument('--batch-size', type=int, default=alerts.BATCH_SIZE,
+                            help='Recipients sent per SMTP connection')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Outbox entries claimed per pass')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            delivered, failed = alerts.drain_outbox(
+                limit=options['limit'], batch_size=options['batch_size'],
+            )
+            if delivered or failed:
+                self.stdout.write(f'Delivered {delivered} alert(s), {failed} failed')
+            if options['once']:
+                break
+            if not (delivered or failed):
+                time.sleep(options['interval'])
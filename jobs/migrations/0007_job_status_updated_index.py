@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'is_active', 'updated_at'], name='job_status_updated_idx'),
+        ),
+    ]
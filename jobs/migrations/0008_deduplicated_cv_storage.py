@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:22
+
+from django.db import migrations, models
+import jobsly.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_job_status_updated_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='cv',
+            field=models.FileField(db_index=True, storage=jobsly.storage.ContentAddressedStorage(), upload_to='application_cvs/'),
+        ),
+    ]
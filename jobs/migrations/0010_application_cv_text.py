@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+def create_cv_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE jobs_application_cv_fts USING fts5("
+            "cv_text, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE jobs_application_cv_search ("
+            "application_id bigint PRIMARY KEY REFERENCES jobs_application (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX jobs_application_cv_search_document_idx "
+            "ON jobs_application_cv_search USING GIN (document)"
+        )
+
+    from jobs.search import _index_available
+    _index_available.clear()
+
+
+def drop_cv_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS jobs_application_cv_fts")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS jobs_application_cv_search")
+
+    from jobs.search import _index_available
+    _index_available.clear()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_application_match_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='cv_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_text_source',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        # Filled by "manage.py extract_cv_text"
+        migrations.RunPython(create_cv_search_index, drop_cv_search_index),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_application_cv_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='external_ref',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(fields=('employer', 'external_ref'), name='job_employer_external_ref_uniq'),
+        ),
+    ]
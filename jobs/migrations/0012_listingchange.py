@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:59
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_row(apps, schema_editor):
+    # Delistings before now are unknown: count them as just happened, so no
+    # earlier If-Modified-Since is confirmed
+    ListingChange = apps.get_model('jobs', 'ListingChange')
+    ListingChange.objects.create(pk=1, delisted_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_job_external_ref'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delisted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_row, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.utils import timezone
 from accounts.models import User, EmployerProfile, ApplicantProfile
+from jobsly.storage import cv_storage
 
 class Job(models.Model):
     JOB_TYPE_CHOICES = (
@@ -29,14 +31,47 @@ class Job(models.Model):
     application_deadline = models.DateField()
     is_active = models.BooleanField(default=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # The employer's own id for the posting, from feed imports (jobs/imports.py)
+    external_ref = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    # Denormalised application counts, maintained by jobs/counters.py
+    applications_count = models.PositiveIntegerField(default=0)
+    applied_count = models.PositiveIntegerField(default=0)
+    under_review_count = models.PositiveIntegerField(default=0)
+    shortlisted_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    hired_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.title} - {self.employer.company_name}"
 
+    @property
+    def application_status_counts(self):
+        """(status, label, count) for each Application status, from the counters"""
+        return [
+            (status, label, getattr(self, f'{status}_count'))
+            for status, label in Application.STATUS_CHOICES
+        ]
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Public listings and the moderation queue: one status, newest first,
+            # in (created_at, id) cursor order. is_active is left out because
+            # Django filters it as a bare boolean, which SQLite can't seek on;
+            # it's true for almost every row so it's cheap to check per row.
+            models.Index(fields=['status', '-created_at', '-id'], name='job_status_recent_idx'),
+            models.Index(fields=['employer', '-created_at'], name='job_employer_recent_idx'),
+            # Covers the count/max(updated_at) behind job_list's ETag and
+            # Last-Modified, so they are computed without table lookups
+            models.Index(fields=['status', 'is_active', 'updated_at'], name='job_status_updated_idx'),
+            models.Index(fields=['-created_at'], name='job_recent_idx'),
+        ]
+        constraints = [
+            # Imports upsert on this; NULLs (jobs posted by hand) never clash
+            models.UniqueConstraint(fields=['employer', 'external_ref'], name='job_employer_external_ref_uniq'),
+        ]
 
 class Application(models.Model):
     STATUS_CHOICES = (
@@ -49,15 +84,71 @@ class Application(models.Model):
     
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applicant = models.ForeignKey(ApplicantProfile, on_delete=models.CASCADE, related_name='applications')
-    cv = models.FileField(upload_to='application_cvs/')
+    # Deduplicated; indexed for the storage's reference checks
+    cv = models.FileField(upload_to='application_cvs/', storage=cv_storage, db_index=True)
     cover_letter = models.TextField(blank=True)
+    # Text extracted from the CV (jobs/cvtext.py), and the cv name it came
+    # from: a different name means it is still to be extracted
+    cv_text = models.TextField(blank=True, editable=False)
+    cv_text_source = models.CharField(max_length=100, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='applied')
+    # How well the applicant matches the job (jobs/ranking.py). None: not
+    # scored yet, or either side changed since
+    match_score = models.FloatField(null=True, blank=True, editable=False)
     applied_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['job', 'applicant']
         ordering = ['-applied_date']
+        indexes = [
+            models.Index(fields=['applicant', '-applied_date'], name='application_applicant_idx'),
+            models.Index(fields=['job', 'status'], name='application_job_status_idx'),
+            # Ranked applicant list, and finding the unscored ones
+            models.Index(fields=['job', '-match_score'], name='application_job_score_idx'),
+            models.Index(fields=['-applied_date'], name='application_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.applicant.full_name} - {self.job.title}"
+
+class JobAlertOutbox(models.Model):
+    """A pending "new job" alert, drained by the send_job_alerts worker"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='alert_outbox')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Recipients are sent in user id order; this is the last one delivered
+    last_recipient_id = models.BigIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Alert for {self.job.title} ({self.status})"
+
+class ListingChange(models.Model):
+    """
+    When a job last left the public listing (rejected, deactivated or
+    deleted), for the listing's Last-Modified: max(updated_at) of the jobs
+    still listed can't show it. A single row, see jobs/caching.py.
+    """
+    delisted_at = models.DateTimeField()
 
     def __str__(self):
-        return f"{self.applicant.full_name} - {self.job.title}"
\ No newline at end of file
+        return f"Last delisting at {self.delisted_at}"
@@ -0,0 +1,145 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, created_at, pk):
+    raw = '%s|%s|%s' % (direction, created_at.isoformat(), pk)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise InvalidCursor(cursor)
+
+
+def row_position(row):
+    """(created_at, id) of a Job, or of a values() row that includes both"""
+    if isinstance(row, dict):
+        return row['created_at'], row['id']
+    return row.created_at, row.pk
+
+
+def approximate_count(queryset, cap=1000):
+    """
+    Count rows but stop at ``cap``, so the cost is bounded however large the
+    table is. Returns (count, exact) where exact is False once the cap is hit.
+    """
+    count = queryset.order_by()[:cap + 1].count()
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+async def aapproximate_count(queryset, cap=1000):
+    count = await queryset.order_by()[:cap + 1].acount()
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over ``(created_at, id)``, newest first.
+
+    Each page is a single indexed range scan of ``per_page + 1`` rows, so the
+    cost does not grow with how deep the page is and no COUNT(*) is needed.
+    Cursors are opaque strings handed back through ``?cursor=``. The queryset
+    may be a values() one, as long as it selects ``created_at`` and ``id``.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        """Return the page for ``cursor``. Bad or missing cursors give the first page"""
+        direction, qs = self._page_query(cursor)
+        page = self._make_page(direction, list(qs))
+        return page if page is not None else self.get_page()
+
+    async def aget_page(self, cursor=None):
+        direction, qs = self._page_query(cursor)
+        page = self._make_page(direction, [row async for row in qs])
+        return page if page is not None else await self.aget_page()
+
+    def _page_query(self, cursor):
+        """(direction, queryset of up to per_page + 1 rows) for ``cursor``"""
+        direction = None
+        if cursor:
+            try:
+                direction, created_at, pk = decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+
+        if direction == 'next':
+            qs = self.queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            ).order_by('-created_at', '-id')
+        elif direction == 'prev':
+            qs = self.queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            ).order_by('created_at', 'id')
+        else:
+            qs = self.queryset.order_by('-created_at', '-id')
+        return direction, qs[:self.per_page + 1]
+
+    def _make_page(self, direction, rows):
+        """The CursorPage for the fetched ``rows``, or None to start over from the first page"""
+        if direction == 'next':
+            has_next, has_previous = len(rows) > self.per_page, True
+            rows = rows[:self.per_page]
+        elif direction == 'prev':
+            has_next, has_previous = True, len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            if not rows:
+                # Everything before the cursor has gone; start over
+                return None
+        else:
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor('next', *row_position(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor('prev', *row_position(rows[0]))
+        return CursorPage(rows, self, next_cursor, previous_cursor)
@@ -0,0 +1,105 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from .models import Application
+from .recommendations import bucket
+from .search import tokenize
+
+# Candidate ranking for view_applicants: cosine similarity between what a
+# job asks for and what each applicant wrote, as field-weighted, log-tf,
+# hashed bag-of-words vectors (the same hashing as jobs/recommendations.py).
+#
+# Scores are stored on Application.match_score. Editing a job's text or an
+# applicant's profile clears the affected scores (jobs/signals.py); the
+# ranked view scores whatever is missing in one batch before listing, so in
+# the steady state it costs one indexed query more than the unranked view.
+
+JOB_FIELDS = (('requirements', 2.0), ('responsibilities', 1.0))
+# Lookups from Application
+APPLICANT_FIELDS = (
+    ('applicant__skills', 3.0), ('applicant__education', 1.0), ('cv_text', 1.0), ('cover_letter', 0.5),
+)
+# Applicant-side fields that clear an applicant's scores when edited. New
+# CV text clears them where it is stored (jobs/cvtext.py)
+PROFILE_FIELDS = ('skills', 'education')
+# Rows hold up to 50k characters of CV text each
+BATCH_SIZE = 500
+
+# Without idf these would dominate every free-text field
+STOP_WORDS = frozenset('''
+    a an and are as at be by for from has have in is it its of on or our that the their this to
+    was we were will with you your i my me am been can do in into not so than then there they
+'''.split())
+
+
+def term_weights(weighted_texts):
+    """{bucket: weight} for (text, field weight) pairs: log tf, L2 normalised"""
+    counts = Counter()
+    for text, weight in weighted_texts:
+        for token in tokenize(text):
+            if token not in STOP_WORDS:
+                counts[bucket(token)] += weight
+    weights = {term: 1 + math.log(count) for term, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+
+def job_terms(job):
+    return term_weights((getattr(job, field), weight) for field, weight in JOB_FIELDS)
+
+
+def score_batch(job_vector, applicant_vectors):
+    """Cosine similarity of ``job_vector`` with each of ``applicant_vectors``"""
+    if not job_vector:
+        return [0.0] * len(applicant_vectors)
+
+    job_buckets = np.fromiter(sorted(job_vector), dtype=np.int64, count=len(job_vector))
+    job_weights = np.array([job_vector[term] for term in job_buckets.tolist()], dtype=np.float64)
+    sizes = [len(vector) for vector in applicant_vectors]
+    rows = np.repeat(np.arange(len(applicant_vectors)), sizes)
+    terms = np.fromiter((term for vector in applicant_vectors for term in vector), dtype=np.int64, count=sum(sizes))
+    weights = np.fromiter((weight for vector in applicant_vectors for weight in vector.values()),
+                          dtype=np.float64, count=sum(sizes))
+    # Match every applicant term against the job's sorted terms at once
+    position = np.searchsorted(job_buckets, terms).clip(max=len(job_buckets) - 1)
+    hit = job_buckets[position] == terms
+    scores = np.zeros(len(applicant_vectors))
+    np.add.at(scores, rows[hit], weights[hit] * job_weights[position[hit]])
+    return scores.tolist()
+
+
+def refresh_scores(job):
+    """Score every application of ``job`` without a score. Returns how many were scored"""
+    lookups = [field for field, _ in APPLICANT_FIELDS]
+    missing = Application.objects.filter(job=job, match_score__isnull=True).values_list('id', *lookups).order_by()
+    job_vector = None
+    scored = 0
+    while True:
+        # Scored rows drop out of ``missing``, so this walks through them all
+        rows = list(missing[:BATCH_SIZE])
+        if not rows:
+            return scored
+        job_vector = job_vector if job_vector is not None else job_terms(job)
+        scored += _save_scores(job_vector, rows)
+
+
+def _save_scores(job_vector, rows):
+    vectors = [
+        term_weights(zip(texts, (weight for _, weight in APPLICANT_FIELDS)))
+        for _, *texts in rows
+    ]
+    scores = score_batch(job_vector, vectors)
+    Application.objects.bulk_update(
+        [Application(id=row[0], match_score=round(score, 6)) for row, score in zip(rows, scores)],
+        ['match_score'], batch_size=500,
+    )
+    return len(rows)
+
+
+def ranking_text(instance, fields):
+    """Snapshot of the ranked fields, or None if any was deferred (unknown)"""
+    if set(fields) & instance.get_deferred_fields():
+        return None
+    return tuple(getattr(instance, field) for field in fields)
@@ -0,0 +1,408 @@
+import copy
+import heapq
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Job
+from .search import tokenize
+
+
+# Job recommendations from an applicant's skills and CV.
+#
+# Jobs are hashed bag-of-words vectors (no vocabulary to store or grow) kept
+# in a column-compressed sparse matrix: for each hash bucket, the rows of the
+# jobs containing it. Scoring a query touches only the posting lists of its
+# own few terms, then picks the top k with argpartition, so it stays in the
+# milliseconds with hundreds of thousands of open jobs.
+#
+# Weighting is SMART lnc.ltc: jobs get log term frequency, cosine normalised
+# and no idf; the query gets log tf * idf. Document frequencies can then
+# change without reweighting a single job.
+#
+# The matrix lives in process memory. It is built in the background on first
+# use, then kept current by polling for jobs changed since the last poll
+# (approvals, edits, deactivations, from any process) and for jobs that are
+# no longer live at all (deleted). Expired deadlines are masked at query
+# time; rows removed or expired are dropped, and newly added ones merged into
+# the main matrix, when it is compacted. Polling and compacting happen
+# outside the lock queries take, on one thread at a time, and a compacted
+# copy is swapped in, so requests never wait for either.
+
+DIMENSIONS = 2 ** 20
+# Heaviest terms kept per job; bounds memory at ~400 bytes a job
+MAX_TERMS_PER_JOB = 48
+# Term frequency multipliers per field
+FIELD_WEIGHTS = (('title', 3.0), ('category', 2.0), ('requirements', 1.5), ('description', 1.0))
+SYNC_SECONDS = getattr(settings, 'RECOMMENDATIONS_SYNC_SECONDS', 30)
+# Re-read a little before the last poll: a transaction that commits late
+# carries an earlier updated_at
+SYNC_OVERLAP = timedelta(minutes=2)
+# Compact once this share of rows is dead, or waiting outside the main matrix
+# (those are scanned in full by every query)
+COMPACT_DEAD_RATIO = 0.1
+COMPACT_PENDING_RATIO = 0.01
+COMPACT_MIN_ROWS = 1000
+# Terms in more than this share of jobs barely move a score but have the
+# longest posting lists: queries skip them unless nothing else is left
+MAX_DF_RATIO = 0.5
+# Term frequency multipliers for the query's parts. A CV runs to hundreds of
+# terms: only the heaviest are looked up
+QUERY_WEIGHTS = (('skills', 3.0), ('cv_text', 1.0))
+MAX_QUERY_TERMS = 64
+
+_index = None
+_building = False
+_syncing = False
+_lock = threading.Lock()
+
+
+def bucket(token):
+    return zlib.crc32(token.encode()) & (DIMENSIONS - 1)
+
+
+def job_vector(title, category, requirements, description):
+    """(buckets, weights) of one job: field-weighted log tf, L2 normalised"""
+    counts = Counter()
+    for (_, weight), text in zip(FIELD_WEIGHTS, (title, category, requirements, description)):
+        for token in tokenize(text):
+            counts[bucket(token)] += weight
+    terms = heapq.nlargest(MAX_TERMS_PER_JOB, counts.items(), key=lambda term: term[1])
+    buckets = np.fromiter((b for b, _ in terms), dtype=np.int32, count=len(terms))
+    weights = 1 + np.log(np.fromiter((w for _, w in terms), dtype=np.float32, count=len(terms)))
+    norm = np.linalg.norm(weights)
+    return buckets, (weights / norm if norm else weights)
+
+
+def is_recommendable(status, is_active):
+    return status == 'approved' and is_active
+
+
+class JobVectorIndex:
+    """Sparse job x term matrix plus the bookkeeping to update it in place"""
+
+    def __init__(self):
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.deadlines = np.zeros(0, dtype=np.int32)  # date ordinals
+        self.alive = np.zeros(0, dtype=bool)
+        self.rows = 0
+        self.row_of = {}  # job id -> row
+        self.versions = {}  # job id -> updated_at the row was built from
+        # Main matrix, compressed by column (hash bucket)
+        self.indptr = np.zeros(DIMENSIONS + 1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        # Rows added since the last compaction, as coordinate lists
+        self.pending = []
+        self._pending_arrays = None
+        self.doc_freq = np.zeros(DIMENSIONS, dtype=np.int32)
+        self.dead = 0
+        self.synced_at = None
+        self.polled = 0.0
+
+    # ---- updates ----
+
+    def _grow(self, size):
+        if size <= len(self.job_ids):
+            return
+        capacity = max(size, 2 * len(self.job_ids), 1024)
+        for name in ('job_ids', 'deadlines', 'alive'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, job_id, deadline, updated_at, vector):
+        """Add or replace one job's row; ``vector`` is its job_vector()"""
+        self.remove(job_id)
+        buckets, weights = vector
+        row = self.rows
+        self._grow(row + 1)
+        self.rows += 1
+        self.job_ids[row] = job_id
+        self.deadlines[row] = deadline.toordinal()
+        self.alive[row] = True
+        self.row_of[job_id] = row
+        self.versions[job_id] = updated_at
+        self.pending.append((np.full(len(buckets), row, dtype=np.int32), buckets, weights))
+        self._pending_arrays = None
+        # Not decremented on removal; compact() recounts
+        self.doc_freq[buckets] += 1
+
+    def remove(self, job_id):
+        row = self.row_of.pop(job_id, None)
+        self.versions.pop(job_id, None)
+        if row is not None:
+            self.alive[row] = False
+            self.dead += 1
+
+    def changes(self, rows):
+        """
+        (id, deadline, updated_at, vector) for each of the (id, status,
+        is_active, deadline, updated_at, title, category, requirements,
+        description) ``rows`` that changes the index; vector None to remove
+        """
+        for job_id, status, is_active, deadline, updated_at, *texts in rows:
+            if not is_recommendable(status, is_active):
+                if job_id in self.row_of:
+                    yield job_id, None, None, None
+            elif self.versions.get(job_id) != updated_at:
+                yield job_id, deadline, updated_at, job_vector(*texts)
+
+    def apply_changes(self, changes):
+        for job_id, deadline, updated_at, vector in changes:
+            if vector is None:
+                self.remove(job_id)
+            else:
+                self.add(job_id, deadline, updated_at, vector)
+
+    def apply(self, rows, compact=True):
+        """Apply job rows, as taken by changes()"""
+        self.apply_changes(self.changes(rows))
+        if compact and self.needs_compaction():
+            self.compact()
+
+    def prune(self, live_ids):
+        """Remove the rows of jobs not in the ``live_ids`` array"""
+        rows = np.flatnonzero(self.alive[:self.rows])
+        job_ids = self.job_ids[rows]
+        for job_id in job_ids[~np.isin(job_ids, live_ids)]:
+            self.remove(int(job_id))
+
+    def needs_compaction(self):
+        return (
+            self.dead >= max(COMPACT_MIN_ROWS, COMPACT_DEAD_RATIO * self.rows)
+            or len(self.pending) >= max(COMPACT_MIN_ROWS, COMPACT_PENDING_RATIO * self.rows)
+        )
+
+    def compact(self, today=None):
+        """Merge pending rows into the main matrix, dropping dead and expired ones"""
+        today = (today or timezone.localdate()).toordinal()
+        counts = np.diff(self.indptr)
+        cols = np.repeat(np.arange(DIMENSIONS, dtype=np.int32), counts)
+        rows, data = self.indices, self.data
+        if self.pending:
+            pending_rows, pending_cols, pending_data = self._pending()
+            rows = np.concatenate([rows, pending_rows])
+            cols = np.concatenate([cols, pending_cols])
+            data = np.concatenate([data, pending_data])
+
+        # Renumber the surviving rows 0..n-1
+        alive = self.alive[:self.rows]
+        keep = alive & (self.deadlines[:self.rows] >= today)
+        new_row = np.cumsum(keep, dtype=np.int64) - 1
+        # Expired: forget them too, so an extended deadline brings them back
+        for job_id in self.job_ids[:self.rows][alive & ~keep]:
+            self.versions.pop(int(job_id), None)
+        live = keep[rows]
+        rows, cols, data = new_row[rows[live]].astype(np.int32), cols[live], data[live]
+
+        order = np.argsort(cols, kind='stable')
+        self.indices, self.data = rows[order], data[order]
+        self.doc_freq = np.bincount(cols, minlength=DIMENSIONS).astype(np.int32)
+        self.indptr = np.concatenate([[0], np.cumsum(self.doc_freq, dtype=np.int64)])
+
+        self.job_ids = self.job_ids[:self.rows][keep].copy()
+        self.deadlines = self.deadlines[:self.rows][keep].copy()
+        self.rows = len(self.job_ids)
+        self.alive = np.ones(self.rows, dtype=bool)
+        self.row_of = {int(job_id): row for row, job_id in enumerate(self.job_ids)}
+        self.pending = []
+        self._pending_arrays = None
+        self.dead = 0
+
+    def compacted(self, today=None):
+        """A compacted copy, leaving this index untouched for queries meanwhile"""
+        index = copy.copy(self)
+        # compact() replaces the arrays rather than writing to them; these it edits
+        index.versions = dict(self.versions)
+        index.compact(today)
+        return index
+
+    def _pending(self):
+        if self._pending_arrays is None:
+            self._pending_arrays = tuple(np.concatenate(parts) for parts in zip(*self.pending))
+        return self._pending_arrays
+
+    # ---- queries ----
+
+    def query_vector(self, text, cv_text=''):
+        counts = Counter()
+        for (_, weight), part in zip(QUERY_WEIGHTS, (text, cv_text)):
+            for token in tokenize(part):
+                counts[bucket(token)] += weight
+        if not counts:
+            return None, None
+        buckets = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        documents = max(self.rows - self.dead, 1)
+        doc_freq = self.doc_freq[buckets]
+        idf = np.log((documents + 1) / (doc_freq + 1)) + 1
+        weights = (tf * idf).astype(np.float32)
+        weights /= np.linalg.norm(weights)
+        useful = doc_freq <= MAX_DF_RATIO * documents
+        if useful.any():
+            buckets, weights = buckets[useful], weights[useful]
+        if len(buckets) > MAX_QUERY_TERMS:
+            heaviest = np.argpartition(weights, -MAX_QUERY_TERMS)[-MAX_QUERY_TERMS:]
+            buckets, weights = buckets[heaviest], weights[heaviest]
+        return buckets, weights
+
+    def top_k(self, text, k, exclude=(), today=None, cv_text=''):
+        """[(job id, score)] of the ``k`` best matches for ``text`` (and ``cv_text``), best first"""
+        buckets, weights = self.query_vector(text, cv_text)
+        if buckets is None or not self.rows:
+            return []
+        scores = np.zeros(self.rows, dtype=np.float32)
+        for column, weight in zip(buckets, weights):
+            start, end = self.indptr[column], self.indptr[column + 1]
+            # A job appears at most once per column, so plain fancy-index add is exact
+            scores[self.indices[start:end]] += weight * self.data[start:end]
+        if self.pending:
+            rows, cols, data = self._pending()
+            order = np.argsort(buckets)
+            sorted_buckets = buckets[order]
+            position = np.searchsorted(sorted_buckets, cols).clip(max=len(sorted_buckets) - 1)
+            hit = sorted_buckets[position] == cols
+            np.add.at(scores, rows[hit], data[hit] * weights[order][position[hit]])
+
+        excluded = [self.row_of[job_id] for job_id in exclude if job_id in self.row_of]
+        scores[excluded] = 0
+        candidates = np.flatnonzero(scores)
+        today = (today or timezone.localdate()).toordinal()
+        candidates = candidates[self.alive[candidates] & (self.deadlines[candidates] >= today)]
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(self.job_ids[row]), float(scores[row])) for row in candidates]
+
+
+VALUE_FIELDS = (
+    'id', 'status', 'is_active', 'application_deadline', 'updated_at',
+    'title', 'category', 'requirements', 'description',
+)
+
+
+def build_index():
+    """Build a fresh index from the database and start serving from it"""
+    global _index
+    index = JobVectorIndex()
+    index.synced_at = timezone.now()
+    index.polled = time.monotonic()
+    jobs = (
+        Job.objects.filter(status='approved', is_active=True, application_deadline__gte=timezone.localdate())
+        .values_list(*VALUE_FIELDS).order_by().iterator(chunk_size=2000)
+    )
+    index.apply(jobs, compact=False)
+    index.compact()
+    with _lock:
+        _index = index
+    return index
+
+
+def sync(index):
+    """
+    Apply every job change since the last poll, and drop jobs that have gone.
+    Returns the index to serve, a compacted copy if one was due.
+    """
+    started = timezone.now()
+    # Read and vectorise before taking the lock: queries only wait for the
+    # quick in-place update
+    changes = list(index.changes(
+        Job.objects.filter(updated_at__gte=index.synced_at - SYNC_OVERLAP).values_list(*VALUE_FIELDS).order_by()
+    ))
+    live_ids = np.fromiter(
+        Job.objects.filter(status='approved', is_active=True).values_list('id', flat=True).order_by()
+        .iterator(chunk_size=10000),
+        dtype=np.int64,
+    )
+    with _lock:
+        index.apply_changes(changes)
+        index.prune(live_ids)
+        index.synced_at = started
+        index.polled = time.monotonic()
+    if index.needs_compaction():
+        return _swap(index, index.compacted())
+    return index
+
+
+def _swap(old, new):
+    global _index
+    with _lock:
+        # Unless reset() meanwhile
+        if _index is old:
+            _index = new
+    return new
+
+
+def _build_in_background():
+    global _building
+    try:
+        build_index()
+    finally:
+        _building = False
+        close_old_connections()
+
+
+def get_index():
+    """
+    The current index, synced if it is due, or None while the first build is
+    running. ``RECOMMENDATIONS_BUILD_IN_BACKGROUND = False`` builds it in
+    the calling request instead.
+    """
+    global _building, _syncing
+    index = _index
+    if index is None:
+        if not getattr(settings, 'RECOMMENDATIONS_BUILD_IN_BACKGROUND', True):
+            return build_index()
+        with _lock:
+            if not _building:
+                _building = True
+                threading.Thread(target=_build_in_background, name='recommendations', daemon=True).start()
+        return None
+    if time.monotonic() - index.polled >= SYNC_SECONDS:
+        with _lock:
+            # One thread syncs; the others carry on with the index as it is
+            due = not _syncing and time.monotonic() - index.polled >= SYNC_SECONDS
+            if due:
+                _syncing = True
+        if due:
+            try:
+                index = sync(index)
+            finally:
+                _syncing = False
+    return index
+
+
+def reset():
+    global _index
+    with _lock:
+        _index = None
+
+
+def recommend_jobs(skills, k=5, exclude=(), cv_text=''):
+    """
+    Up to ``k`` open jobs best matching ``skills`` and the text of the
+    applicant's CV, best first, leaving out the job ids in ``exclude`` (e.g.
+    ones already applied to; only evaluated when there is an index to query).
+    """
+    index = get_index()
+    if index is None or not (skills or cv_text):
+        return []
+    exclude = set(exclude)
+    with _lock:
+        # A few spare in case some went stale since the last poll
+        scored = index.top_k(skills, k * 2, exclude=exclude, cv_text=cv_text)
+    if not scored:
+        return []
+    jobs = Job.objects.filter(
+        id__in=[job_id for job_id, _ in scored], status='approved', is_active=True,
+    ).select_related('employer').in_bulk()
+    return [jobs[job_id] for job_id, _ in scored if job_id in jobs][:k]
@@ -0,0 +1,276 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+# Full-text index over jobs.
+# SQLite uses an FTS5 virtual table keyed by the job id (rowid), PostgreSQL a
+# side table holding a weighted tsvector. Both are created by migration
+# 0003_job_search_index and kept in sync from jobs/signals.py.
+SQLITE_TABLE = 'jobs_job_fts'
+POSTGRES_TABLE = 'jobs_job_search'
+# Extracted CV text of applications, keyed the same way by application id
+# (migration 0010_application_cv_text, kept in sync by jobs/cvtext.py)
+CV_SQLITE_TABLE = 'jobs_application_cv_fts'
+CV_POSTGRES_TABLE = 'jobs_application_cv_search'
+
+# bm25 column weights: title, description, company_name, location, category
+SQLITE_WEIGHTS = '10.0, 1.0, 5.0, 3.0, 3.0'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_index_available = {}
+
+
+def index_table(connection):
+    if connection.vendor == 'sqlite':
+        return SQLITE_TABLE
+    if connection.vendor == 'postgresql':
+        return POSTGRES_TABLE
+    return None
+
+
+def cv_index_table(connection):
+    if connection.vendor == 'sqlite':
+        return CV_SQLITE_TABLE
+    if connection.vendor == 'postgresql':
+        return CV_POSTGRES_TABLE
+    return None
+
+
+def has_search_index(connection, table_for=index_table):
+    """Return True if the full-text index table exists on this connection"""
+    table = table_for(connection)
+    if table is None:
+        return False
+    key = (connection.alias, str(connection.settings_dict['NAME']), table)
+    if key not in _index_available:
+        with connection.cursor() as cursor:
+            _index_available[key] = table in connection.introspection.table_names(cursor)
+    return _index_available[key]
+
+
+def tokenize(query):
+    return [token.lower() for token in TOKEN_RE.findall(query or '')]
+
+
+def fallback_filter(queryset, query):
+    """The original five-way icontains search, used when no index exists"""
+    return queryset.filter(
+        Q(title__icontains=query) |
+        Q(description__icontains=query) |
+        Q(employer__company_name__icontains=query) |
+        Q(location__icontains=query) |
+        Q(category__icontains=query)
+    )
+
+
+def search_jobs(queryset, query):
+    """
+    Filter a Job queryset by a free-text query.
+
+    Every word must match (prefix matching, so "dev" finds "developer").
+    Matching rows are annotated with ``search_rank`` (higher is better) and
+    ordered by it, newest first on ties.
+    """
+    tokens = tokenize(query)
+    connection = connections[queryset.db]
+    if not tokens or not has_search_index(connection):
+        return fallback_filter(queryset, query)
+
+    if connection.vendor == 'sqlite':
+        # Quote every token so FTS5 operators typed by users are taken literally
+        match = ' '.join('"%s"*' % token for token in tokens)
+        queryset = queryset.extra(
+            select={'search_rank': '-bm25(%s, %s)' % (SQLITE_TABLE, SQLITE_WEIGHTS)},
+            tables=[SQLITE_TABLE],
+            where=[
+                '%s.rowid = jobs_job.id' % SQLITE_TABLE,
+                '%s MATCH %%s' % SQLITE_TABLE,
+            ],
+            params=[match],
+        )
+    else:
+        # Tokens are \w+ only, so they are safe inside a to_tsquery expression
+        tsquery = ' & '.join('%s:*' % token for token in tokens)
+        queryset = queryset.extra(
+            select={'search_rank': "ts_rank(%s.document, to_tsquery('simple', %%s))" % POSTGRES_TABLE},
+            select_params=[tsquery],
+            tables=[POSTGRES_TABLE],
+            where=[
+                '%s.job_id = jobs_job.id' % POSTGRES_TABLE,
+                "%s.document @@ to_tsquery('simple', %%s)" % POSTGRES_TABLE,
+            ],
+            params=[tsquery],
+        )
+    return queryset.order_by('-search_rank', '-created_at')
+
+
+# ---- index maintenance ----
+
+def _reindex(connection, where, params):
+    """Rebuild index rows for the jobs selected by ``where`` (SQL over jobs_job j)"""
+    table = index_table(connection)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                'DELETE FROM %s WHERE rowid IN (SELECT j.id FROM jobs_job j WHERE %s)' % (table, where),
+                params,
+            )
+            cursor.execute(
+                'INSERT INTO %s (rowid, title, description, company_name, location, category) '
+                'SELECT j.id, j.title, j.description, e.company_name, j.location, j.category '
+                'FROM jobs_job j INNER JOIN accounts_employerprofile e ON e.id = j.employer_id '
+                'WHERE %s' % (table, where),
+                params,
+            )
+        else:
+            cursor.execute(
+                'INSERT INTO %s (job_id, document) '
+                "SELECT j.id, "
+                "setweight(to_tsvector('simple', coalesce(j.title, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(e.company_name, '')), 'B') || "
+                "setweight(to_tsvector('simple', coalesce(j.category, '') || ' ' || coalesce(j.location, '')), 'C') || "
+                "setweight(to_tsvector('simple', coalesce(j.description, '')), 'D') "
+                'FROM jobs_job j INNER JOIN accounts_employerprofile e ON e.id = j.employer_id '
+                'WHERE %s '
+                'ON CONFLICT (job_id) DO UPDATE SET document = EXCLUDED.document' % (table, where),
+                params,
+            )
+
+
+def index_job(job, using='default'):
+    connection = connections[using]
+    if has_search_index(connection):
+        _reindex(connection, 'j.id = %s', [job.pk])
+
+
+def index_jobs(job_ids, using='default'):
+    connection = connections[using]
+    if job_ids and has_search_index(connection):
+        _reindex(connection, 'j.id IN (%s)' % ', '.join(['%s'] * len(job_ids)), list(job_ids))
+
+
+def index_employer_jobs(employer, using='default'):
+    connection = connections[using]
+    if has_search_index(connection):
+        _reindex(connection, 'j.employer_id = %s', [employer.pk])
+
+
+def remove_job(job_id, using='default'):
+    connection = connections[using]
+    if not has_search_index(connection):
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('DELETE FROM %s WHERE rowid = %%s' % SQLITE_TABLE, [job_id])
+        else:
+            cursor.execute('DELETE FROM %s WHERE job_id = %%s' % POSTGRES_TABLE, [job_id])
+
+
+def rebuild_index(using='default'):
+    """Drop and repopulate every index row. Returns False if there is no index"""
+    connection = connections[using]
+    if not has_search_index(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s' % index_table(connection))
+    _reindex(connection, '1 = 1', [])
+    return True
+
+
+# ---- CV text ----
+
+def search_applications(queryset, query):
+    """
+    Filter an Application queryset to CVs containing every word of ``query``,
+    best matches first (annotated with ``search_rank`` like search_jobs()).
+    """
+    tokens = tokenize(query)
+    connection = connections[queryset.db]
+    if not tokens or not has_search_index(connection, cv_index_table):
+        for token in tokens:
+            queryset = queryset.filter(cv_text__icontains=token)
+        return queryset
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join('"%s"*' % token for token in tokens)
+        queryset = queryset.extra(
+            select={'search_rank': '-bm25(%s)' % CV_SQLITE_TABLE},
+            tables=[CV_SQLITE_TABLE],
+            where=[
+                '%s.rowid = jobs_application.id' % CV_SQLITE_TABLE,
+                '%s MATCH %%s' % CV_SQLITE_TABLE,
+            ],
+            params=[match],
+        )
+    else:
+        tsquery = ' & '.join('%s:*' % token for token in tokens)
+        queryset = queryset.extra(
+            select={'search_rank': "ts_rank(%s.document, to_tsquery('simple', %%s))" % CV_POSTGRES_TABLE},
+            select_params=[tsquery],
+            tables=[CV_POSTGRES_TABLE],
+            where=[
+                '%s.application_id = jobs_application.id' % CV_POSTGRES_TABLE,
+                "%s.document @@ to_tsquery('simple', %%s)" % CV_POSTGRES_TABLE,
+            ],
+            params=[tsquery],
+        )
+    return queryset.order_by('-search_rank', '-applied_date')
+
+
+def _reindex_cvs(connection, where, params):
+    """Rebuild CV index rows for the applications selected by ``where`` (SQL over jobs_application a)"""
+    table = cv_index_table(connection)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                'DELETE FROM %s WHERE rowid IN (SELECT a.id FROM jobs_application a WHERE %s)' % (table, where),
+                params,
+            )
+            cursor.execute(
+                "INSERT INTO %s (rowid, cv_text) SELECT a.id, a.cv_text FROM jobs_application a "
+                "WHERE a.cv_text != '' AND %s" % (table, where),
+                params,
+            )
+        else:
+            cursor.execute(
+                'DELETE FROM %s WHERE application_id IN (SELECT a.id FROM jobs_application a WHERE %s)'
+                % (table, where),
+                params,
+            )
+            cursor.execute(
+                "INSERT INTO %s (application_id, document) "
+                "SELECT a.id, to_tsvector('simple', a.cv_text) FROM jobs_application a "
+                "WHERE a.cv_text != '' AND %s" % (table, where),
+                params,
+            )
+
+
+def index_cv(name, using='default'):
+    """Reindex every application whose CV is the stored file ``name``"""
+    connection = connections[using]
+    if has_search_index(connection, cv_index_table):
+        _reindex_cvs(connection, 'a.cv = %s', [name])
+
+
+def remove_application(application_id, using='default'):
+    connection = connections[using]
+    if not has_search_index(connection, cv_index_table):
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('DELETE FROM %s WHERE rowid = %%s' % CV_SQLITE_TABLE, [application_id])
+        else:
+            cursor.execute('DELETE FROM %s WHERE application_id = %%s' % CV_POSTGRES_TABLE, [application_id])
+
+
+def rebuild_cv_index(using='default'):
+    """Drop and repopulate every CV index row. Returns False if there is no index"""
+    connection = connections[using]
+    if not has_search_index(connection, cv_index_table):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s' % cv_index_table(connection))
+    _reindex_cvs(connection, '1 = 1', [])
+    return True
@@ -1,47 +1,199 @@
-from django.db.models.signals import post_save
+from functools import partial
+
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
-from django.core.mail import send_mass_mail
-from django.conf import settings
-from .models import Job
-from accounts.models import User
+from django_cleanup.signals import cleanup_post_delete
+from .models import Job, Application
+from . import alerts, caching, counters, cvtext, facets, ranking, search
+from accounts.models import ApplicantProfile, EmployerProfile
+from jobsly import textextract, thumbnails
+
+@receiver(post_save, sender=Job)
+def queue_job_alert_emails(sender, instance, created, raw=False, **kwargs):
+    # Only queue here; "manage.py send_job_alerts" does the actual sending
+    if created and not raw and instance.status == 'approved':
+        alerts.queue_job_alert(instance)
+
+# ==================== SEARCH INDEX SYNC ====================
 
 @receiver(post_save, sender=Job)
-def send_job_alert_emails(sender, instance, created, **kwargs):
-    if created and instance.status == 'approved':
-        # Get all active job seekers
-        job_seekers = User.objects.filter(role='applicant', is_active=True)
-        
-        subject = f"New Job Alert: {instance.title}"
-        message = f"""
-        Hello!
-
-        A new job has been posted that might interest you:
-
-        🎯 Position: {instance.title}
-        🏢 Company: {instance.employer.company_name}
-        📍 Location: {instance.location}
-        💼 Type: {instance.get_job_type_display()}
-        💰 Salary: ${instance.salary_min} - ${instance.salary_max}
-
-        View job details and apply here:
-        http://localhost:8000/jobs/{instance.id}/
-
-        Don't miss this opportunity!
-
-        Best regards,
-        Jobsly Team
-        """
-        from_email = settings.DEFAULT_FROM_EMAIL
-        
-        # Create email messages for all job seekers
-        email_messages = []
-        for user in job_seekers:
-            if user.email:
-                email_messages.append((subject, message, from_email, [user.email]))
-        
-        # Send all emails in one go (for production, use Celery for large volumes)
-        if email_messages:
-            try:
-                send_mass_mail(email_messages, fail_silently=True)
-            except Exception as e:
-                print(f"Error sending emails: {e}")
\ No newline at end of file
+def index_job(sender, instance, raw=False, using='default', **kwargs):
+    if not raw:
+        search.index_job(instance, using=using)
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance, using='default', **kwargs):
+    search.remove_job(instance.pk, using=using)
+
+@receiver(post_init, sender=EmployerProfile)
+def remember_company_name(sender, instance, **kwargs):
+    if 'company_name' not in instance.get_deferred_fields():
+        instance._indexed_company_name = instance.company_name
+
+@receiver(post_save, sender=EmployerProfile)
+def reindex_employer_jobs(sender, instance, created, raw=False, using='default', **kwargs):
+    # Company name is part of the indexed document; nothing else on the
+    # profile is, so other edits leave the employer's index rows alone
+    old_name = getattr(instance, '_indexed_company_name', None)
+    if not created and not raw and old_name != instance.company_name:
+        search.index_employer_jobs(instance, using=using)
+    instance._indexed_company_name = instance.company_name
+
+# ==================== CATEGORY FACETS ====================
+
+# The counts themselves are maintained with the other stats counters
+# (accounts/stats.py); only the cached copy needs dropping here
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_category_facets(sender, **kwargs):
+    facets.invalidate()
+
+# ==================== PAGE CACHE VERSIONS ====================
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def bump_job_cache_versions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        caching.bump(caching.LISTINGS, caching.job_version_name(instance.pk))
+
+def is_listed(job):
+    return job.status == 'approved' and job.is_active
+
+@receiver(post_init, sender=Job)
+def remember_listed(sender, instance, **kwargs):
+    if not {'status', 'is_active'} & instance.get_deferred_fields():
+        instance._listed = is_listed(instance)
+
+@receiver(post_save, sender=Job)
+def record_job_delisting(sender, instance, created, raw=False, **kwargs):
+    # Unknown (loaded without its status) counts as listed
+    if not created and not raw and getattr(instance, '_listed', True) and not is_listed(instance):
+        caching.record_delisting()
+    instance._listed = is_listed(instance)
+
+@receiver(post_delete, sender=Job)
+def record_job_deletion(sender, instance, **kwargs):
+    if getattr(instance, '_listed', True):
+        caching.record_delisting()
+
+def bump_employer_pages(employer_id):
+    job_ids = Job.objects.filter(employer_id=employer_id).values_list('id', flat=True)
+    caching.bump(caching.LISTINGS, *map(caching.job_version_name, job_ids))
+
+# Company details shown on every one of the employer's postings
+SHOWN_EMPLOYER_FIELDS = ('company_name', 'industry', 'address', 'website', 'description', 'logo')
+
+def shown_employer_details(instance):
+    return tuple(str(getattr(instance, name)) for name in SHOWN_EMPLOYER_FIELDS)
+
+@receiver(post_init, sender=EmployerProfile)
+def remember_shown_employer_details(sender, instance, **kwargs):
+    if not set(SHOWN_EMPLOYER_FIELDS) & instance.get_deferred_fields():
+        instance._shown_details = shown_employer_details(instance)
+
+@receiver(post_save, sender=EmployerProfile)
+def bump_employer_cache_versions(sender, instance, created, raw=False, **kwargs):
+    # Deleting an employer deletes its jobs, which bump their own versions
+    details = shown_employer_details(instance)
+    if not created and not raw and getattr(instance, '_shown_details', None) != details:
+        bump_employer_pages(instance.pk)
+    instance._shown_details = details
+
+# ==================== LOGO THUMBNAILS ====================
+
+@receiver(post_save, sender=EmployerProfile)
+def generate_logo_thumbnails(sender, instance, raw=False, **kwargs):
+    logo = instance.logo
+    if raw or not logo or thumbnails.has_variants(logo.storage, logo.name):
+        return
+    # Pages show a placeholder until the variants exist
+    thumbnails.schedule(logo.storage, logo.name, on_done=partial(bump_employer_pages, instance.pk))
+
+@receiver(cleanup_post_delete)
+def delete_logo_thumbnails(sender, file, file_name, field_name, success, **kwargs):
+    # django_cleanup removed a replaced or deleted logo
+    if success and sender is EmployerProfile and field_name == 'logo':
+        thumbnails.delete_variants(file.storage, file_name)
+
+# ==================== APPLICATION COUNTERS ====================
+
+# Every save moves the counters by the difference from the (job, status) the
+# application was loaded with, as accounts/stats.py does for its counters.
+# QuerySet.update() skips this; jobs/bulk.py moves the counters itself.
+
+@receiver(post_init, sender=Application)
+def remember_counted_status(sender, instance, **kwargs):
+    if instance.pk is not None and not ({'job_id', 'status'} & instance.get_deferred_fields()):
+        instance._counted = (instance.job_id, instance.status)
+
+@receiver(post_save, sender=Application)
+def update_application_counters(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        counters.application_added(instance.job_id, instance.status)
+    elif update_fields is not None and not {'job', 'job_id', 'status'} & set(update_fields):
+        return
+    elif not hasattr(instance, '_counted'):
+        # Loaded without its status, so the old one is unknown
+        counters.recount(Job.objects.filter(pk=instance.job_id))
+    elif instance._counted[0] != instance.job_id:
+        counters.application_removed(*instance._counted)
+        counters.application_added(instance.job_id, instance.status)
+    else:
+        counters.application_status_changed(instance.job_id, instance._counted[1], instance.status)
+    instance._counted = (instance.job_id, instance.status)
+
+@receiver(post_delete, sender=Application)
+def decrement_application_counters(sender, instance, **kwargs):
+    if hasattr(instance, '_counted'):
+        counters.application_removed(*instance._counted)
+    else:
+        counters.recount(Job.objects.filter(pk=instance.job_id))
+
+# ==================== CANDIDATE RANKING ====================
+
+RANKED_JOB_FIELDS = [field for field, _ in ranking.JOB_FIELDS]
+
+@receiver(post_init, sender=Job)
+def remember_job_ranking_text(sender, instance, **kwargs):
+    instance._ranking_text = ranking.ranking_text(instance, RANKED_JOB_FIELDS)
+
+@receiver(post_init, sender=ApplicantProfile)
+def remember_profile_ranking_text(sender, instance, **kwargs):
+    instance._ranking_text = ranking.ranking_text(instance, ranking.PROFILE_FIELDS)
+
+@receiver(post_save, sender=Job)
+def clear_job_match_scores(sender, instance, created, raw=False, **kwargs):
+    # Rescored by the next ranked view of its applicants
+    text = ranking.ranking_text(instance, RANKED_JOB_FIELDS)
+    if not created and not raw and (instance._ranking_text is None or instance._ranking_text != text):
+        Application.objects.filter(job=instance).update(match_score=None)
+    instance._ranking_text = text
+
+@receiver(post_save, sender=ApplicantProfile)
+def clear_applicant_match_scores(sender, instance, created, raw=False, **kwargs):
+    text = ranking.ranking_text(instance, ranking.PROFILE_FIELDS)
+    if not created and not raw and (instance._ranking_text is None or instance._ranking_text != text):
+        Application.objects.filter(applicant=instance).update(match_score=None)
+    instance._ranking_text = text
+
+# ==================== CV TEXT ====================
+
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=ApplicantProfile)
+def extract_cv_text(sender, instance, raw=False, update_fields=None, **kwargs):
+    cv = instance.cv
+    if raw or (update_fields is not None and 'cv' not in update_fields):
+        return
+    if instance.cv_text_source == (cv.name if cv else ''):
+        return
+    if not cv:
+        # Profile CV removed
+        sender.objects.filter(pk=instance.pk).update(cv_text='', cv_text_source='')
+    elif not cvtext.copy_known_text(cv.name):
+        # A CV already extracted for another row (applying with the profile
+        # CV) is copied; anything else goes to the extraction workers
+        textextract.schedule(cv.storage, cv.name, on_done=cvtext.store)
+
+@receiver(post_delete, sender=Application)
+def unindex_application_cv(sender, instance, using='default', **kwargs):
+    search.remove_application(instance.pk, using=using)
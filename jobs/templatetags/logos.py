@@ -0,0 +1,39 @@
+from django import template
+from django.utils.html import format_html
+
+from jobsly import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def company_logo(employer, size, css_class=''):
+    """
+    Square ``size`` px logo as a WebP <picture> with a JPEG fallback, using
+    the 2x variant where there is one. Renders a placeholder icon until the
+    thumbnails are generated; the original upload is never sent.
+    """
+    size = int(size)
+    if size not in thumbnails.SIZES:
+        raise template.TemplateSyntaxError(f'company_logo size must be one of {thumbnails.SIZES}')
+    logo = employer.logo
+    if not logo or not logo.storage.exists(thumbnails.variant_name(logo.name, size, 'webp')):
+        return format_html(
+            '<span class="d-inline-flex align-items-center justify-content-center bg-light rounded {}" '
+            'style="width: {}px; height: {}px;"><i class="fas fa-building text-muted"></i></span>',
+            css_class, size, size,
+        )
+
+    def srcset(extension):
+        urls = [f'{logo.storage.url(thumbnails.variant_name(logo.name, size, extension))} 1x']
+        if size * 2 in thumbnails.SIZES:
+            urls.append(f'{logo.storage.url(thumbnails.variant_name(logo.name, size * 2, extension))} 2x')
+        return ', '.join(urls)
+
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}">'
+        '<img src="{}" srcset="{}" width="{}" height="{}" alt="{}" class="rounded {}" loading="lazy"></picture>',
+        srcset('webp'),
+        logo.storage.url(thumbnails.variant_name(logo.name, size, 'jpg')), srcset('jpg'),
+        size, size, employer.company_name, css_class,
+    )
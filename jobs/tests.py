@@ -1,3 +1,1806 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+import zlib
+from importlib import import_module
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Q
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from PIL import Image
+
+from accounts import stats
+from accounts.forms import EmployerProfileForm
+from accounts.models import User, EmployerProfile, ApplicantProfile, StatCounter
+from jobsly import textextract, thumbnails
+from jobsly.routers import PRIMARY_PIN_COOKIE, replica_reads
+from jobsly.storage import cv_storage
+from jobsly.sendfile import RangeNotSatisfiable, parse_range
+from applicants.models import SavedSearch
+from .models import Job, Application, JobAlertOutbox, ListingChange
+from . import (
+    alerts, api, async_views, bulk, caching, cvtext, facets, imports, pagination, ranking, recommendations, search,
+    signals, views,
+)
+
+
+def make_employer(username='acme', company_name='Acme'):
+    user = User.objects.create_user(username, f'{username}@example.com', 'pass', role='employer')
+    return EmployerProfile.objects.create(
+        user=user, company_name=company_name, industry='Software',
+        address='1 Main St', description='We build things',
+    )
+
+
+def make_applicant(username, **kwargs):
+    user = User.objects.create_user(username, f'{username}@example.com', 'pass', role='applicant', **kwargs)
+    return ApplicantProfile.objects.create(
+        user=user, full_name=username.title(), phone='555-0100',
+        skills='Python, Django', education='BSc Computer Science',
+    )
+
+
+def make_job(employer, **kwargs):
+    fields = {
+        'title': 'Python Developer',
+        'category': 'Software Development',
+        'location': 'Berlin',
+        'job_type': 'full_time',
+        'salary_min': 50000,
+        'salary_max': 70000,
+        'description': 'Build web apps',
+        'requirements': 'Python, Django',
+        'responsibilities': 'Write code',
+        'application_deadline': datetime.date.today() + datetime.timedelta(days=30),
+        'status': 'approved',
+    }
+    fields.update(kwargs)
+    return Job.objects.create(employer=employer, **fields)
+
+
+class QueryBudgetMixin:
+    """
+    A small seeded dataset plus a table of per-URL query budgets.
+
+    Subclasses list every URL name of one urlconf in ``budgets`` as
+    ``(url name, args, user, method, budget)``. ``user`` names an attribute
+    of the test case; callables in ``args`` are called with the test case. A view that starts doing
+    N+1 queries over the seeded rows blows its budget.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = make_employer()
+        cls.employer_user = cls.employer.user
+        make_employer('globex', 'Globex')
+        cls.jobs = [
+            make_job(cls.employer, title=f'Developer {i}', category=f'Category {i % 4}')
+            for i in range(15)
+        ]
+        cls.job = cls.jobs[0]
+        cls.pending_job = make_job(cls.employer, title='Pending', status='pending')
+        cls.applicants = [make_applicant(f'seeker{i}') for i in range(6)]
+        cls.applicant = cls.applicants[0]
+        cls.applicant_user = cls.applicant.user
+        cls.applicant.cv = 'cvs/cv.pdf'
+        cls.applicant.save()
+        for applicant in cls.applicants:
+            for job in cls.jobs[:8]:
+                Application.objects.create(job=job, applicant=applicant, cv='application_cvs/cv.pdf')
+        cls.application = Application.objects.filter(job=cls.job).first()
+        cls.saved_search = SavedSearch.objects.create(applicant=cls.applicant, title='developer')
+        cls.admin = User.objects.create_user('root', 'root@example.com', 'pass', role='admin', is_staff=True)
+        cls.anonymous = None
+        # Budgets are for the steady state, not the first-request counter rebuild
+        stats.rebuild_counters()
+
+    def setUp(self):
+        cache.clear()
+
+    def resolve(self, value):
+        return value(self) if callable(value) else value
+
+    def assertQueryBudget(self, name, args, user, method, budget):
+        user = getattr(self, user)
+        if user is None:
+            self.client.logout()
+        else:
+            self.client.force_login(user)
+        url = reverse(name, args=[self.resolve(arg) for arg in args])
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url)
+            if response.streaming:
+                # Streamed responses query while they are sent
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, f'{method.upper()} {url}')
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{method.upper()} {url} ran {len(queries)} queries (budget {budget}):\n' +
+            '\n'.join(q['sql'] for q in queries.captured_queries),
+        )
+
+    def test_query_budgets(self):
+        for name, args, user, method, budget in self.budgets:
+            with self.subTest(name):
+                self.assertQueryBudget(name, args, user, method, budget)
+
+    def test_every_url_has_a_budget(self):
+        names = {pattern.name for pattern in import_module(self.urlconf).urlpatterns}
+        self.assertEqual(names, {budget[0] for budget in self.budgets})
+
+
+# File transfer handed to the front server: only the queries are measured
+@override_settings(PROTECTED_MEDIA_SERVER='x-accel-redirect')
+class JobsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    urlconf = 'jobs.urls'
+    budgets = [
+        ('home', [], 'anonymous', 'get', 2),
+        # Cold cache: two for the ETag/Last-Modified validators, two for the page
+        ('job_list', [], 'anonymous', 'get', 4),
+        ('job_detail', [lambda t: t.job.id], 'applicant_user', 'get', 5),
+        # Cold cache, as job_list: two for the validators, two for the page
+        ('api_job_list', [], 'anonymous', 'get', 4),
+        ('api_job_detail', [lambda t: t.job.id], 'anonymous', 'get', 2),
+        ('apply_job', [lambda t: t.jobs[10].id], 'applicant_user', 'get', 6),
+        ('application_success', [lambda t: t.job.id], 'applicant_user', 'get', 4),
+        ('post_job', [], 'employer_user', 'get', 3),
+        ('import_jobs', [], 'employer_user', 'get', 3),
+        ('manage_jobs', [], 'employer_user', 'get', 4),
+        ('view_applicants', [lambda t: t.job.id], 'employer_user', 'get', 5),
+        ('update_application_status', [lambda t: t.application.id, 'shortlisted'], 'employer_user', 'get', 9),
+        # Empty form: redirected back with an error
+        ('bulk_update_application_status', [lambda t: t.job.id], 'employer_user', 'post', 5),
+        ('application_cv', [lambda t: t.application.id], 'employer_user', 'get', 3),
+    ]
+
+
+class QueryPlanMixin:
+    """Assertions on SQLite's EXPLAIN QUERY PLAN for ORM querysets"""
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexed(self, queryset, index=None, sorted_by_index=True):
+        """
+        Fail if any table is read with a full scan, if ``index`` is not used,
+        or (with ``sorted_by_index``) if the rows need a separate sort step.
+        """
+        plan = self.query_plan(queryset)
+        details = '\n'.join(plan)
+        for step in plan:
+            if step.startswith('SCAN ') and ' USING ' not in step:
+                self.fail(f'Full table scan:\n{details}')
+            if sorted_by_index and 'TEMP B-TREE' in step:
+                self.fail(f'Sorts instead of reading in index order:\n{details}')
+        if index:
+            self.assertIn(index, details)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class JobQueryPlanTests(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        make_job(self.employer)
+
+    def live_jobs(self):
+        return Job.objects.filter(status='approved', is_active=True)
+
+    def test_public_listing(self):
+        self.assertIndexed(self.live_jobs().order_by('-created_at', '-id')[:11], 'job_status_recent_idx')
+        self.assertIndexed(self.live_jobs().select_related('employer').order_by('-created_at')[:8],
+                           'job_status_recent_idx')
+
+    def test_cursor_page(self):
+        job = Job.objects.get()
+        page = self.live_jobs().filter(
+            Q(created_at__lt=job.created_at) | Q(created_at=job.created_at, id__lt=job.id)
+        ).order_by('-created_at', '-id')[:11]
+        self.assertIndexed(page, 'job_status_recent_idx')
+
+    def test_employer_and_moderation_listings(self):
+        self.assertIndexed(Job.objects.filter(employer=self.employer).order_by('-created_at'),
+                           'job_employer_recent_idx')
+        self.assertIndexed(Job.objects.filter(status='pending').order_by('-created_at')[:20],
+                           'job_status_recent_idx')
+        self.assertIndexed(Job.objects.select_related('employer').order_by('-created_at')[:20],
+                           'job_recent_idx')
+
+    def test_application_lookups(self):
+        applicant = make_applicant('seeker')
+        job = Job.objects.get()
+        self.assertIndexed(Application.objects.filter(applicant=applicant).order_by('-applied_date'),
+                           'application_applicant_idx')
+        self.assertIndexed(Application.objects.filter(job=job, status='shortlisted'),
+                           'application_job_status_idx', sorted_by_index=False)
+        self.assertIndexed(Application.objects.order_by('-applied_date')[:20], 'application_recent_idx')
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def test_server_timing_only_in_debug(self):
+        make_job(make_employer())
+        stats.rebuild_counters()
+        cache.clear()
+        with override_settings(DEBUG=True):
+            response = self.client.get(reverse('home'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="2 queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertEqual(response.wsgi_request.metrics['queries'], 2)
+
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+# The benchmark's requests are for localhost
+@override_settings(ALLOWED_HOSTS=['localhost'], RECOMMENDATIONS_BUILD_IN_BACKGROUND=False)
+class SeedAndBenchmarkCommandTests(TestCase):
+    def test_seed_scale_then_benchmark(self):
+        recommendations.reset()
+        self.addCleanup(recommendations.reset)
+        call_command('seed_scale', employers=3, applicants=20, jobs=40, applications=80,
+                     chunk_size=25, days=30, seed=1, stdout=io.StringIO())
+        self.assertEqual(Job.objects.count(), 40)
+        self.assertEqual(EmployerProfile.objects.count(), 3)
+        applications = Application.objects.count()
+        self.assertTrue(0 < applications <= 80)
+
+        # Generated dates are kept, without touching the model fields
+        self.assertTrue(Job._meta.get_field('created_at').auto_now_add)
+        self.assertTrue(Application._meta.get_field('applied_date').auto_now_add)
+        month_ago = timezone.now() - datetime.timedelta(days=30)
+        self.assertGreater(Job.objects.filter(created_at__lt=timezone.now() - datetime.timedelta(days=1)).count(), 20)
+        self.assertFalse(Job.objects.filter(created_at__lt=month_ago).exists())
+        self.assertFalse(Application.objects.filter(applied_date__lt=month_ago).exists())
+        self.assertEqual(sum(Job.objects.values_list('applications_count', flat=True)), applications)
+        self.assertEqual(stats.get_counters()['applications.total'], applications)
+
+        stdout = io.StringIO()
+        call_command('benchmark', requests=2, warmup=0, stdout=stdout, stderr=io.StringIO())
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report['mode'], 'client')
+        self.assertTrue({'home', 'job_list', 'job_detail', 'applicant_dashboard'} <= report['scenarios'].keys())
+        for name, result in report['scenarios'].items():
+            self.assertEqual((name, result['requests'], result['errors']), (name, 2, 0))
+
+
+@override_settings(ROOT_URLCONF='jobsly.asgi_urls')
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.jobs = [make_job(self.employer, title=f'Developer {i}', category=f'Category {i % 2}') for i in range(12)]
+        stats.rebuild_counters()
+
+    def test_asgi_urls_serve_the_async_views(self):
+        for name, args in [('home', []), ('job_list', []), ('job_detail', [self.jobs[0].id])]:
+            with self.subTest(name):
+                match = resolve(reverse(name, args=args))
+                self.assertIs(match.func, getattr(async_views, name))
+                self.assertTrue(iscoroutinefunction(match.func))
+
+    def sync_get(self, url):
+        with override_settings(ROOT_URLCONF='jobsly.urls'):
+            return self.client.get(url)
+
+    async def test_pages_match_the_sync_views(self):
+        urls = [
+            reverse('home'), reverse('job_list'), reverse('job_list') + '?category=category+1',
+            reverse('job_list') + '?q=developer&page=2', reverse('job_detail', args=[self.jobs[0].id]),
+        ]
+        cursor = (await self.async_client.get(reverse('job_list'))).context['page_obj'].next_cursor
+        urls.append(reverse('job_list') + f'?cursor={cursor}')
+        for url in urls:
+            with self.subTest(url):
+                await cache.aclear()
+                async_response = await self.async_client.get(url)
+                await cache.aclear()
+                sync_response = await sync_to_async(self.sync_get)(url)
+                self.assertEqual(async_response.status_code, 200)
+                self.assertEqual(async_response.content, sync_response.content)
+
+    async def test_queries_and_revalidation(self):
+        url = reverse('job_list')
+        # Counted by RequestMetricsMiddleware on the thread the ORM ran on.
+        # Same as the sync view: two for the validators, two for the page,
+        # one for the facet counters (cold cache)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.asgi_request.metrics['queries'], 5)
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.asgi_request.metrics['queries'], 0)
+
+        response = await self.async_client.get(reverse('job_detail', args=[self.jobs[0].id + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_cached_results_fragment_skips_the_listing_queries(self):
+        applicant = await sync_to_async(make_applicant)('seeker')
+        await sync_to_async(self.async_client.force_login)(applicant.user)
+        first = await self.async_client.get(reverse('job_list'))
+        second = await self.async_client.get(reverse('job_list'))
+        self.assertEqual(first.content, second.content)
+        # Only the session and the user
+        self.assertEqual(second.asgi_request.metrics['queries'], 2)
+
+    async def test_only_asgi_requests_close_their_connections(self):
+        from jobsly import asgi
+
+        async def get_response_async(handler, request):
+            # The ORM opening a connection on the request's thread
+            await sync_to_async(connection_created.send)(sender=None, connection=asgi_connection)
+            return HttpResponse()
+
+        asgi_connection, wsgi_connection = mock.Mock(close_at=None), mock.Mock(close_at=None)
+        with mock.patch.object(ASGIHandler, 'get_response_async', get_response_async):
+            await asgi.application.get_response_async(mock.Mock())
+        connection_created.send(sender=None, connection=wsgi_connection)
+        self.assertLessEqual(asgi_connection.close_at, time.monotonic())
+        self.assertIsNone(wsgi_connection.close_at)
+        # WSGI requests in the same process keep their persistent connections
+        self.assertEqual(settings.DATABASES[DEFAULT_DB_ALIAS]['CONN_MAX_AGE'], 600)
+
+    async def test_has_applied(self):
+        applicant = await sync_to_async(make_applicant)('seeker')
+        await Application.objects.acreate(job=self.jobs[0], applicant=applicant, cv='cv.pdf')
+        await sync_to_async(self.async_client.force_login)(applicant.user)
+        self.assertContains(await self.async_client.get(reverse('job_detail', args=[self.jobs[0].id])), 'Already Applied')
+        self.assertContains(await self.async_client.get(reverse('job_detail', args=[self.jobs[1].id])), 'Apply Now')
+
+
+class JobSearchTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer(company_name='Initech')
+        self.title_match = make_job(self.employer, title='Python Developer', description='Build web apps')
+        self.text_match = make_job(self.employer, title='Backend Engineer', description='Some Python, mostly Go')
+        self.other = make_job(make_employer('globex', 'Globex'), title='Designer', description='Figma or Sketch')
+
+    def search(self, query):
+        return list(search.search_jobs(Job.objects.all(), query))
+
+    def test_title_matches_rank_first(self):
+        self.assertTrue(search.has_search_index(connection))
+        results = self.search('python')
+        self.assertEqual(results, [self.title_match, self.text_match])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_every_word_must_match_as_a_prefix(self):
+        self.assertEqual(self.search('pyth bui'), [self.title_match])
+        self.assertEqual(self.search('initech'), [self.title_match, self.text_match])
+        self.assertEqual(self.search('python designer'), [])
+
+    def test_quotes_and_operators_are_taken_literally(self):
+        # FTS5 syntax errors would raise OperationalError
+        for query in ['"python', 'python"', 'python OR designer', 'NOT python', 'title:python', 'NEAR(python', '*', 'python -go']:
+            self.search(query)
+        self.assertEqual(self.search('"python'), [self.title_match, self.text_match])
+        # "or" is a word to find, not an operator
+        self.assertEqual(self.search('figma OR sketch'), [self.other])
+        self.assertEqual(self.search('python OR designer'), [])
+        self.assertEqual(self.search('title:python'), [])
+
+    def test_falls_back_to_icontains_without_an_index(self):
+        with mock.patch.object(search, 'has_search_index', return_value=False):
+            results = search.search_jobs(Job.objects.order_by('id'), 'ython')
+            self.assertNotIn('search_rank', str(results.query))
+            self.assertEqual(list(results), [self.title_match, self.text_match])
+
+    def test_employer_rename_reindexes_only_on_name_change(self):
+        self.employer.company_name = 'Initrode'
+        self.employer.save()
+        self.assertEqual(self.search('initrode'), [self.title_match, self.text_match])
+        self.assertEqual(self.search('initech'), [])
+
+        # Other profile edits leave the index alone
+        employer = EmployerProfile.objects.get(pk=self.employer.pk)
+        employer.website = 'https://initrode.example.com'
+        with CaptureQueriesContext(connection) as queries:
+            employer.save()
+        self.assertFalse([q for q in queries.captured_queries if search.SQLITE_TABLE in q['sql']])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        employer = make_employer()
+        self.jobs = [make_job(employer, title=f'Job {i}') for i in range(25)]
+        # Newest first: created_at descending, then id descending
+        self.expected = sorted(self.jobs, key=lambda job: (job.created_at, job.id), reverse=True)
+        self.paginator = pagination.CursorPaginator(Job.objects.all(), 10)
+
+    def walk(self):
+        """Pages forward from the first, then back again by the previous cursors"""
+        pages = [self.paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.get_page(pages[-1].next_cursor))
+        backwards = [pages[-1]]
+        while backwards[-1].has_previous():
+            backwards.append(self.paginator.get_page(backwards[-1].previous_cursor))
+        return pages, backwards
+
+    def test_next_and_previous_links(self):
+        pages, backwards = self.walk()
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([job for page in pages for job in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+        self.assertFalse(pages[-1].has_next())
+        self.assertEqual([list(page) for page in backwards], [list(page) for page in reversed(pages)])
+
+        response = self.client.get(reverse('job_list'), {'cursor': pages[1].next_cursor, 'location': 'Berlin'})
+        self.assertTrue(response.context['cursor_paging'])
+        self.assertEqual(list(response.context['page_obj']), self.expected[20:])
+        self.assertContains(response, f'?cursor={pages[2].previous_cursor}&location=Berlin')
+        self.assertNotContains(response, '?page=')
+
+    def test_rows_tied_on_created_at_are_neither_skipped_nor_repeated(self):
+        Job.objects.update(created_at=timezone.now())
+        pages, backwards = self.walk()
+        listed = [job for page in pages for job in page]
+        self.assertEqual(listed, sorted(self.jobs, key=lambda job: job.id, reverse=True))
+        self.assertEqual([list(page) for page in backwards], [list(page) for page in reversed(pages)])
+
+    def test_malformed_or_tampered_cursors_give_the_first_page(self):
+        first = list(self.paginator.get_page())
+        for cursor in ['garbage', '!!!', pagination.encode_cursor('next', timezone.now(), 1)[:-3],
+                       base64.urlsafe_b64encode(b'sideways|2024-01-01T00:00:00|5').decode(),
+                       base64.urlsafe_b64encode(b'next|yesterday|5').decode(),
+                       base64.urlsafe_b64encode(b'next|2024-01-01T00:00:00|5|6').decode(),
+                       base64.urlsafe_b64encode(b'\xff\xfe').decode()]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(list(self.paginator.get_page(cursor)), first)
+                response = self.client.get(reverse('job_list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context['page_obj']), first)
+
+        # Paging back from after the newest row starts over
+        late = pagination.encode_cursor('prev', self.expected[0].created_at + datetime.timedelta(days=1), 0)
+        self.assertEqual(list(self.paginator.get_page(late)), first)
+
+    def test_searches_page_by_number(self):
+        response = self.client.get(reverse('job_list'), {'q': 'job'})
+        self.assertFalse(response.context['cursor_paging'])
+        self.assertContains(response, '?page=2&q=job')
+
+
+class JobAlertOutboxTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        for username in [f'seeker{i}' for i in range(5)] + ['inactive']:
+            applicant = make_applicant(username, is_active=username != 'inactive')
+            SavedSearch.objects.create(applicant=applicant, title='python')
+        SavedSearch.objects.create(applicant=make_applicant('designer'), title='designer')
+
+    def test_approved_job_is_queued_not_sent(self):
+        job = make_job(self.employer)
+        make_job(self.employer, status='pending')
+        self.assertEqual(list(JobAlertOutbox.objects.values_list('job', flat=True)), [job.id])
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_worker_sends_in_batches(self):
+        make_job(self.employer)
+        call_command('send_job_alerts', once=True, batch_size=2, stdout=mock.Mock())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox),
+                         [f'seeker{i}@example.com' for i in range(5)])
+        entry = JobAlertOutbox.objects.get()
+        self.assertEqual((entry.status, entry.sent_count), ('sent', 5))
+
+    def test_failed_batch_is_retried_from_checkpoint(self):
+        make_job(self.employer)
+        real_send = EmailBackend.send_messages
+        calls = []
+
+        def flaky_send(backend, messages):
+            calls.append(len(messages))
+            if len(calls) == 2:
+                raise OSError('connection reset')
+            return real_send(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', flaky_send):
+            self.assertEqual(alerts.drain_outbox(batch_size=2), (0, 1))
+            entry = JobAlertOutbox.objects.get()
+            self.assertEqual((entry.status, entry.attempts, entry.sent_count), ('pending', 1, 2))
+            self.assertGreater(entry.next_attempt_at, timezone.now())
+
+            # Not due yet, so nothing happens until the backoff has passed
+            self.assertEqual(alerts.drain_outbox(batch_size=2), (0, 0))
+            JobAlertOutbox.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(alerts.drain_outbox(batch_size=2), (1, 0))
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(len({m.to[0] for m in mail.outbox}), 5)
+
+    def test_entry_finished_by_another_worker_is_not_claimed_again(self):
+        make_job(self.employer)
+        real_filter = JobAlertOutbox.objects.filter
+        selects = []
+
+        def racing_filter(*args, **kwargs):
+            if selects:
+                return real_filter(*args, **kwargs)
+            # This worker selects the due entry, then another one sends it
+            selects.append(list(real_filter(*args, **kwargs).values_list('id', flat=True)))
+            JobAlertOutbox.objects.update(status='sent')
+            due = mock.MagicMock()
+            due.values_list.return_value.__getitem__.return_value = selects[0]
+            return due
+
+        with mock.patch.object(JobAlertOutbox.objects, 'filter', racing_filter):
+            self.assertEqual(list(alerts.claim_due_entries(10)), [])
+        self.assertEqual(len(selects[0]), 1)
+        self.assertEqual(JobAlertOutbox.objects.get().status, 'sent')
+        self.assertEqual(alerts.drain_outbox(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ApplicationCounterTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        self.applicant = make_applicant('seeker')
+
+    def assertCounters(self, **expected):
+        job = Job.objects.get(pk=self.job.pk)
+        actual = {'applications_count': job.applications_count}
+        actual.update((status, count) for status, _, count in job.application_status_counts)
+        self.assertEqual({k: v for k, v in actual.items() if v}, expected)
+
+    def test_counters_follow_apply_status_change_and_delete(self):
+        self.client.force_login(self.applicant.user)
+        cv = SimpleUploadedFile('cv.pdf', b'%PDF-1.4', content_type='application/pdf')
+        self.client.post(reverse('apply_job', args=[self.job.id]), {'cv': cv, 'cover_letter': 'Hi'})
+        self.assertCounters(applications_count=1, applied=1)
+
+        application = Application.objects.get()
+        self.client.force_login(self.employer.user)
+        self.client.get(reverse('update_application_status', args=[application.id, 'shortlisted']))
+        self.client.get(reverse('update_application_status', args=[application.id, 'shortlisted']))
+        self.assertCounters(applications_count=1, shortlisted=1)
+
+        Application.objects.get().delete()
+        self.assertCounters()
+
+    def test_counters_follow_any_save_and_delete(self):
+        # e.g. ApplicationAdmin's list_editable status
+        application = Application.objects.create(job=self.job, applicant=self.applicant, cv='cv.pdf')
+        application = Application.objects.get(pk=application.pk)
+        application.status = 'hired'
+        application.save()
+        self.assertCounters(applications_count=1, hired=1)
+        application.status = 'rejected'
+        application.save()
+        self.assertCounters(applications_count=1, rejected=1)
+        application.delete()
+        self.assertCounters()
+
+        # Moved to another job, loaded with the status deferred, and deleted
+        # by cascade
+        other_job = make_job(self.employer, title='Other')
+        application = Application.objects.create(job=self.job, applicant=self.applicant, cv='cv.pdf', status='hired')
+        application.job = other_job
+        application.save()
+        self.assertCounters()
+        application = Application.objects.defer('status').get(pk=application.pk)
+        application.status = 'shortlisted'
+        application.save()
+        other_job.refresh_from_db()
+        self.assertEqual((other_job.applications_count, other_job.shortlisted_count, other_job.hired_count), (1, 1, 0))
+        self.applicant.user.delete()
+        other_job.refresh_from_db()
+        self.assertEqual((other_job.applications_count, other_job.shortlisted_count), (0, 0))
+
+    def test_recount_repairs_drift(self):
+        application = Application.objects.create(job=self.job, applicant=self.applicant, cv='cv.pdf')
+        Application.objects.filter(pk=application.pk).update(status='hired')
+        self.assertCounters(applications_count=1, applied=1)
+        call_command('recount_applications', stdout=mock.Mock())
+        self.assertCounters(applications_count=1, hired=1)
+
+    def test_manage_jobs_query_count_is_flat(self):
+        for i in range(5):
+            make_job(self.employer, title=f'Job {i}')
+        self.client.force_login(self.employer.user)
+        # session, user, employer profile, jobs
+        with self.assertNumQueries(4):
+            self.client.get(reverse('manage_jobs'))
+
+
+class BulkApplicationStatusTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        self.other_job = make_job(make_employer('globex', 'Globex'))
+        for i in range(12):
+            applicant = make_applicant(f'seeker{i}')
+            Application.objects.create(job=self.job, applicant=applicant, cv='cv.pdf')
+            Application.objects.create(job=self.other_job, applicant=applicant, cv='cv.pdf')
+        stats.rebuild_counters()
+        self.url = reverse('bulk_update_application_status', args=[self.job.id])
+        self.client.force_login(self.employer.user)
+
+    def counters(self):
+        job = Job.objects.get(pk=self.job.pk)
+        return {status: count for status, _, count in job.application_status_counts if count}
+
+    def test_selected_applications_updated_in_one_statement(self):
+        ids = list(Application.objects.filter(job=self.job).values_list('id', flat=True)[:8])
+        other = Application.objects.filter(job=self.other_job).first()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {
+                'status': 'rejected', 'scope': 'selected', 'applications': ids + [other.id],
+            })
+        self.assertRedirects(response, reverse('view_applicants', args=[self.job.id]), fetch_redirect_response=False)
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "jobs_application"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.counters(), {'applied': 4, 'rejected': 8})
+        # Another employer's application is never touched
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'applied')
+
+        # Counters agree with a rebuild from scratch
+        self.assertEqual(stats.get_counters()['applications.status:rejected'], 8)
+        self.assertEqual(stats.get_counters(), stats.rebuild_counters())
+
+    def test_matching_scope_uses_the_filter(self):
+        ids = list(Application.objects.filter(job=self.job).values_list('id', flat=True)[:3])
+        self.client.post(self.url, {'status': 'shortlisted', 'scope': 'selected', 'applications': ids})
+        response = self.client.post(self.url, {'status': 'hired', 'scope': 'matching', 'filter_status': 'shortlisted'})
+        self.assertRedirects(response, reverse('view_applicants', args=[self.job.id]) + '?status=shortlisted',
+                             fetch_redirect_response=False)
+        self.assertEqual(self.counters(), {'applied': 9, 'hired': 3})
+        self.client.post(self.url, {'status': 'under_review', 'scope': 'matching'})
+        self.assertEqual(self.counters(), {'under_review': 12})
+
+    @mock.patch('jobs.bulk.CHUNK_SIZE', 5)
+    def test_large_selections_are_updated_in_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'status': 'rejected', 'scope': 'matching'})
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "jobs_application"')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(self.counters(), {'rejected': 12})
+        self.assertEqual(Application.objects.filter(job=self.other_job, status='applied').count(), 12)
+
+    def test_other_employers_and_bad_input_rejected(self):
+        self.client.force_login(self.other_job.employer.user)
+        self.assertEqual(self.client.post(self.url, {'status': 'hired', 'scope': 'matching'}).status_code, 404)
+        self.client.force_login(self.employer.user)
+        self.client.post(self.url, {'status': 'hired', 'scope': 'selected'})
+        self.client.post(self.url, {'status': 'promoted', 'scope': 'matching'})
+        self.assertEqual(self.counters(), {'applied': 12})
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+
+class CandidateRankingTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.job = make_job(self.employer, requirements='Python, Django, PostgreSQL',
+                            responsibilities='Build and operate our Django services')
+        self.url = reverse('view_applicants', args=[self.job.id])
+        self.applicants = {}
+        for username, skills in (('painter', 'Oil painting'), ('expert', 'Python, Django, PostgreSQL'),
+                                 ('junior', 'Python')):
+            applicant = make_applicant(username)
+            applicant.skills = skills
+            applicant.education = ''
+            applicant.save()
+            self.applicants[username] = applicant
+            Application.objects.create(job=self.job, applicant=applicant, cv='cv.pdf')
+        self.client.force_login(self.employer.user)
+
+    def ranked(self, **params):
+        response = self.client.get(self.url, {'sort': 'match', **params})
+        return [application.applicant.user.username for application in response.context['applications']]
+
+    def scores(self):
+        return dict(Application.objects.filter(job=self.job).values_list('applicant__user__username', 'match_score'))
+
+    def test_best_match_first(self):
+        self.assertEqual(self.ranked(), ['expert', 'junior', 'painter'])
+        scores = self.scores()
+        self.assertEqual(scores['painter'], 0)
+        self.assertGreater(scores['expert'], scores['junior'])
+        self.assertContains(self.client.get(self.url, {'sort': 'match'}), 'Best Match')
+        # The status filter still applies
+        Application.objects.filter(applicant=self.applicants['expert']).update(status='rejected')
+        self.assertEqual(self.ranked(status='applied'), ['junior', 'painter'])
+
+    def test_scores_are_stored(self):
+        self.ranked()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.ranked(), ['expert', 'junior', 'painter'])
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(ranking.refresh_scores(self.job), 0)
+
+    def test_editing_text_clears_scores(self):
+        self.ranked()
+        # Unranked fields leave the scores alone
+        self.job.title = 'Backend Developer'
+        self.job.save()
+        painter = ApplicantProfile.objects.get(pk=self.applicants['painter'].pk)
+        painter.phone = '555-0199'
+        painter.save()
+        self.assertNotIn(None, self.scores().values())
+
+        painter.skills = 'Python, Django, PostgreSQL, Oil painting'
+        painter.save()
+        self.assertEqual([user for user, score in self.scores().items() if score is None], ['painter'])
+        self.assertEqual(self.ranked(), ['expert', 'painter', 'junior'])
+
+        self.job.requirements = 'Oil painting'
+        self.job.save()
+        self.assertEqual(set(self.scores().values()), {None})
+        self.assertEqual(self.ranked()[0], 'painter')
+
+
+@override_settings(RECOMMENDATIONS_BUILD_IN_BACKGROUND=False)
+class RecommendationTests(TestCase):
+    def setUp(self):
+        recommendations.reset()
+        self.addCleanup(recommendations.reset)
+        self.employer = make_employer()
+        self.python = make_job(self.employer, title='Senior Python Developer', category='Software Development',
+                               requirements='Python, Django, PostgreSQL', description='Build our API')
+        self.frontend = make_job(self.employer, title='Frontend Engineer', category='Software Development',
+                                 requirements='JavaScript, React, CSS', description='Build our web app')
+        self.nurse = make_job(self.employer, title='Registered Nurse', category='Healthcare',
+                              requirements='Patient care', description='Ward duties')
+        make_job(self.employer, title='Python Tutor', status='pending')
+
+    def recommend(self, skills, **kwargs):
+        return [job.title for job in recommendations.recommend_jobs(skills, **kwargs)]
+
+    def test_best_matches_first(self):
+        self.assertEqual(self.recommend('Python, Django'), ['Senior Python Developer'])
+        # Title words weigh more than requirements
+        self.assertEqual(self.recommend('React, Python'), ['Senior Python Developer', 'Frontend Engineer'])
+        self.assertEqual(self.recommend('Python', exclude=[self.python.id]), [])
+        self.assertEqual(self.recommend('Underwater basket weaving'), [])
+
+    def test_cv_text(self):
+        cv_text = 'Five years of React and CSS, some Python scripting. ' + 'Filler words throughout. ' * 50
+        self.assertEqual(self.recommend('', cv_text=cv_text), ['Frontend Engineer', 'Senior Python Developer'])
+        # Skills weigh more than the CV
+        self.assertEqual(self.recommend('Python', cv_text=cv_text)[0], 'Senior Python Developer')
+        self.assertEqual(self.recommend('', cv_text=''), [])
+
+    @mock.patch('jobs.recommendations.SYNC_SECONDS', 0)
+    def test_incremental_updates(self):
+        recommendations.build_index()
+        Job.objects.filter(title='Python Tutor').update(status='approved', updated_at=timezone.now())
+        self.nurse.is_active = False
+        self.nurse.save()
+        self.assertEqual(self.recommend('Python'), ['Python Tutor', 'Senior Python Developer'])
+        self.assertEqual(self.recommend('Patient care'), [])
+
+        index = recommendations.get_index()
+        self.assertEqual((len(index.pending), index.dead), (1, 1))
+        index.compact()
+        self.assertEqual((index.rows, len(index.pending), index.dead), (3, 0, 0))
+        self.assertEqual(self.recommend('Python'), ['Python Tutor', 'Senior Python Developer'])
+
+    @mock.patch('jobs.recommendations.SYNC_SECONDS', 0)
+    def test_deleted_jobs_are_dropped(self):
+        index = recommendations.build_index()
+        self.nurse.delete()
+        self.assertEqual(self.recommend('Patient care'), [])
+        self.assertNotIn(self.nurse.id, index.row_of)
+        self.assertEqual(index.dead, 1)
+
+    @mock.patch('jobs.recommendations.SYNC_SECONDS', 0)
+    @mock.patch('jobs.recommendations.COMPACT_MIN_ROWS', 0)
+    def test_sync_reads_and_compacts_outside_the_lock(self):
+        index = recommendations.build_index()
+        locked = []
+        real_changes, real_compacted = recommendations.JobVectorIndex.changes, recommendations.JobVectorIndex.compacted
+
+        def changes(self, rows):
+            locked.append(recommendations._lock.locked())
+            yield from real_changes(self, rows)
+
+        def compacted(self, today=None):
+            locked.append(recommendations._lock.locked())
+            return real_compacted(self, today)
+
+        self.nurse.is_active = False
+        self.nurse.save()
+        with mock.patch.object(recommendations.JobVectorIndex, 'changes', changes), \
+                mock.patch.object(recommendations.JobVectorIndex, 'compacted', compacted):
+            self.assertEqual(self.recommend('Python'), ['Senior Python Developer'])
+        self.assertEqual(locked, [False, False])
+        # Swapped for a compacted copy; queries still holding the old one were unaffected
+        compacted_index = recommendations.get_index()
+        self.assertIsNot(compacted_index, index)
+        self.assertEqual((compacted_index.rows, compacted_index.dead), (2, 0))
+        self.assertEqual((index.rows, index.dead), (3, 1))
+        self.assertEqual(index.top_k('Python', 5), compacted_index.top_k('Python', 5))
+
+    def test_expired_jobs_masked(self):
+        index = recommendations.build_index()
+        tomorrow = timezone.localdate() + datetime.timedelta(days=31)
+        self.assertEqual(index.top_k('Python', 5, today=tomorrow), [])
+        index.compact(today=tomorrow)
+        self.assertEqual(index.rows, 0)
+
+    def test_dashboard_recommendations(self):
+        applicant = make_applicant('seeker')
+        Application.objects.create(job=self.python, applicant=applicant, cv='cv.pdf')
+        self.client.force_login(applicant.user)
+        response = self.client.get(reverse('applicant_dashboard'))
+        # Skills are "Python, Django"; already applied to the best match
+        self.assertEqual(list(response.context['recommended_jobs']), [])
+        applicant.skills = 'JavaScript, React'
+        applicant.save()
+        response = self.client.get(reverse('applicant_dashboard'))
+        self.assertContains(response, 'Recommended for You')
+        self.assertEqual(list(response.context['recommended_jobs']), [self.frontend])
+
+    def test_dashboard_only_redirects_for_a_missing_profile(self):
+        user = User.objects.create_user('newcomer', 'newcomer@example.com', 'pass', role='applicant')
+        self.client.force_login(user)
+        self.assertRedirects(self.client.get(reverse('applicant_dashboard')), reverse('complete_applicant_profile'),
+                             fetch_redirect_response=False)
+        self.client.force_login(make_applicant('seeker').user)
+        with mock.patch('applicants.views.recommend_jobs', side_effect=RuntimeError('bug')):
+            with self.assertRaises(RuntimeError):
+                self.client.get(reverse('applicant_dashboard'))
+
+
+class JobImportTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.client.force_login(self.employer.user)
+        self.deadline = (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
+
+    def row(self, ref, **fields):
+        row = {
+            'external_ref': ref, 'title': f'Engineer {ref}', 'category': 'Software Development',
+            'location': 'Berlin', 'job_type': 'full_time', 'salary_min': '50000', 'salary_max': '70000',
+            'description': 'Build web apps', 'requirements': 'Python, Django', 'responsibilities': 'Write code',
+            'application_deadline': self.deadline,
+        }
+        row.update(fields)
+        return row
+
+    def csv_feed(self, rows):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(self.row('x')))
+        writer.writeheader()
+        writer.writerows(rows)
+        return output.getvalue().encode()
+
+    def upload(self, content, filename, **data):
+        feed = SimpleUploadedFile(filename, content)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('import_jobs'), {'feed': feed, **data})
+        self.assertEqual(response.status_code, 200)
+        return response.context['report']
+
+    def test_csv_rows_validated_like_the_job_form(self):
+        stats.rebuild_counters()
+        report = self.upload(self.csv_feed([
+            self.row('A1'),
+            self.row('A2', application_deadline='2001-01-01'),
+            self.row('A3', salary_min='90000'),
+            self.row(''),
+            self.row('A1', title='Again'),
+            self.row('A4', job_type='gig'),
+            self.row('A5'),
+        ]), 'feed.csv')
+        self.assertEqual((report.created, report.updated, report.failed), (2, 0, 5))
+        self.assertEqual([(row, ref) for row, ref, _ in report.errors],
+                         [(3, 'A2'), (4, 'A3'), (5, ''), (6, 'A1'), (7, 'A4')])
+        self.assertEqual(report.errors[0][2], 'application_deadline: Application deadline cannot be in the past.')
+        self.assertEqual(report.errors[1][2], 'Minimum salary cannot be greater than maximum salary.')
+        self.assertIn('job_type: Select a valid choice.', report.errors[4][2])
+
+        jobs = Job.objects.filter(employer=self.employer)
+        self.assertEqual(sorted(jobs.values_list('external_ref', 'status')), [('A1', 'pending'), ('A5', 'pending')])
+        # Side effects of save() that bulk_create() skips
+        self.assertEqual(stats.get_counters(), stats.rebuild_counters())
+        self.assertEqual(list(search.search_jobs(Job.objects.all(), 'A5')), [jobs.get(external_ref='A5')])
+
+    def test_rows_get_model_validation(self):
+        def clean(job):
+            if job.location == 'Atlantis':
+                raise ValidationError('No such place.')
+
+        with mock.patch.object(Job, 'clean', clean):
+            report = self.upload(self.csv_feed([self.row('M1', location='Atlantis'), self.row('M2')]), 'feed.csv')
+        self.assertEqual((report.created, report.failed), (1, 1))
+        self.assertEqual(report.errors, [(2, 'M1', 'No such place.')])
+
+    def test_reimport_upserts_on_reference(self):
+        self.upload(self.csv_feed([self.row('B1'), self.row('B2'), self.row('B3')]), 'feed.csv')
+        Job.objects.filter(employer=self.employer).update(status='approved')
+        applicant = make_applicant('seeker')
+        application = Application.objects.create(job=Job.objects.get(external_ref='B3'), applicant=applicant,
+                                                 cv='cv.pdf', match_score=0.5)
+        later = (datetime.date.today() + datetime.timedelta(days=60)).isoformat()
+        feed = '\n'.join(json.dumps(row) for row in [
+            self.row('B1'),
+            self.row('B2', application_deadline=later, salary_max=75000),
+            self.row('B3', requirements='Go, Kubernetes'),
+        ]).encode()
+        report = self.upload(feed, 'feed.txt', format='jsonl')
+        self.assertEqual((report.created, report.updated, report.unchanged, report.failed), (0, 2, 1, 0))
+        jobs = {job.external_ref: job for job in Job.objects.filter(employer=self.employer)}
+        self.assertEqual(len(jobs), 3)
+        # A new deadline keeps the job live; new text goes back to moderation
+        self.assertEqual((jobs['B2'].status, str(jobs['B2'].application_deadline)), ('approved', later))
+        self.assertEqual(jobs['B3'].status, 'pending')
+        application.refresh_from_db()
+        self.assertIsNone(application.match_score)
+        # Another employer's references are their own
+        self.assertEqual(imports.import_jobs(make_employer('globex', 'Globex'), io.BytesIO(feed), 'jsonl').created, 3)
+
+    def test_queries_per_chunk_not_per_row(self):
+        counts = []
+        # The first import also creates counter rows
+        for prefix, size in (('W', 1), ('S', 3), ('L', 40)):
+            feed = io.BytesIO(self.csv_feed([self.row(f'{prefix}{i}') for i in range(size)]))
+            with CaptureQueriesContext(connection) as queries:
+                imports.import_jobs(self.employer, feed, 'csv')
+            counts.append(len(queries))
+        self.assertEqual(counts[1], counts[2])
+
+    def test_xml_command_with_report(self):
+        feed = (
+            '<jobs>' + ''.join(
+                '<job>' + ''.join(f'<{name}>{value}</{name}>' for name, value in row.items()) + '</job>'
+                for row in [self.row('X1'), self.row('X2', salary_min='abc')]
+            ) + '<job external_ref="X3"><title>Broken'
+        ).encode()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'feed.xml')
+            report_path = os.path.join(directory, 'errors.csv')
+            with open(path, 'wb') as file:
+                file.write(feed)
+            out = io.StringIO()
+            call_command('import_jobs', path, employer='acme', report=report_path, stdout=out)
+            self.assertIn('3 row(s): 1 created, 0 updated, 0 unchanged, 2 rejected.', out.getvalue())
+            with open(report_path, newline='') as file:
+                errors = list(csv.reader(file))
+        self.assertEqual(errors[0], ['row', 'external_ref', 'problem'])
+        self.assertEqual(errors[1][:2], ['2', 'X2'])
+        self.assertIn('Invalid XML', errors[2][2])
+
+    def test_employers_only(self):
+        self.client.force_login(make_applicant('seeker').user)
+        self.assertRedirects(self.client.get(reverse('import_jobs')), reverse('home'), fetch_redirect_response=False)
+
+
+def make_docx(*paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+    return buffer.getvalue()
+
+
+def make_pdf(content):
+    """A one-page PDF drawing ``content`` (content stream operators) with Helvetica as /F1"""
+    stream = zlib.compress(content)
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+PDF_CV = make_pdf(b'BT /F1 12 Tf 72 720 Td (Senior \\(Python\\) developer) Tj 0 -14 Td (Django PostgreSQL) Tj ET')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CV_TEXT_WORKERS=0)
+class CVTextTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.job = make_job(self.employer, requirements='Kubernetes, Terraform')
+        self.applicant = make_applicant('seeker')
+
+    def upload(self, instance, content, filename):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.cv = SimpleUploadedFile(filename, content)
+            instance.save()
+        instance.refresh_from_db()
+        return instance
+
+    def test_extract_text(self):
+        self.assertEqual(textextract.extract_text(PDF_CV, 'cv.pdf'), 'Senior (Python) developer Django PostgreSQL')
+        self.assertEqual(textextract.extract_text(make_docx('Jane Doe', 'Go &amp; Rust'), 'cv.docx'),
+                         'Jane Doe Go & Rust')
+        for data, name in ((b'plain', 'cv.txt'), (b'not a zip', 'cv.docx'), (b'<html>', 'cv.pdf')):
+            with self.assertRaises(textextract.ExtractionError):
+                textextract.extract_text(data, name)
+
+    def test_time_limit(self):
+        def slow(data):
+            time.sleep(5)
+
+        with mock.patch.dict(textextract.EXTRACTORS, {'.pdf': slow}):
+            started = time.monotonic()
+            self.assertEqual(textextract.extract_limited(PDF_CV, 'cv.pdf', seconds=1),
+                             (None, 'Took longer than 1 seconds.'))
+        self.assertLess(time.monotonic() - started, 3)
+
+    def test_uploads_are_extracted_and_searchable(self):
+        profile = self.upload(self.applicant, make_docx('Kubernetes and Terraform in production'), 'cv.docx')
+        self.assertEqual(profile.cv_text, 'Kubernetes and Terraform in production')
+        # Applying with the profile CV reuses its text
+        with mock.patch('jobsly.textextract.schedule') as schedule:
+            application = Application.objects.create(job=self.job, applicant=profile, cv=profile.cv.name)
+        schedule.assert_not_called()
+        application.refresh_from_db()
+        self.assertEqual(application.cv_text, profile.cv_text)
+
+        other = make_applicant('painter')
+        other_application = self.upload(
+            Application(job=self.job, applicant=other), make_docx('Oil painting'), 'painting.docx',
+        )
+        self.assertEqual(other_application.cv_text, 'Oil painting')
+
+        self.client.force_login(self.employer.user)
+        url = reverse('view_applicants', args=[self.job.id])
+        response = self.client.get(url, {'q': 'terra'})
+        self.assertEqual(list(response.context['applications']), [application])
+        self.assertFalse(self.client.get(url, {'q': 'python'}).context['applications'])
+        # Skills are the same; the CV decides the ranking
+        response = self.client.get(url, {'sort': 'match'})
+        self.assertEqual(list(response.context['applications']), [application, other_application])
+
+        other_application.delete()
+        self.assertEqual(list(self.client.get(url, {'q': 'painting'}).context['applications']), [])
+
+    def test_backfill_command_resumes(self):
+        names = []
+        for i, content in enumerate([make_docx('First cv'), PDF_CV, make_docx('Third cv')]):
+            name = cv_storage.save('cv.pdf' if content is PDF_CV else 'cv.docx', io.BytesIO(content))
+            names.append(name)
+            # Rows saved without running on_commit: nothing extracted yet
+            Application.objects.create(job=make_job(self.employer), applicant=self.applicant, cv=name)
+        Application.objects.create(job=self.job, applicant=self.applicant, cv='blobs/missing.pdf')
+        # An earlier run got as far as the first file
+        cvtext.store(names[0], 'First cv')
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command('extract_cv_text', workers=2, stdout=out, stderr=err)
+        self.assertIn('3 CV file(s) to extract.', out.getvalue())
+        self.assertIn('Extracted 2 CV file(s). 1 failed.', out.getvalue())
+        self.assertIn('blobs/missing.pdf: File is missing.', err.getvalue())
+        texts = dict(Application.objects.values_list('cv', 'cv_text'))
+        self.assertEqual(texts[names[1]], 'Senior (Python) developer Django PostgreSQL')
+        self.assertEqual(texts[names[2]], 'Third cv')
+
+        out = io.StringIO()
+        call_command('extract_cv_text', workers=1, stdout=out, stderr=io.StringIO())
+        self.assertIn('0 CV file(s) to extract.', out.getvalue())
+        call_command('extract_cv_text', retry_failed=True, workers=1, stdout=out, stderr=io.StringIO())
+        self.assertIn('1 CV file(s) to extract.', out.getvalue())
+
+
+class CategoryFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.design = make_job(self.employer, category='Design')
+        make_job(self.employer, category='Design')
+        make_job(self.employer, category='Sales')
+        make_job(self.employer, category='Legal', status='pending')
+        stats.rebuild_counters()
+
+    def assertFacets(self, expected):
+        cache.clear()
+        self.assertEqual(facets.category_facets(), expected)
+
+    def test_counts_follow_moderation_and_deletes(self):
+        self.assertFacets([('Design', 2), ('Sales', 1)])
+
+        legal = Job.objects.get(category='Legal')
+        legal.status = 'approved'
+        legal.save()
+        self.assertFacets([('Design', 2), ('Legal', 1), ('Sales', 1)])
+
+        self.design.is_active = False
+        self.design.save()
+        Job.objects.get(category='Sales').delete()
+        legal.status = 'rejected'
+        legal.save()
+        self.assertFacets([('Design', 1)])
+        # Emptied categories don't linger as zero rows
+        self.assertEqual(stats.get_counters(), stats.rebuild_counters())
+
+        self.design.is_active = True
+        self.design.category = 'Product Design'
+        self.design.save()
+        self.assertFacets([('Design', 1), ('Product Design', 1)])
+
+    def test_served_without_reading_jobs(self):
+        with CaptureQueriesContext(connection) as queries:
+            facets.category_facets()
+        self.assertFalse([q for q in queries.captured_queries if 'jobs_job' in q['sql']])
+        with self.assertNumQueries(0):
+            facets.category_facets()
+
+    def test_cache_dropped_on_commit(self):
+        facets.category_facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.employer, category='Sales')
+        with self.assertNumQueries(1):
+            self.assertEqual(facets.category_facets(), [('Design', 2), ('Sales', 2)])
+
+    def test_listing_sidebar_counts(self):
+        response = self.client.get(reverse('job_list'))
+        self.assertEqual(response.context['categories'], [('Design', 2), ('Sales', 1)])
+        self.assertContains(response, '?category=Design')
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.job = make_job(self.employer, title='Backend Developer')
+        stats.rebuild_counters()
+
+    def test_anonymous_pages_are_cached_until_jobs_change(self):
+        for url in [reverse('home'), reverse('job_list'), reverse('job_detail', args=[self.job.id])]:
+            with self.subTest(url):
+                first = self.client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+                self.assertEqual(first.content, second.content)
+                self.assertIn('Cookie', second['Vary'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.employer, title='Frontend Developer')
+        self.assertContains(self.client.get(reverse('home')), 'Frontend Developer')
+        self.assertContains(self.client.get(reverse('job_list')), 'Frontend Developer')
+        # Other postings keep their cached detail pages
+        with self.assertNumQueries(0):
+            self.client.get(reverse('job_detail', args=[self.job.id]))
+
+    def test_edits_show_immediately(self):
+        detail = reverse('job_detail', args=[self.job.id])
+        self.client.get(detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.salary_max = 99000
+            self.job.save()
+        self.assertContains(self.client.get(detail), '99000')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employer.company_name = 'Acme Renamed'
+            self.employer.save()
+        self.assertContains(self.client.get(detail), 'Acme Renamed')
+        self.assertContains(self.client.get(reverse('job_list')), 'Acme Renamed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.status = 'rejected'
+            self.job.save()
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+    def test_only_shown_employer_details_bump_versions(self):
+        names = [caching.LISTINGS, caching.job_version_name(self.job.id)]
+        before = caching.versions(*names)
+        with self.captureOnCommitCallbacks(execute=True):
+            EmployerProfile.objects.get(pk=self.employer.pk).save()
+        self.assertEqual(caching.versions(*names), before)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employer.industry = 'Robotics'
+            self.employer.save()
+        after = caching.versions(*names)
+        self.assertTrue(all(new != old for new, old in zip(after, before)))
+
+    def test_cached_results_fragment_skips_the_listing_queries(self):
+        self.client.force_login(make_applicant('seeker').user)
+        url = reverse('job_list') + '?q=developer'
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertContains(second, 'Backend Developer')
+        self.assertFalse([q['sql'] for q in queries if 'jobs_job' in q['sql']])
+
+    def test_has_applied_stays_per_user(self):
+        detail = reverse('job_detail', args=[self.job.id])
+        applied, other = make_applicant('applied'), make_applicant('other')
+        Application.objects.create(job=self.job, applicant=applied, cv='cv.pdf')
+        self.assertContains(self.client.get(detail), 'Login to Apply')
+
+        self.client.force_login(applied.user)
+        self.assertContains(self.client.get(detail), 'Already Applied')
+        self.client.force_login(other.user)
+        response = self.client.get(detail)
+        self.assertContains(response, 'Apply Now')
+        self.assertContains(response, 'Backend Developer')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.job = make_job(self.employer, title='Backend Developer')
+        self.other = make_job(self.employer, title='Frontend Developer')
+
+    def assertNotModified(self, url, **headers):
+        with self.assertNumQueries(0):
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_listing_revalidation(self):
+        for url in [reverse('job_list'), reverse('job_list') + '?q=developer&location=berlin']:
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                etag, last_modified = response['ETag'], response['Last-Modified']
+                self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertNotModified(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+                # Leaving the listing doesn't move max(updated_at) of what's left
+                with self.captureOnCommitCallbacks(execute=True):
+                    Job.objects.filter(pk=self.other.pk).update(is_active=False)
+                    caching.bump(caching.LISTINGS)
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                self.other.is_active = True
+                self.other.save()
+
+    def test_delisting_moves_last_modified(self):
+        url = reverse('job_list')
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertNotModified(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # The most recently updated live job leaves the listing
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.is_active = False
+            self.other.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Frontend Developer')
+        self.assertGreater(parse_http_date(response['Last-Modified']), parse_http_date(last_modified))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Backend Developer')
+
+    def test_last_modified_is_the_same_in_every_process(self):
+        url = reverse('job_list')
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.moderate_jobs(Job.objects.filter(pk=self.other.pk), 'rejected')
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(parse_http_date(last_modified), ListingChange.objects.get().delisted_at.timestamp())
+        # Another process, or a restart: nothing cached
+        cache.clear()
+        self.assertEqual(self.client.get(url)['Last-Modified'], last_modified)
+
+    def test_etag_follows_the_cache_versions(self):
+        # e.g. a logo's thumbnails becoming ready: no updated_at moves
+        for url in [reverse('job_list'), reverse('job_detail', args=[self.job.id])]:
+            with self.subTest(url):
+                etag = self.client.get(url)['ETag']
+                with self.captureOnCommitCallbacks(execute=True):
+                    signals.bump_employer_pages(self.employer.pk)
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_revalidation(self):
+        url = reverse('job_detail', args=[self.job.id])
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employer.description = 'Now hiring'
+            self.employer.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Now hiring')
+
+    def test_signed_in_users_always_get_a_body(self):
+        url = reverse('job_detail', args=[self.job.id])
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(make_applicant('seeker').user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_missing_job_still_404s(self):
+        url = reverse('job_detail', args=[self.job.id + 100])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"x"').status_code, 404)
+
+    def test_malformed_parameters_are_never_not_modified(self):
+        for url, status in [
+            (reverse('api_job_list') + '?page_size=0', 400),
+            (reverse('api_job_list') + '?salary_min=lots', 400),
+            (reverse('api_job_detail', args=[self.job.id]) + '?fields=secret', 400),
+            (reverse('job_list') + '?cursor=garbage', 200),
+        ]:
+            with self.subTest(url):
+                # "*" matches any ETag the page has
+                response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+                self.assertEqual(response.status_code, status)
+                self.assertFalse(response.has_header('ETag'))
+
+        for query in ['?cursor=garbage', '?salary_min=lots']:
+            with self.subTest(query), self.assertNumQueries(0):
+                self.assertIsNone(views.job_list_validators(RequestFactory().get(reverse('job_list') + query)))
+
+
+class JobApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.jobs = [make_job(self.employer, title=f'Developer {i}', salary_min=1000 * i) for i in range(7)]
+        make_job(self.employer, title='Pending Developer', status='pending')
+
+    def get(self, url, status=200, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_cursor_pages_cover_the_listing(self):
+        url = reverse('api_job_list') + '?page_size=3'
+        titles = []
+        while url:
+            data = self.get(url).json()
+            titles += [job['title'] for job in data['results']]
+            url = data['next']
+        self.assertEqual(titles, [f'Developer {i}' for i in reversed(range(7))])
+        self.assertEqual(data['count'], 7)
+        self.assertTrue(data['previous'])
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(reverse('api_job_list') + '?fields=id,company,salary_min').json()
+        self.assertEqual(data['results'][0], {'id': self.jobs[-1].id, 'company': 'Acme', 'salary_min': '6000.00'})
+        page_sql = next(query['sql'] for query in queries if 'company_name' in query['sql'])
+        self.assertNotIn('"description"', page_sql)
+        self.assertNotIn('"title"', page_sql)
+
+        data = self.get(reverse('api_job_detail', args=[self.jobs[0].id]) + '?fields=title,requirements').json()
+        self.assertEqual(data, {'title': 'Developer 0', 'requirements': 'Python, Django'})
+        self.assertEqual(set(self.get(reverse('api_job_detail', args=[self.jobs[0].id])).json()), set(api.FIELDS))
+
+    def test_filters_and_search(self):
+        data = self.get(reverse('api_job_list') + '?salary_min=5000&fields=title').json()
+        self.assertEqual(data['results'], [{'title': 'Developer 6'}, {'title': 'Developer 5'}])
+
+        data = self.get(reverse('api_job_list') + '?q=developer&page_size=5&fields=id').json()
+        self.assertEqual((data['count'], len(data['results'])), (7, 5))
+        self.assertIn('page=2', data['next'])
+        self.assertEqual(len(self.get(data['next']).json()['results']), 2)
+
+    def test_bad_requests(self):
+        for query in ['fields=id,password', 'page_size=1000', 'page_size=x', 'salary_min=lots']:
+            with self.subTest(query):
+                self.assertIn('error', self.get(reverse('api_job_list') + '?' + query, status=400).json())
+        pending = Job.objects.get(status='pending')
+        self.assertEqual(self.get(reverse('api_job_detail', args=[pending.id]), status=404).json(),
+                         {'error': 'Not found.'})
+
+    def test_revalidation(self):
+        for url in [reverse('api_job_list') + '?fields=id', reverse('api_job_detail', args=[self.jobs[0].id])]:
+            with self.subTest(url):
+                etag = self.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    self.get(url, status=304, HTTP_IF_NONE_MATCH=etag)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.jobs[0].title = 'Renamed'
+                    self.jobs[0].save()
+                self.assertNotEqual(self.get(url, HTTP_IF_NONE_MATCH=etag)['ETag'], etag)
+
+
+def add_sqlite_database(alias, name, **options):
+    """Register a jobsly.sqlite database file as ``alias`` for the rest of the process"""
+    connections.settings[alias] = connections.configure_settings({
+        DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+        alias: {'ENGINE': 'jobsly.sqlite', 'NAME': name, 'OPTIONS': options},
+    })[alias]
+    return connections[alias]
+
+
+def remove_database(alias):
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+
+    def database(self, alias, **options):
+        self.addCleanup(remove_database, alias)
+        return add_sqlite_database(alias, self.path, **options)
+
+    def pragma(self, database, name):
+        with database.cursor() as cursor:
+            return cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_pragmas(self):
+        database = self.database('tuned')
+        self.assertEqual(self.pragma(database, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(database, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(database, 'synchronous'), 1)
+        self.assertEqual(self.pragma(database, 'mmap_size'), 256 * 1024 * 1024)
+
+        replica = self.database('read_only', pragmas={'query_only': 'ON', 'synchronous': 'FULL'})
+        self.assertEqual(self.pragma(replica, 'synchronous'), 2)
+        with self.assertRaises(OperationalError), replica.cursor() as cursor:
+            cursor.execute('CREATE TABLE t (x)')
+
+    def test_immediate_transactions(self):
+        writer = self.database('writer', transaction_mode='immediate')
+        other = self.database('other', transaction_mode='IMMEDIATE', pragmas={'busy_timeout': 50})
+        with writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE t (x)')
+        with transaction.atomic(using='writer'):
+            # The write lock is taken at BEGIN, before anything is written...
+            with self.assertRaisesMessage(OperationalError, 'database is locked'):
+                with transaction.atomic(using='other'):
+                    pass
+            # ...and with WAL readers still go ahead
+            with other.cursor() as cursor:
+                self.assertEqual(cursor.execute('SELECT COUNT(*) FROM t').fetchone()[0], 0)
+
+        with self.assertRaises(ImproperlyConfigured):
+            with transaction.atomic(using=self.database('bad', transaction_mode='later').alias):
+                pass
+
+
+class ReadReplicaTests(TransactionTestCase):
+    """A second local database as the replica, synced by copying the primary"""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.replica_path = os.path.join(directory, 'replica.sqlite3')
+        self.addCleanup(remove_database, 'replica')
+        add_sqlite_database('replica', self.replica_path, pragmas={'query_only': 'ON'})
+
+        self.employer = make_employer()
+        self.applicant = make_applicant('seeker')
+        self.job = make_job(self.employer, title='Replicated Developer')
+        stats.rebuild_counters()
+        self.replicate()
+        # Not on the replica yet
+        self.new_job = make_job(self.employer, title='Newest Developer')
+
+    def replicate(self):
+        connections['replica'].close()
+        primary = connections['default']
+        primary.ensure_connection()
+        target = sqlite3.connect(self.replica_path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+    def test_routing(self):
+        self.assertEqual(Job.objects.all().db, 'default')
+        with replica_reads():
+            self.assertEqual(Job.objects.all().db, 'replica')
+            self.assertEqual(Session.objects.all().db, 'default')
+            job = Job.objects.get(pk=self.job.pk)
+            job.title = 'Edited'
+            job.save()
+        self.assertEqual(Job.objects.using('default').get(pk=self.job.pk).title, 'Edited')
+        self.assertEqual(Job.objects.using('replica').get(pk=self.job.pk).title, 'Replicated Developer')
+
+    def test_read_only_views_read_the_replica(self):
+        for url in [reverse('job_list'), reverse('api_job_list'), reverse('home')]:
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Replicated Developer')
+                self.assertNotContains(response, 'Newest Developer')
+        self.assertEqual(self.client.get(reverse('job_detail', args=[self.new_job.id])).status_code, 404)
+
+        self.replicate()
+        cache.clear()
+        self.assertContains(self.client.get(reverse('job_list')), 'Newest Developer')
+
+    def test_admin_dashboard_reads_replica_counters(self):
+        admin = User.objects.create_user('root', 'root@example.com', 'pass', role='admin', is_staff=True)
+        self.client.force_login(admin)
+        self.replicate()
+        make_job(self.employer, title='Unreplicated Developer')
+        self.assertEqual(self.client.get(reverse('admin_dashboard')).context['total_jobs'], 2)
+
+        # Missing on the read-only replica: rebuilt on the primary
+        StatCounter.objects.all().delete()
+        self.replicate()
+        self.assertEqual(self.client.get(reverse('admin_dashboard')).context['total_jobs'], 3)
+        self.assertEqual(StatCounter.objects.using('default').get(name='jobs.total').value, 3)
+
+    def test_clients_read_their_writes(self):
+        self.client.force_login(self.applicant.user)
+        self.assertNotContains(self.client.get(reverse('job_list')), 'Newest Developer')
+
+        response = self.client.post(reverse('saved_searches'), {'title': 'python'})
+        self.assertEqual(SavedSearch.objects.using('default').count(), 1)
+        self.assertEqual(SavedSearch.objects.using('replica').count(), 0)
+        self.assertEqual(response.cookies[PRIMARY_PIN_COOKIE]['max-age'], settings.REPLICA_LAG_SECONDS)
+        self.assertContains(self.client.get(reverse('job_list')), 'Newest Developer')
+
+    @override_settings(ROOT_URLCONF='jobsly.asgi_urls')
+    async def test_async_views(self):
+        response = await self.async_client.get(reverse('job_list'))
+        self.assertContains(response, 'Replicated Developer')
+        self.assertNotContains(response, 'Newest Developer')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class DeduplicatedStorageTests(TestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.jobs = [make_job(self.employer, title=f'Job {i}') for i in range(3)]
+        self.applicant = make_applicant('seeker')
+        self.client.force_login(self.applicant.user)
+
+    def apply(self, job, content=b'%PDF-1.4 my cv', filename='cv.pdf'):
+        cv = SimpleUploadedFile(filename, content, content_type='application/pdf')
+        self.client.post(reverse('apply_job', args=[job.id]), {'cv': cv, 'cover_letter': 'Hi'})
+        return Application.objects.get(job=job)
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.apply(self.jobs[0], filename='cv.pdf')
+        second = self.apply(self.jobs[1], filename='renamed.pdf')
+        other = self.apply(self.jobs[2], content=b'%PDF-1.4 another cv')
+        self.assertEqual(first.cv.name, second.cv.name)
+        self.assertRegex(first.cv.name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$')
+        self.assertNotEqual(first.cv.name, other.cv.name)
+        self.assertEqual(first.cv.read(), b'%PDF-1.4 my cv')
+
+    @mock.patch('jobsly.storage.DELETE_GRACE_SECONDS', 0)
+    def test_blob_deleted_with_its_last_reference(self):
+        first = self.apply(self.jobs[0])
+        second = self.apply(self.jobs[1])
+        storage = first.cv.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(second.cv.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(second.cv.name))
+
+    def test_recent_blob_survives_unreferenced_delete(self):
+        application = self.apply(self.jobs[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            application.delete()
+        self.assertTrue(application.cv.storage.exists(application.cv.name))
+
+    @mock.patch('jobsly.storage.DELETE_GRACE_SECONDS', 0)
+    def test_profile_cv_outlives_applications_using_it(self):
+        self.applicant.cv = SimpleUploadedFile('cv.pdf', b'%PDF-1.4 profile cv')
+        self.applicant.save()
+        # What apply_job does when the seeker reuses their profile CV
+        application = Application.objects.create(job=self.jobs[0], applicant=self.applicant, cv=self.applicant.cv)
+        with self.captureOnCommitCallbacks(execute=True):
+            application.delete()
+        self.assertTrue(self.applicant.cv.storage.exists(self.applicant.cv.name))
+
+    def test_dedupe_media_command(self):
+        storage = Application._meta.get_field('cv').storage
+        for name in ['cvs/old.pdf', 'application_cvs/old_copy.pdf']:
+            path = storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'%PDF-1.4 legacy')
+        ApplicantProfile.objects.filter(pk=self.applicant.pk).update(cv='cvs/old.pdf')
+        Application.objects.create(job=self.jobs[0], applicant=self.applicant, cv='application_cvs/old_copy.pdf')
+        Application.objects.create(job=self.jobs[1], applicant=self.applicant, cv='application_cvs/gone.pdf')
+        orphan = storage.path('blobs/00/orphan.pdf')
+        os.makedirs(os.path.dirname(orphan), exist_ok=True)
+        open(orphan, 'wb').close()
+        os.utime(orphan, (0, 0))
+
+        out = io.StringIO()
+        call_command('dedupe_media', stdout=out)
+        self.assertIn('Stored 2 file(s) as 1 blob(s), saving 15 bytes. 1 file(s) missing.', out.getvalue())
+        self.assertIn('Removed 1 unreferenced blob(s).', out.getvalue())
+
+        self.applicant.refresh_from_db()
+        blob = self.applicant.cv.name
+        self.assertTrue(blob.startswith('blobs/'))
+        self.assertEqual(Application.objects.get(job=self.jobs[0]).cv.name, blob)
+        self.assertEqual(Application.objects.get(job=self.jobs[1]).cv.name, 'application_cvs/gone.pdf')
+        self.assertFalse(storage.exists('cvs/old.pdf'))
+        self.assertFalse(storage.exists('application_cvs/old_copy.pdf'))
+        self.assertFalse(os.path.exists(orphan))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProtectedMediaTests(TestCase):
+    content = b'%PDF-1.4 ' + bytes(range(256)) * 4
+
+    def setUp(self):
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        self.applicant = make_applicant('seeker')
+        self.applicant.cv = SimpleUploadedFile('cv.pdf', self.content)
+        self.applicant.save()
+        self.application = Application.objects.create(job=self.job, applicant=self.applicant, cv=self.applicant.cv)
+        self.url = reverse('application_cv', args=[self.application.id])
+
+    def content_of(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_only_owners_and_staff_can_download(self):
+        stranger = make_employer('globex', 'Globex').user
+        staff = User.objects.create_user('root', 'root@example.com', 'pass', is_staff=True)
+        profile_url = reverse('applicant_cv', args=[self.applicant.id])
+        for user, allowed in [(self.employer.user, True), (self.applicant.user, True),
+                              (staff, True), (stranger, False)]:
+            self.client.force_login(user)
+            for url in [self.url, profile_url]:
+                with self.subTest(user=user.username, url=url):
+                    response = self.client.get(url)
+                    if allowed:
+                        self.assertEqual(self.content_of(response), self.content)
+                        self.assertEqual(response['Content-Disposition'], 'inline; filename="Seeker CV.pdf"')
+                    else:
+                        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        # Not reachable as plain media either
+        self.assertEqual(self.client.get(settings.MEDIA_URL + self.application.cv.name).status_code, 404)
+
+    def test_range_and_etag(self):
+        self.client.force_login(self.employer.user)
+        full = self.client.get(self.url)
+        etag = full['ETag']
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=9-18')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 9-18/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.content_of(response), self.content[9:19])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(self.content_of(response), self.content[-5:])
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        # A range against an outdated copy gets the whole file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content_of(response), self.content)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_front_server_handoff(self):
+        self.client.force_login(self.employer.user)
+        with override_settings(PROTECTED_MEDIA_SERVER='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.application.cv.name)
+        self.assertEqual(response.content, b'')
+        with override_settings(PROTECTED_MEDIA_SERVER='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.application.cv.path)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-99', 50), (0, 49))
+        self.assertEqual(parse_range('bytes=10-', 50), (10, 49))
+        self.assertEqual(parse_range('bytes=-10', 50), (40, 49))
+        self.assertEqual(parse_range('bytes=-100', 50), (0, 49))
+        for ignored in ['bytes=0-1,5-6', 'items=0-1', 'bytes=5-1', 'bytes=-']:
+            self.assertIsNone(parse_range(ignored, 50))
+        for unsatisfiable in ['bytes=50-', 'bytes=-0']:
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(unsatisfiable, 50)
+
+
+def image_file(name='logo.png', size=(600, 300), fmt='PNG', mode='RGBA'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 255) if mode == 'RGBA' else (200, 30, 30)).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), THUMBNAIL_WORKERS=0)
+class LogoThumbnailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+
+    def upload_logo(self, logo):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employer.logo = logo
+            self.employer.save()
+
+    def test_variants_generated_on_upload(self):
+        self.upload_logo(image_file())
+        storage = self.employer.logo.storage
+        self.assertTrue(thumbnails.has_variants(storage, self.employer.logo.name))
+        with storage.open(thumbnails.variant_name(self.employer.logo.name, 256, 'webp')) as f:
+            webp = Image.open(f)
+            self.assertEqual((webp.format, webp.size, webp.mode), ('WEBP', (256, 256), 'RGBA'))
+        with storage.open(thumbnails.variant_name(self.employer.logo.name, 48, 'jpg')) as f:
+            jpeg = Image.open(f)
+            self.assertEqual((jpeg.format, jpeg.size), ('JPEG', (48, 48)))
+
+    def test_pages_show_variants_never_the_original(self):
+        url = reverse('job_detail', args=[self.job.id])
+        self.assertContains(self.client.get(url), 'fa-building')
+        self.upload_logo(image_file())
+        response = self.client.get(url)
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, thumbnails.variant_name(self.employer.logo.name, 256, 'webp') + ' 2x')
+        self.assertNotContains(response, self.employer.logo.url + '"')
+
+    def test_large_jpeg_decoded_at_reduced_scale(self):
+        rendered = thumbnails.render_variants(image_file('photo.jpg', (4000, 3000), 'JPEG', 'RGB'))
+        self.assertEqual(len(rendered), len(thumbnails.SIZES) * len(thumbnails.FORMATS))
+
+    @mock.patch('jobsly.thumbnails.MAX_SOURCE_PIXELS', 100_000)
+    def test_oversized_images_refused(self):
+        with self.assertRaises(thumbnails.ThumbnailError):
+            thumbnails.open_bounded(image_file(size=(1000, 1000)))
+        form = EmployerProfileForm(
+            {'company_name': 'Acme', 'industry': 'Software', 'address': 'x', 'description': 'x'},
+            {'logo': image_file(size=(1000, 1000))},
+        )
+        self.assertIn('megapixels', str(form.errors['logo']))
+
+    def test_replaced_logo_variants_removed(self):
+        self.upload_logo(image_file('first.png'))
+        old_name = self.employer.logo.name
+        self.upload_logo(image_file('second.png'))
+        storage = self.employer.logo.storage
+        self.assertFalse(any(storage.exists(name) for name in thumbnails.variant_names(old_name)))
+        self.assertTrue(thumbnails.has_variants(storage, self.employer.logo.name))
+
+    def test_backfill_command(self):
+        name = default_storage.save('company_logos/legacy.png', image_file())
+        EmployerProfile.objects.filter(pk=self.employer.pk).update(logo=name)
+        out = io.StringIO()
+        call_command('generate_logo_thumbnails', stdout=out)
+        self.assertIn('Generated thumbnails for 1 of 1', out.getvalue())
+        self.assertTrue(thumbnails.has_variants(default_storage, name))
+        call_command('generate_logo_thumbnails', stdout=out)
+        self.assertIn('Generated thumbnails for 0 of 1', out.getvalue())
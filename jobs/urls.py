@@ -5,11 +5,17 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('jobs/', views.job_list, name='job_list'),
     path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('api/jobs/', views.api_job_list, name='api_job_list'),
+    path('api/jobs/<int:job_id>/', views.api_job_detail, name='api_job_detail'),
     path('jobs/<int:job_id>/apply/', views.apply_job, name='apply_job'),
     path('jobs/<int:job_id>/success/', views.application_success, name='application_success'),
     path('employer/jobs/post/', views.post_job, name='post_job'),
+    path('employer/jobs/import/', views.import_jobs, name='import_jobs'),
     path('employer/jobs/', views.manage_jobs, name='manage_jobs'),
     path('employer/jobs/<int:job_id>/applicants/', views.view_applicants, name='view_applicants'),
+    path('employer/jobs/<int:job_id>/applicants/status/', views.bulk_update_application_status,
+         name='bulk_update_application_status'),
     path('employer/applications/<int:application_id>/<str:status>/', 
          views.update_application_status, name='update_application_status'),
+    path('applications/<int:application_id>/cv/', views.application_cv, name='application_cv'),
 ]
\ No newline at end of file
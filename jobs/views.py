@@ -1,61 +1,164 @@
+import hashlib
+import os
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import require_POST
 from .models import Job, Application
-from .forms import JobForm, ApplicationForm
+from .forms import JobForm, ApplicationForm, BulkApplicationStatusForm, JobImportUploadForm
 from .filters import JobFilter
+from .search import search_applications, search_jobs
+from .pagination import CursorPaginator, InvalidCursor, approximate_count, decode_cursor
+from . import api, bulk, caching, facets, imports, ranking
+from .caching import cache_public_page, conditional_public_page
 from accounts.models import ApplicantProfile, EmployerProfile
+from jobsly.sendfile import serve_file
+from jobsly.routers import read_from_replica
+
+JOBS_PER_PAGE = 10
 
+@read_from_replica
+@cache_public_page(caching.LISTINGS)
 def home(request):
-    latest_jobs = Job.objects.filter(status='approved', is_active=True).order_by('-created_at')[:8]
+    latest_jobs = Job.objects.filter(status='approved', is_active=True).select_related('employer').order_by('-created_at')[:8]
     
-    # Get unique categories for the home page
-    categories = Job.objects.filter(status='approved', is_active=True).values_list('category', flat=True).distinct()[:8]
+    # Most popular categories, from the maintained facet counts
+    categories = facets.category_facets()[:8]
     
     context = {
         'latest_jobs': latest_jobs,
         'categories': categories,
+        'cache_version': caching.versions(caching.LISTINGS)[0],
     }
     return render(request, 'jobs/home.html', context)
 
-def job_list(request):
+def filter_jobs(request):
+    """(search query, JobFilter) for the listing's search and filter parameters"""
     jobs = Job.objects.filter(status='approved', is_active=True).order_by('-created_at')
     
-    # Search functionality - FIXED SYNTAX
+    # Search functionality - full-text index, ranked by relevance
     query = request.GET.get('q')
     if query:
-        jobs = jobs.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(employer__company_name__icontains=query) |
-            Q(location__icontains=query) |
-            Q(category__icontains=query)
-        )
+        jobs = search_jobs(jobs, query)
     
     # Filter functionality
-    job_filter = JobFilter(request.GET, queryset=jobs)
-    filtered_jobs = job_filter.qs
+    return query, JobFilter(request.GET, queryset=jobs)
+
+def listing_parameters_valid(request, job_filter):
+    """Whether the listing's cursor and filter parameters parse"""
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor:
+            return False
+    return job_filter.is_valid()
+
+def job_list_validators(request):
+    _, job_filter = filter_jobs(request)
+    # Malformed parameters get no validators: they cost no queries, and the
+    # request gets its error or first page rather than a 304
+    if not listing_parameters_valid(request, job_filter):
+        return None
+    # The count catches jobs leaving the listing (rejected, deactivated,
+    # deleted), which doesn't move max(updated_at)
+    latest = job_filter.qs.order_by().aggregate(count=Count('id'), updated=Max('updated_at'))
+    # Company names are on the cards. Any employer edit counts: far cheaper
+    # than joining employers in, and profile edits are rare. The last
+    # delisting comes along in the same query
+    latest.update(EmployerProfile.objects.aggregate(
+        employer_updated=Max('updated_at'), delisted=Max(caching.last_delisting()),
+    ))
+    # The page cache's versions also move without any updated_at doing so,
+    # e.g. when a logo's thumbnails are ready
+    etag = hashlib.md5(repr((
+        request.get_full_path(), sorted(latest.items()), caching.versions(caching.LISTINGS),
+    )).encode()).hexdigest()
+    # Last-Modified has no count to notice a job leaving the listing; the
+    # recorded delisting time does
+    last_modified = max(
+        filter(None, [latest['updated'], latest['employer_updated'], latest['delisted']]), default=None,
+    )
+    return etag, last_modified
+
+def listing_page(request, query, filtered_jobs):
+    """(page_obj, total_jobs, total_exact) for the listing"""
+    # Relevance-ranked searches page by offset, plain listings by
+    # (created_at, id) cursor so deep pages cost the same as the first
+    if query:
+        paginator = Paginator(filtered_jobs, JOBS_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        return page_obj, paginator.count, True
+    paginator = CursorPaginator(filtered_jobs, JOBS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    return (page_obj, *approximate_count(filtered_jobs))
+
+def lazy_listing_page(request, query, filtered_jobs):
+    """
+    listing_page() as template context, queried only when the template first
+    uses it: a cached results fragment doesn't
+    """
+    page = SimpleLazyObject(lambda: listing_page(request, query, filtered_jobs))
+    return {
+        'page_obj': SimpleLazyObject(lambda: page[0]),
+        'total_jobs': SimpleLazyObject(lambda: page[1]),
+        'total_exact': SimpleLazyObject(lambda: page[2]),
+    }
+
+@read_from_replica
+@conditional_public_page(job_list_validators, caching.LISTINGS)
+@cache_public_page(caching.LISTINGS)
+def job_list(request):
+    query, job_filter = filter_jobs(request)
+    filtered_jobs = job_filter.qs.select_related('employer')
     
-    # Pagination
-    paginator = Paginator(filtered_jobs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Query string without paging parameters, for the pagination links
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
     
-    # Get unique categories for filter suggestions
-    categories = Job.objects.filter(status='approved', is_active=True).values_list('category', flat=True).distinct()
+    # Category facets with live counts for the sidebar
+    categories = facets.category_facets()
     
     context = {
-        'page_obj': page_obj,
+        **lazy_listing_page(request, query, filtered_jobs),
         'filter': job_filter,
-        'total_jobs': filtered_jobs.count(),
+        'cursor_paging': not query,
+        'pagination_query': params.urlencode(),
         'categories': categories,
+        'cache_version': caching.versions(caching.LISTINGS)[0],
     }
     return render(request, 'jobs/job_list.html', context)
 
+def api_job_list_validators(request):
+    try:
+        api.parse_fields(request.GET.get('fields'), api.LIST_FIELDS)
+        api.parse_page_size(request.GET.get('page_size'))
+    except api.InvalidParameter:
+        return None
+    return job_list_validators(request)
+
+def job_detail_validators(request, job_id):
+    row = Job.objects.filter(id=job_id, status='approved', is_active=True).values_list(
+        'updated_at', 'employer__updated_at',
+    ).first()
+    if row is None:
+        return None
+    etag = hashlib.md5(repr((row, caching.versions(caching.job_version_name(job_id)))).encode()).hexdigest()
+    return etag, max(row)
+
+@read_from_replica
+@conditional_public_page(job_detail_validators, 'job:{job_id}')
+@cache_public_page('job:{job_id}')
 def job_detail(request, job_id):
-    job = get_object_or_404(Job, id=job_id, status='approved', is_active=True)
+    job = get_object_or_404(Job.objects.select_related('employer'), id=job_id, status='approved', is_active=True)
     
     has_applied = False
     if request.user.is_authenticated and request.user.role == 'applicant':
@@ -67,10 +170,83 @@ def job_detail(request, job_id):
     
     context = {
         'job': job,
-        'has_applied': has_applied
+        'has_applied': has_applied,
+        'cache_version': caching.versions(caching.job_version_name(job.id))[0],
     }
     return render(request, 'jobs/job_detail.html', context)
 
+def api_job_detail_validators(request, job_id):
+    try:
+        api.parse_fields(request.GET.get('fields'), api.DETAIL_FIELDS)
+    except api.InvalidParameter:
+        return None
+    return job_detail_validators(request, job_id)
+
+def api_page_url(request, **params):
+    """Absolute URL of this request with ``params`` swapped into the query string"""
+    query = request.GET.copy()
+    for name in ('page', 'cursor'):
+        query.pop(name, None)
+    query.update(params)
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+@read_from_replica
+@conditional_public_page(api_job_list_validators, caching.LISTINGS)
+@cache_public_page(caching.LISTINGS)
+def api_job_list(request):
+    try:
+        fields = api.parse_fields(request.GET.get('fields'), api.LIST_FIELDS)
+        page_size = api.parse_page_size(request.GET.get('page_size'))
+    except api.InvalidParameter as e:
+        return api.error(str(e))
+    query, job_filter = filter_jobs(request)
+    if not job_filter.is_valid():
+        return api.error('; '.join(
+            f'{name}: {" ".join(errors)}' for name, errors in job_filter.errors.items()
+        ))
+    jobs = job_filter.qs
+    
+    # Same paging as job_list: offset for ranked searches, cursor otherwise
+    next_url = previous_url = None
+    if query:
+        extra = ['search_rank'] if 'search_rank' in jobs.query.extra_select else []
+        paginator = Paginator(api.values(jobs, fields, *extra), page_size)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        total_jobs, total_exact = paginator.count, True
+        if page_obj.has_next():
+            next_url = api_page_url(request, page=page_obj.next_page_number())
+        if page_obj.has_previous():
+            previous_url = api_page_url(request, page=page_obj.previous_page_number())
+    else:
+        paginator = CursorPaginator(api.values(jobs, fields, 'created_at', 'id'), page_size)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+        total_jobs, total_exact = approximate_count(jobs)
+        if page_obj.has_next():
+            next_url = api_page_url(request, cursor=page_obj.next_cursor)
+        if page_obj.has_previous():
+            previous_url = api_page_url(request, cursor=page_obj.previous_cursor)
+    
+    return JsonResponse({
+        'count': total_jobs,
+        'count_exact': total_exact,
+        'next': next_url,
+        'previous': previous_url,
+        'results': [api.serialize(row, fields) for row in page_obj],
+    })
+
+@read_from_replica
+@conditional_public_page(api_job_detail_validators, 'job:{job_id}')
+@cache_public_page('job:{job_id}')
+def api_job_detail(request, job_id):
+    try:
+        fields = api.parse_fields(request.GET.get('fields'), api.DETAIL_FIELDS)
+    except api.InvalidParameter as e:
+        return api.error(str(e))
+    row = api.values(Job.objects.filter(id=job_id, status='approved', is_active=True), fields).first()
+    if row is None:
+        return api.error('Not found.', status=404)
+    return JsonResponse(api.serialize(row, fields))
+
 @login_required
 def apply_job(request, job_id):
     if request.user.role != 'applicant':
@@ -142,6 +318,39 @@ def post_job(request):
     }
     return render(request, 'jobs/post_job.html', context)
 
+@login_required
+def import_jobs(request):
+    if request.user.role != 'employer':
+        messages.error(request, 'Only employers can import jobs.')
+        return redirect('home')
+    
+    employer_profile = get_object_or_404(EmployerProfile, user=request.user)
+    report = None
+    
+    if request.method == 'POST':
+        form = JobImportUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            feed = form.cleaned_data['feed']
+            feed_format = form.cleaned_data['format'] or imports.guess_format(feed.name)
+            if feed_format:
+                report = imports.import_jobs(employer_profile, feed, feed_format)
+                messages.success(
+                    request,
+                    f'{report.created} job(s) created, {report.updated} updated, {report.unchanged} unchanged, '
+                    f'{report.failed} row(s) rejected. New and changed jobs will be reviewed by admin before going live.'
+                )
+            else:
+                form.add_error('format', "Choose the feed format; it can't be told from the file name.")
+    else:
+        form = JobImportUploadForm()
+    
+    context = {
+        'form': form,
+        'report': report,
+        'fields': imports.FIELDS,
+    }
+    return render(request, 'jobs/import_jobs.html', context)
+
 @login_required
 def manage_jobs(request):
     if request.user.role != 'employer':
@@ -165,25 +374,101 @@ def view_applicants(request, job_id):
     
     employer_profile = get_object_or_404(EmployerProfile, user=request.user)
     job = get_object_or_404(Job, id=job_id, employer=employer_profile)
-    applications = Application.objects.filter(job=job).select_related('applicant')
+    applications = (
+        Application.objects.filter(job=job).select_related('applicant', 'applicant__user')
+        .defer('cv_text', 'applicant__cv_text')
+    )
+    status_filter = request.GET.get('status', '')
+    if status_filter in dict(Application.STATUS_CHOICES):
+        applications = applications.filter(status=status_filter)
+    else:
+        status_filter = ''
+    query = request.GET.get('q', '').strip()
+    if query:
+        applications = search_applications(applications, query)
+    sort = request.GET.get('sort', '')
+    if sort == 'match':
+        # Only applications without a stored score are scored here
+        ranking.refresh_scores(job)
+        applications = applications.order_by(F('match_score').desc(nulls_last=True), '-applied_date')
+    else:
+        sort = ''
     
     context = {
         'job': job,
-        'applications': applications
+        'applications': applications,
+        'status_filter': status_filter,
+        'sort': sort,
+        'query': query,
+        'bulk_form': BulkApplicationStatusForm(initial={'filter_status': status_filter}),
     }
     return render(request, 'jobs/applicants.html', context)
 
+@login_required
+@require_POST
+def bulk_update_application_status(request, job_id):
+    if request.user.role != 'employer':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    
+    job = get_object_or_404(Job, id=job_id, employer__user=request.user)
+    form = BulkApplicationStatusForm(request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            messages.error(request, errors[0])
+        return redirect('view_applicants', job_id=job.id)
+    
+    applications = Application.objects.filter(job=job)
+    filter_status = form.cleaned_data['filter_status']
+    if form.cleaned_data['scope'] == 'selected':
+        applications = applications.filter(id__in=form.cleaned_data['applications'])
+    elif filter_status:
+        applications = applications.filter(status=filter_status)
+    status = form.cleaned_data['status']
+    updated = bulk.update_application_statuses(job, applications, status)
+    messages.success(request, f'{updated} application(s) updated to {status.replace("_", " ").title()}')
+    
+    url = reverse('view_applicants', args=[job.id])
+    return redirect(f'{url}?status={filter_status}' if filter_status else url)
+
 @login_required
 def update_application_status(request, application_id, status):
     if request.user.role != 'employer':
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    application = get_object_or_404(Application, id=application_id, job__employer__user=request.user)
+    if status not in dict(Application.STATUS_CHOICES):
+        application = get_object_or_404(Application, id=application_id, job__employer__user=request.user)
+        return redirect('view_applicants', job_id=application.job_id)
     
-    if status in dict(Application.STATUS_CHOICES):
+    with transaction.atomic():
+        # Row lock so concurrent updates can't double-count a status change
+        # (the counters move in post_save, from the status loaded here)
+        application = get_object_or_404(
+            Application.objects.select_for_update().defer('cv_text'), id=application_id,
+            job__employer__user=request.user,
+        )
         application.status = status
-        application.save()
-        messages.success(request, f'Application status updated to {status.replace("_", " ").title()}')
+        # Only the status: CV text may be written by an extraction worker meanwhile
+        application.save(update_fields=['status', 'updated_at'])
+    messages.success(request, f'Application status updated to {status.replace("_", " ").title()}')
+    
+    return redirect('view_applicants', job_id=application.job_id)
+
+
+@login_required
+def application_cv(request, application_id):
+    application = get_object_or_404(
+        Application.objects.select_related('applicant', 'job__employer'), id=application_id
+    )
+    # The applicant, the employer who posted the job, or staff
+    if not (request.user.is_staff
+            or application.applicant.user_id == request.user.id
+            or application.job.employer.user_id == request.user.id):
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    if not application.cv:
+        raise Http404('No CV uploaded')
     
-    return redirect('view_applicants', job_id=application.job.id)
\ No newline at end of file
+    extension = os.path.splitext(application.cv.name)[1]
+    return serve_file(request, application.cv, f'{application.applicant.full_name} CV{extension}')
@@ -2,15 +2,50 @@
 ASGI config for jobsly project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests served through it use jobsly/asgi_urls.py, which swaps in the async
+versions of the public read views.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import time
+from contextvars import ContextVar
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
+from django.db.backends.signals import connection_created
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobsly.settings')
 
-application = get_asgi_application()
+ASGI_URLCONF = 'jobsly.asgi_urls'
+
+_serving_asgi = ContextVar('serving_asgi', default=False)
+
+
+class JobslyASGIHandler(ASGIHandler):
+    async def get_response_async(self, request):
+        # resolve() and reverse() follow request.urlconf for this request
+        request.urlconf = ASGI_URLCONF
+        token = _serving_asgi.set(True)
+        try:
+            return await super().get_response_async(request)
+        finally:
+            _serving_asgi.reset(token)
+
+
+def close_at_request_end(sender, connection, **kwargs):
+    # Django runs each ASGI request's sync code (ORM included) on a thread of
+    # its own, so a connection kept open for reuse would never be reused:
+    # CONN_MAX_AGE = 0 for these, leaving WSGI requests in the same process
+    # (e.g. "manage.py benchmark --interface wsgi --interface asgi") alone
+    if _serving_asgi.get():
+        connection.close_at = time.monotonic()
+
+
+connection_created.connect(close_at_request_end, dispatch_uid='jobsly_asgi_close_at_request_end')
+
+# What get_asgi_application() does, with the handler above
+django.setup(set_prefix=False)
+application = JobslyASGIHandler()
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from applicants import async_views as applicant_views
+from jobs import async_views as job_views
+from . import urls
+
+# URLconf for jobsly/asgi.py: the async versions of the public read views
+# (jobs/async_views.py) and the applicant dashboard, at the same paths and
+# names, ahead of everything else in jobsly/urls.py
+
+urlpatterns = [
+    path('', job_views.home, name='home'),
+    path('jobs/', job_views.job_list, name='job_list'),
+    path('jobs/<int:job_id>/', job_views.job_detail, name='job_detail'),
+    path('applicant/dashboard/', applicant_views.applicant_dashboard, name='applicant_dashboard'),
+] + urls.urlpatterns
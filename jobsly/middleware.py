@@ -0,0 +1,111 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+from . import routers
+
+logger = logging.getLogger('jobsly.metrics')
+
+
+class QueryMetrics:
+    """Database wrapper counting queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Record SQL query count, database time and render time (everything that
+    isn't the database: view code and templates) for every request.
+
+    The figures are stored on ``request.metrics`` and logged to
+    ``jobsly.metrics``. With DEBUG on they are also sent back as a
+    ``Server-Timing`` header, which browser dev tools display.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = QueryMetrics()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            self.wrap_connections(stack, queries)
+            response = self.get_response(request)
+        return self.record(request, response, queries, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        queries = QueryMetrics()
+        start = time.perf_counter()
+        stack = ExitStack()
+        # Under ASGI the ORM runs on the request's sync thread, with that
+        # thread's connections; wrap those
+        await sync_to_async(self.wrap_connections)(stack, queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.record(request, response, queries, time.perf_counter() - start)
+
+    def wrap_connections(self, stack, queries):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(queries))
+
+    def record(self, request, response, queries, total):
+        request.metrics = {
+            'queries': queries.count,
+            'db_ms': queries.duration * 1000,
+            'render_ms': (total - queries.duration) * 1000,
+            'total_ms': total * 1000,
+        }
+        logger.debug(
+            '%s %s: %d queries, db %.1fms, render %.1fms, total %.1fms',
+            request.method, request.path, queries.count,
+            request.metrics['db_ms'], request.metrics['render_ms'], request.metrics['total_ms'],
+        )
+
+        if settings.DEBUG:
+            response['Server-Timing'] = ', '.join([
+                'db;dur=%.1f;desc="%d queries"' % (request.metrics['db_ms'], queries.count),
+                'render;dur=%.1f' % request.metrics['render_ms'],
+                'total;dur=%.1f' % request.metrics['total_ms'],
+            ])
+        return response
+
+
+class PinPrimaryAfterWriteMiddleware(MiddlewareMixin):
+    """
+    After a write request, have the client read from the primary for
+    ``REPLICA_LAG_SECONDS`` (see jobsly/routers.py) so the pages it goes on
+    to see include its change, however far behind the replica is.
+    """
+
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') and routers.replica_alias():
+            response.set_cookie(
+                routers.PRIMARY_PIN_COOKIE, '1', max_age=settings.REPLICA_LAG_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Primary/replica routing. Views decorated with @read_from_replica (the
+# public listing pages and the dashboards) read from the REPLICA_DATABASE
+# alias when one is configured; every write, and every read elsewhere, goes
+# to the primary. Without a replica in DATABASES nothing changes.
+#
+# A replica can be behind. A client that has just written (any POST) gets a
+# short-lived cookie from PinPrimaryAfterWriteMiddleware and reads from the
+# primary until it expires, so it always sees its own changes; pages and
+# fragments cached from the replica are kept under keys of their own for the
+# same reason (jobs/caching.py).
+
+PRIMARY_PIN_COOKIE = 'pin_primary'
+# Always read from the primary: the session is written on every login
+PRIMARY_APPS = {'sessions'}
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_alias():
+    """The replica's alias, or None if there isn't one"""
+    alias = getattr(settings, 'REPLICA_DATABASE', None)
+    return alias if alias and alias in connections.settings else None
+
+
+def reading_from_replica():
+    return _replica_reads.get() and replica_alias() is not None
+
+
+@contextmanager
+def replica_reads():
+    """Send reads to the replica inside the block"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _use_replica(request):
+    return request.method in ('GET', 'HEAD') and PRIMARY_PIN_COOKIE not in request.COOKIES
+
+
+def read_from_replica(view):
+    """Run a read-only view's queries against the replica (sync or async views)"""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not _use_replica(request):
+                return await view(request, *args, **kwargs)
+            # Thread hops made by sync_to_async copy the context, and this with it
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _use_replica(request):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and model._meta.app_label not in PRIMARY_APPS:
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicitly, or objects read from the replica would be saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        if db == replica_alias():
+            return False
+        return None
@@ -0,0 +1,135 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
+
+from .storage import BLOB_PREFIX
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Inclusive (start, end) for a single "bytes=" range of a ``size`` byte file.
+
+    None means the header should be ignored and the whole file sent: it is
+    malformed or asks for several ranges, which is allowed. Raises
+    RangeNotSatisfiable for a range entirely past the end of the file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = int(last) if last else max(start, size - 1)
+        if end < start:
+            return None
+    else:
+        # "bytes=-500": the last 500 bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable
+        start, end = max(size - suffix, 0), size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+class RangeFile:
+    """Read at most ``length`` bytes of ``file`` from its current position"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(fieldfile):
+    stem, _ = os.path.splitext(os.path.basename(fieldfile.name))
+    if fieldfile.name.startswith(f'{BLOB_PREFIX}/'):
+        # Deduplicated files are named after a digest of their content
+        return quote_etag(stem)
+    stat = os.stat(fieldfile.path)
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def stream_file(request, fieldfile, content_type):
+    """FileResponse for local runs, answering If-None-Match and single Range requests"""
+    try:
+        size = fieldfile.size
+    except FileNotFoundError:
+        raise Http404('File not found')
+    etag = file_etag(fieldfile)
+
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    # If-Range: only honour the range if the client's copy is still current
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = fieldfile.storage.open(fieldfile.name, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(RangeFile(file, end - start + 1), content_type=content_type, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_file(request, fieldfile, filename):
+    """
+    Send a stored file, once the caller has checked the user may see it.
+
+    With ``PROTECTED_MEDIA_SERVER`` set the front server does the transfer
+    (and handles Range/ETag itself): 'x-accel-redirect' for nginx,
+    'x-sendfile' for Apache mod_xsendfile or lighttpd. Otherwise Django
+    streams the file.
+    """
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    server = getattr(settings, 'PROTECTED_MEDIA_SERVER', None)
+    if server == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.PROTECTED_MEDIA_INTERNAL_URL + fieldfile.name)
+    elif server == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fieldfile.path
+    else:
+        response = stream_file(request, fieldfile, content_type)
+    response['Content-Disposition'] = content_disposition_header(False, filename)
+    response['Cache-Control'] = 'private'
+    return response
@@ -25,6 +25,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'jobsly.middleware.RequestMetricsMiddleware',
+    'jobsly.middleware.PinPrimaryAfterWriteMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,8 +58,43 @@ WSGI_APPLICATION = 'jobsly.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite with WAL and tuned pragmas on every connection (jobsly/sqlite/base.py)
+        'ENGINE': 'jobsly.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse connections across requests; checked before reuse. jobsly/asgi.py
+        # turns this off, as each ASGI request runs its queries on a new thread
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Writers queue on busy_timeout instead of failing mid-transaction
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Read replica for the listing pages and dashboards (jobsly/routers.py). To
+# use one, add it under this alias and keep it in sync with the primary, e.g.
+# with Litestream or LiteFS (or a PostgreSQL standby):
+#   DATABASES['replica'] = {
+#       'ENGINE': 'jobsly.sqlite', 'NAME': '/path/to/replica.sqlite3',
+#       'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True,
+#       'OPTIONS': {'pragmas': {'query_only': 'ON'}},
+#   }
+# Pages can then lag the primary by the replication delay (longer if the page
+# cache stores a page meanwhile; see jobs/caching.py TIMEOUT).
+DATABASE_ROUTERS = ['jobsly.routers.PrimaryReplicaRouter']
+REPLICA_DATABASE = 'replica'
+# Seconds a client reads from the primary after a write, to see its own changes
+REPLICA_LAG_SECONDS = 10
+
+# Page and fragment cache for the public job pages (jobs/caching.py).
+# LocMemCache is per process; with several worker processes use a shared
+# backend (Redis, Memcached) so version bumps reach every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jobsly',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
     }
 }
 
@@ -88,6 +125,26 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# CVs are only served through permission-checked views (jobsly/sendfile.py).
+# None streams them from Django; 'x-accel-redirect' (nginx) or 'x-sendfile'
+# (Apache mod_xsendfile, lighttpd) hands the transfer to the front server.
+PROTECTED_MEDIA_SERVER = None
+# nginx "internal" location aliasing MEDIA_ROOT, for X-Accel-Redirect
+PROTECTED_MEDIA_INTERNAL_URL = '/protected-media/'
+
+# Background threads generating company logo thumbnails (jobsly/thumbnails.py).
+# 0 generates them inline when the upload commits
+THUMBNAIL_WORKERS = 2
+
+# Worker processes extracting text from uploaded CVs (jobsly/textextract.py).
+# 0 extracts inline when the upload commits
+CV_TEXT_WORKERS = 2
+
+# Job recommendations (jobs/recommendations.py, needs NumPy). The in-memory
+# index is built in a background thread on first use, then polled for changes
+RECOMMENDATIONS_BUILD_IN_BACKGROUND = True
+RECOMMENDATIONS_SYNC_SECONDS = 30
+
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
 LOGIN_REDIRECT_URL = 'home'
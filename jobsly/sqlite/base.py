@@ -0,0 +1,54 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+# SQLite backend (ENGINE 'jobsly.sqlite') tuned for a web server: readers
+# and the writer don't block each other, and a busy database makes callers
+# wait rather than fail. Applied to every new connection; override per
+# database with OPTIONS['pragmas'].
+PRAGMAS = {
+    # Milliseconds to wait for a lock before "database is locked". First, as
+    # switching to WAL needs a lock too
+    'busy_timeout': 5000,
+    # Readers see the last commit while a write is in progress
+    'journal_mode': 'WAL',
+    # Safe with WAL: a crash can lose the last commits but not corrupt the file
+    'synchronous': 'NORMAL',
+    # Read pages through a memory map rather than a read() call each
+    'mmap_size': 256 * 1024 * 1024,
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Django's SQLite backend plus OPTIONS['pragmas'] and
+    OPTIONS['transaction_mode'] (built in from Django 5.1). IMMEDIATE takes
+    the write lock at BEGIN, where busy_timeout applies: a deferred
+    transaction that reads and then writes fails at once with "database is
+    locked" if another connection wrote in between.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in {**PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"OPTIONS['transaction_mode'] must be one of {', '.join(TRANSACTION_MODES)}, not {mode!r}."
+            )
+        return mode and mode.upper()
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.transaction_mode
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import tempfile
+import time
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs'
+# A blob written this recently is never deleted: a row about to reference it
+# may not be saved yet. "manage.py dedupe_media" collects any leftovers
+DELETE_GRACE_SECONDS = 60 * 60
+MAX_EXTENSION_LENGTH = 10
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that keeps one copy of each distinct upload.
+
+    Files are named after the SHA-256 of their content, computed while the
+    upload is streamed to disk: ``blobs/ab/abcdef...pdf``. Saving content
+    that is already stored just returns the existing name, so the same CV
+    uploaded for fifty applications takes the disk space of one.
+
+    Rows share files, so ``delete()`` (what django_cleanup calls when a row
+    is deleted or its file replaced) only removes a blob once no model field
+    using this storage refers to it any more.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save(); identical names
+        # are the point, not a conflict
+        return name
+
+    def blob_name(self, digest, extension):
+        return f'{BLOB_PREFIX}/{digest[:2]}/{digest}{extension}'
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        if len(extension) > MAX_EXTENSION_LENGTH:
+            extension = ''
+
+        # Stream into a temporary file next to the blobs (same filesystem, so
+        # the final move is a rename), hashing as we go
+        blob_dir = self.path(BLOB_PREFIX)
+        os.makedirs(blob_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=blob_dir, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            name = self.blob_name(digest.hexdigest(), extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                # Already stored. Touch it so a concurrent delete() leaves it be
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                file_move_safe(tmp_path, full_path, allow_overwrite=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return name
+
+    def is_referenced(self, name):
+        """True if any row of a field using this storage holds ``name``"""
+        return any(
+            model._default_manager.filter(**{field.name: name}).exists()
+            for model, field in referencing_fields()
+        )
+
+    def recently_written(self, name):
+        try:
+            return os.path.getmtime(self.path(name)) > time.time() - DELETE_GRACE_SECONDS
+        except FileNotFoundError:
+            return False
+
+    def delete(self, name):
+        if self.is_referenced(name) or self.recently_written(name):
+            return
+        super().delete(name)
+
+
+def referencing_fields():
+    """(model, field) for every file field stored in a ContentAddressedStorage"""
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+cv_storage = ContentAddressedStorage()
@@ -0,0 +1,310 @@
+import io
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import unicodedata
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+import pypdf
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Plain text from uploaded CVs (PDF, DOCX, DOC), extracted in worker
+# processes: a hostile or broken file can hang or balloon its parser, so each
+# file gets a wall clock limit and each worker a memory limit, and a worker
+# that dies takes down only the files it was working on.
+EXTENSIONS = ('.pdf', '.doc', '.docx')
+MAX_SECONDS = 20
+MAX_MEMORY_BYTES = 512 * 1024 * 1024
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+# Decompressed size of a single DOCX part
+MAX_PART_BYTES = 50 * 1024 * 1024
+# Longer CVs are cut; the start says the most about an applicant
+MAX_TEXT_CHARS = 50_000
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class ExtractionTimeout(ExtractionError):
+    pass
+
+
+def normalize(text):
+    """NFKC, no control characters, single spaces, at most MAX_TEXT_CHARS"""
+    text = unicodedata.normalize('NFKC', text)
+    text = ''.join(ch if unicodedata.category(ch)[0] != 'C' else ' ' for ch in text)
+    return ' '.join(text.split())[:MAX_TEXT_CHARS]
+
+
+# ---- DOCX ----
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def _docx_text(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        try:
+            part = archive.getinfo('word/document.xml')
+        except KeyError:
+            raise ExtractionError('Not a Word document.')
+        if part.file_size > MAX_PART_BYTES:
+            raise ExtractionError('Document is too large.')
+        with archive.open(part) as xml:
+            # file_size comes from the archive and may lie; never read past it
+            document = xml.read(MAX_PART_BYTES + 1)
+    if len(document) > MAX_PART_BYTES:
+        raise ExtractionError('Document is too large.')
+
+    pieces = []
+    for event, element in ElementTree.iterparse(io.BytesIO(document), events=('end',)):
+        if element.tag == WORD_NS + 't':
+            pieces.append(element.text or '')
+        elif element.tag in (WORD_NS + 'tab', WORD_NS + 'br', WORD_NS + 'cr'):
+            pieces.append(' ')
+        elif element.tag == WORD_NS + 'p':
+            pieces.append('\n')
+            element.clear()
+    return ''.join(pieces)
+
+
+# ---- PDF ----
+
+def _pdf_text(data):
+    if not data.lstrip()[:5] == b'%PDF-':
+        raise ExtractionError('Not a PDF file.')
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(data))
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+    except pypdf.errors.PyPdfError as e:
+        raise ExtractionError(f'Could not read PDF: {e}')
+
+
+# ---- DOC ----
+
+def _doc_text(data):
+    # Word 97-2003 is an OLE compound file; antiword reads those
+    antiword = shutil.which('antiword')
+    if antiword is None:
+        raise ExtractionError('Word 97-2003 documents need antiword installed.')
+    with tempfile.NamedTemporaryFile(suffix='.doc') as file:
+        file.write(data)
+        file.flush()
+        try:
+            result = subprocess.run([antiword, '-w', '0', file.name], capture_output=True, timeout=MAX_SECONDS)
+        except subprocess.TimeoutExpired:
+            raise ExtractionTimeout(f'Took longer than {MAX_SECONDS} seconds.')
+    if result.returncode:
+        raise ExtractionError(result.stderr.decode('utf-8', 'replace').strip() or 'antiword failed.')
+    return result.stdout.decode('utf-8', 'replace')
+
+
+EXTRACTORS = {'.pdf': _pdf_text, '.docx': _docx_text, '.doc': _doc_text}
+
+
+def extract_text(data, name):
+    """Normalized plain text of the document ``data``, typed by ``name``'s extension"""
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in EXTRACTORS:
+        raise ExtractionError(f'Unsupported file type "{extension}".')
+    try:
+        return normalize(EXTRACTORS[extension](data))
+    except (zipfile.BadZipFile, ElementTree.ParseError, zlib.error, ValueError, EOFError) as e:
+        raise ExtractionError(f'Could not read document: {e}')
+
+
+# ---- worker processes ----
+
+def _address_space():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _limit_memory():
+    """Pool initializer: let a worker grow by at most MAX_MEMORY_BYTES"""
+    current = _address_space()
+    if resource is None or current is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = current + MAX_MEMORY_BYTES
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _timed_out(signum, frame):
+    raise ExtractionTimeout()
+
+
+def extract_limited(data, name, seconds=MAX_SECONDS):
+    """
+    Run extract_text() with a wall clock limit (main thread only, on Unix).
+    Returns ``(text, None)`` or ``(None, error message)``.
+    """
+    alarm = hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread()
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _timed_out)
+        signal.alarm(seconds)
+    try:
+        return extract_text(data, name), None
+    except ExtractionTimeout:
+        return None, f'Took longer than {seconds} seconds.'
+    except MemoryError:
+        return None, 'Ran out of memory.'
+    except ExtractionError as e:
+        return None, str(e)
+    finally:
+        if alarm:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def new_pool(workers):
+    # forkserver: workers start from a small clean process rather than a
+    # copy of a threaded web server
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_limit_memory)
+
+
+def read_source(storage, name):
+    """The bytes of the stored file ``name``, refusing oversized files"""
+    try:
+        if storage.size(name) > MAX_SOURCE_BYTES:
+            raise ExtractionError(f'File is larger than {MAX_SOURCE_BYTES // (1024 * 1024)} MB.')
+        with storage.open(name, 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        raise ExtractionError('File is missing.')
+
+
+def extract_many(storage, names, workers=2, seconds=MAX_SECONDS):
+    """
+    Extract the stored files ``names`` in ``workers`` processes, yielding
+    ``(name, text, error)`` as each finishes, in completion order.
+
+    At most two files per worker are read into memory at a time. If a worker
+    dies (say the kernel killed it), the files it shared the pool with are
+    retried one at a time, so only the file that kills a worker on its own
+    is reported as failed.
+    """
+    names = iter(names)
+    suspects = deque()
+    pending = {}
+    executor = new_pool(workers)
+    try:
+        while True:
+            if suspects:
+                if not pending:
+                    name, data = suspects.popleft()
+                    pending[executor.submit(extract_limited, data, name, seconds)] = name, data
+            else:
+                while len(pending) < workers * 2:
+                    name = next(names, None)
+                    if name is None:
+                        break
+                    try:
+                        data = read_source(storage, name)
+                    except ExtractionError as e:
+                        yield name, None, str(e)
+                        continue
+                    pending[executor.submit(extract_limited, data, name, seconds)] = name, data
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            crashed = []
+            for future in done:
+                name, data = pending.pop(future)
+                try:
+                    text, error = future.result()
+                except BrokenProcessPool:
+                    crashed.append((name, data))
+                    continue
+                yield name, text, error
+            if crashed:
+                crashed += pending.values()
+                pending.clear()
+                if len(crashed) == 1:
+                    yield crashed[0][0], None, 'Crashed the extractor.'
+                else:
+                    suspects.extend(crashed)
+                executor.shutdown(wait=False)
+                executor = new_pool(workers)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ---- uploads ----
+
+def _finish(name, on_done, result):
+    try:
+        on_done(name, *result)
+    finally:
+        _in_flight.discard(name)
+        close_old_connections()
+
+
+def _submit(storage, name, on_done):
+    global _executor
+    with _executor_lock:
+        if name in _in_flight:
+            return
+        _in_flight.add(name)
+    try:
+        data = read_source(storage, name)
+    except ExtractionError as e:
+        _finish(name, on_done, (None, str(e)))
+        return
+    workers = getattr(settings, 'CV_TEXT_WORKERS', 2)
+    if not workers:
+        _finish(name, on_done, extract_limited(data, name))
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = new_pool(workers)
+        future = _executor.submit(extract_limited, data, name)
+
+    def done(future):
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            global _executor
+            with _executor_lock:
+                _executor = None
+            result = None, 'Crashed the extractor.'
+        _finish(name, on_done, result)
+
+    future.add_done_callback(done)
+
+
+def schedule(storage, name, on_done):
+    """
+    Extract the text of the stored file ``name`` in a worker process once the
+    current transaction commits, then call ``on_done(name, text, error)`` in
+    a background thread. Files already being extracted are skipped.
+    ``CV_TEXT_WORKERS = 0`` extracts inline on commit instead.
+    """
+    transaction.on_commit(lambda: _submit(storage, name, on_done))
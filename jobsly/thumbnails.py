@@ -0,0 +1,153 @@
+import io
+import posixpath
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Square variants (pixels) generated for every logo, as WebP and JPEG. The
+# templates ask for one of these; twice a size is used for 2x screens
+SIZES = (48, 96, 128, 256)
+FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+QUALITY = 82
+THUMBS_DIR = 'thumbs'
+
+# Decoding limits. Image.open() only reads the header, so both are checked
+# before a single pixel is decoded: an 8 MB PNG can be 100+ megapixels
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+MAX_SOURCE_PIXELS = 40_000_000
+
+_executor = None
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def variant_name(name, size, extension):
+    """``company_logos/acme.png`` -> ``company_logos/thumbs/acme_png-128.webp``"""
+    directory, filename = posixpath.split(name)
+    stem = filename.replace('.', '_')
+    return posixpath.join(directory, THUMBS_DIR, f'{stem}-{size}.{extension}')
+
+
+def variant_names(name):
+    return [variant_name(name, size, extension) for size in SIZES for extension in FORMATS]
+
+
+def has_variants(storage, name):
+    return all(storage.exists(variant) for variant in variant_names(name))
+
+
+def open_bounded(file):
+    """
+    Open an image for decoding, refusing files too large to decode safely.
+    ``file`` must be positioned at the start.
+    """
+    size = getattr(file, 'size', None)
+    if size is not None and size > MAX_SOURCE_BYTES:
+        raise ThumbnailError(f'Image is larger than {MAX_SOURCE_BYTES // (1024 * 1024)} MB.')
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            image = Image.open(file)
+    except (UnidentifiedImageError, Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ThumbnailError(f'Not a usable image: {e}')
+    if image.width * image.height > MAX_SOURCE_PIXELS:
+        raise ThumbnailError(
+            f'Image is {image.width}x{image.height}; at most {MAX_SOURCE_PIXELS // 1_000_000} megapixels are allowed.'
+        )
+    return image
+
+
+def _square(image, size, background):
+    """``image`` scaled to fit a size x size box, centred on ``background``"""
+    image = image.copy()
+    image.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+    canvas = Image.new(image.mode, (size, size), background)
+    canvas.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+    return canvas
+
+
+def render_variants(file):
+    """{(size, extension): encoded bytes} for every variant of the image in ``file``"""
+    image = open_bounded(file)
+    largest = max(SIZES)
+    if image.format == 'JPEG':
+        # Let libjpeg decode at 1/2 to 1/8 scale; a huge photo never gets
+        # expanded to full size in memory
+        image.draft('RGB', (largest, largest))
+    try:
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        # Everything after this works on a small image
+        image.thumbnail((largest, largest), Image.LANCZOS, reducing_gap=3.0)
+    except (OSError, SyntaxError, ValueError) as e:
+        raise ThumbnailError(f'Could not decode image: {e}')
+
+    rendered = {}
+    for size in SIZES:
+        webp = _square(image, size, (255, 255, 255, 0) if has_alpha else (255, 255, 255))
+        # JPEG has no alpha: flatten onto white
+        jpeg = Image.new('RGB', webp.size, (255, 255, 255))
+        jpeg.paste(webp, mask=webp.getchannel('A') if has_alpha else None)
+        for extension, variant in (('webp', webp), ('jpg', jpeg)):
+            buffer = io.BytesIO()
+            variant.save(buffer, FORMATS[extension], quality=QUALITY, optimize=True)
+            rendered[size, extension] = buffer.getvalue()
+    return rendered
+
+
+def generate_variants(storage, name, force=False):
+    """
+    Write every variant of the stored image ``name``. Returns how many were
+    written; 0 if they all exist already (unless ``force``).
+    """
+    if not force and has_variants(storage, name):
+        return 0
+    with storage.open(name, 'rb') as file:
+        rendered = render_variants(file)
+    for (size, extension), data in rendered.items():
+        variant = variant_name(name, size, extension)
+        # Replace in place: storage.save() would pick a new name instead
+        storage.delete(variant)
+        storage.save(variant, ContentFile(data))
+    return len(rendered)
+
+
+def delete_variants(storage, name):
+    for variant in variant_names(name):
+        storage.delete(variant)
+
+
+def _run(storage, name, on_done):
+    try:
+        if generate_variants(storage, name) and on_done is not None:
+            on_done()
+    except (ThumbnailError, FileNotFoundError):
+        # "manage.py generate_logo_thumbnails" reports these
+        pass
+    finally:
+        close_old_connections()
+
+
+def schedule(storage, name, on_done=None):
+    """
+    Generate the variants of ``name`` in a background thread once the current
+    transaction commits, then call ``on_done()`` there.
+
+    Uploads stay fast and a pathological image only ties up a thumbnail
+    worker. ``THUMBNAIL_WORKERS = 0`` runs the work inline on commit instead.
+    """
+    global _executor
+    workers = getattr(settings, 'THUMBNAIL_WORKERS', 2)
+    if not workers:
+        transaction.on_commit(lambda: _run(storage, name, on_done))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnails')
+    transaction.on_commit(lambda: _executor.submit(_run, storage, name, on_done))
@@ -8,7 +8,8 @@ urlpatterns = [
     path('', include('jobs.urls')),
     path('accounts/', include('accounts.urls')),
     path('applicant/', include('applicants.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Public uploads only; CVs go through the permission-checked views
+    urlpatterns += static(settings.MEDIA_URL + 'company_logos/', document_root=settings.MEDIA_ROOT / 'company_logos')
\ No newline at end of file